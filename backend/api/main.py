@@ -1,13 +1,26 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import os
+import json
+import time
+import logging
 from werkzeug.utils import secure_filename
 import tempfile
 from app.services.file_handler import FileHandler
 from app.services.parser import DocumentParser
-from app.services.batch_processor import TextPreprocessor
+from app.services.parse_cache import ParseCache
+from app.services.batch_processor import TextPreprocessor, PreprocessingMode
 from app.services.similarity_engine import SimilarityEngine, SimilarityMetric, SimilarityConfig
+from app.services.encoders import EncoderBackend
+from app.services.chunking import ChunkingConfig, ChunkPooling
+from app.services.inference_scheduler import SchedulerConfig
+from app.services.sparse_prefilter import CascadeConfig, PrefilterMethod
 from flask_cors import CORS
 from app.services.skill_extractor import SkillExtractor
+from app.services.corpus_store import CorpusStore, CorpusError
+from app.services.match_pipeline import MatchPipeline, MatchError
+from app.services.job_queue import JobQueue
+from app.services.model_registry import ModelRegistry, current_rss_bytes
+from app.services.metrics import pipeline_metrics
 # import azure.functions as func  # Not needed for Hugging Face Spaces
 
 # Initialize Flask app
@@ -27,19 +40,172 @@ else:
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
+app.config['CACHE_FOLDER'] = os.environ.get('CACHE_FOLDER', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache'))
+app.config['EMBEDDING_CACHE_SIZE'] = int(os.environ.get('EMBEDDING_CACHE_SIZE', 50000))  # Set to 0 to disable
+app.config['PARSE_CACHE_SIZE'] = int(os.environ.get('PARSE_CACHE_SIZE', 1024))  # In-process entries
+app.config['PARSE_CACHE_DB'] = os.environ.get('PARSE_CACHE_DB', os.path.join(app.config['CACHE_FOLDER'], 'parsed.sqlite3'))  # Empty to disable
+app.config['PARSE_WORKERS'] = int(os.environ.get('PARSE_WORKERS', os.cpu_count() or 1))  # 1 parses in-process
+app.config['PARSE_TIMEOUT'] = float(os.environ.get('PARSE_TIMEOUT', 30))  # Seconds per file
+app.config['UPLOAD_SPOOL_THRESHOLD'] = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 4 * 1024 * 1024))  # Larger uploads go to disk
+app.config['SKILL_BATCH_SIZE'] = int(os.environ.get('SKILL_BATCH_SIZE', 32))  # Resumes per spaCy batch
+app.config['SKILL_PROCESSES'] = int(os.environ.get('SKILL_PROCESSES', 1))  # nlp.pipe processes
+app.config['SKILL_TAXONOMY_PATH'] = os.environ.get('SKILL_TAXONOMY_PATH') or None  # Bundled taxonomy if unset
+app.config['PREPROCESSING_MODE'] = os.environ.get('PREPROCESSING_MODE', 'accurate')  # 'accurate' or 'fast'
+app.config['PREPROCESS_WORKERS'] = int(os.environ.get('PREPROCESS_WORKERS', os.cpu_count() or 1))  # 1 runs in-process
+app.config['CORPUS_FOLDER'] = os.environ.get('CORPUS_FOLDER', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'corpus'))
+app.config['CORPUS_NPROBE'] = int(os.environ.get('CORPUS_NPROBE', 8))  # IVF partitions scored per search
+app.config['ENCODER_BACKEND'] = os.environ.get('ENCODER_BACKEND', 'torch')  # torch, torch-int8, onnx or onnx-int8
+app.config['ENCODER_EXPORT_DIR'] = os.environ.get('ENCODER_EXPORT_DIR', os.path.join(app.config['CACHE_FOLDER'], 'onnx'))
+app.config['EMBEDDING_CHUNKING'] = os.environ.get('EMBEDDING_CHUNKING', 'off')  # off, mean or max
+app.config['EMBEDDING_CHUNK_OVERLAP'] = int(os.environ.get('EMBEDDING_CHUNK_OVERLAP', 32))
+app.config['JOB_DB'] = os.environ.get('JOB_DB', os.path.join(app.config['CACHE_FOLDER'], 'jobs.sqlite3'))  # Empty keeps job state in memory
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 1))  # Jobs run concurrently per worker process
+app.config['JOB_BATCH_SIZE'] = int(os.environ.get('JOB_BATCH_SIZE', 32))  # Resumes per batch between progress updates
+app.config['MATCH_BATCH_SIZE'] = int(os.environ.get('MATCH_BATCH_SIZE', 256))  # Resumes per batch for synchronous matches (bounds memory)
+app.config['STREAM_BATCH_SIZE'] = int(os.environ.get('STREAM_BATCH_SIZE', 8))  # Resumes per batch in streaming mode
+app.config['MODEL_PRELOAD'] = os.environ.get('MODEL_PRELOAD', 'true').lower() == 'true'  # False loads models on first use
+app.config['INFERENCE_SCHEDULER'] = os.environ.get('INFERENCE_SCHEDULER', 'true').lower() == 'true'  # Batch encodes across requests
+app.config['INFERENCE_MAX_BATCH'] = int(os.environ.get('INFERENCE_MAX_BATCH', 64))  # Texts per encoder call
+app.config['INFERENCE_MAX_WAIT_MS'] = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5))  # Wait for concurrent requests
+app.config['INFERENCE_THREADS'] = int(os.environ.get('INFERENCE_THREADS', max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 1)))))  # Per worker
+app.config['CASCADE_PREFILTER'] = os.environ.get('CASCADE_PREFILTER', 'off')  # off, bm25 or tfidf
+app.config['CASCADE_KEEP_FRACTION'] = float(os.environ.get('CASCADE_KEEP_FRACTION', 0.2))  # Share of resumes embedded
+app.config['CASCADE_MIN_CANDIDATES'] = int(os.environ.get('CASCADE_MIN_CANDIDATES', 50))  # Smaller batches are not filtered
+app.config['CASCADE_VECTORIZER'] = os.environ.get('CASCADE_VECTORIZER', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'tfidf_vectorizer.pkl'))
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO').upper()  # DEBUG adds sampled per-document logs
+app.config['LOG_SAMPLE_RATE'] = float(os.environ.get('LOG_SAMPLE_RATE', 0.1))  # Fraction of documents logged at DEBUG
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'docx', 'txt'}  # Added txt for testing
 app.config['SERVER_NAME'] = None  # Remove server name constraint
 app.config['PREFERRED_URL_SCHEME'] = 'http'
 
+logging.basicConfig(
+    level=app.config['LOG_LEVEL'],
+    format='%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'
+)
+
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Initialize services
-file_handler = FileHandler(app.config['UPLOAD_FOLDER'])
-document_parser = DocumentParser()
-text_preprocessor = TextPreprocessor()
-similarity_engine = SimilarityEngine()
-skill_extractor = SkillExtractor()
+file_handler = FileHandler(app.config['UPLOAD_FOLDER'], spool_threshold=app.config['UPLOAD_SPOOL_THRESHOLD'])
+document_parser = DocumentParser(
+    cache=ParseCache(
+        max_entries=app.config['PARSE_CACHE_SIZE'],
+        db_path=app.config['PARSE_CACHE_DB'] or None
+    ),
+    workers=app.config['PARSE_WORKERS'],
+    timeout=app.config['PARSE_TIMEOUT']
+)
+
+# Models are built once per process by the registry: at import when MODEL_PRELOAD is
+# set (in the gunicorn master with preload_app, see gunicorn.conf.py), else on first use
+models = ModelRegistry()
+models.register(
+    'text_preprocessor',
+    lambda: TextPreprocessor(
+        mode=PreprocessingMode(app.config['PREPROCESSING_MODE']),
+        workers=app.config['PREPROCESS_WORKERS']
+    ),
+    warmup=lambda preprocessor: preprocessor.preprocess_text("warm up")
+)
+models.register(
+    'similarity_engine',
+    lambda: SimilarityEngine(
+        cache_dir=os.path.join(app.config['CACHE_FOLDER'], 'embeddings') if app.config['EMBEDDING_CACHE_SIZE'] > 0 else None,
+        cache_max_entries=app.config['EMBEDDING_CACHE_SIZE'],
+        backend=EncoderBackend(app.config['ENCODER_BACKEND']),
+        export_dir=app.config['ENCODER_EXPORT_DIR'],
+        chunking=ChunkingConfig(
+            pooling=ChunkPooling(app.config['EMBEDDING_CHUNKING']),
+            overlap=app.config['EMBEDDING_CHUNK_OVERLAP']
+        ) if app.config['EMBEDDING_CHUNKING'] != 'off' else None,
+        scheduler=SchedulerConfig(
+            max_batch_size=app.config['INFERENCE_MAX_BATCH'],
+            max_wait_ms=app.config['INFERENCE_MAX_WAIT_MS'],
+            threads=app.config['INFERENCE_THREADS']
+        ) if app.config['INFERENCE_SCHEDULER'] else None,
+        cascade=CascadeConfig(
+            method=PrefilterMethod(app.config['CASCADE_PREFILTER']),
+            keep_fraction=app.config['CASCADE_KEEP_FRACTION'],
+            min_candidates=app.config['CASCADE_MIN_CANDIDATES'],
+            vectorizer_path=app.config['CASCADE_VECTORIZER']
+        ) if app.config['CASCADE_PREFILTER'] != 'off' else None
+    ),
+    # Bypasses the embedding cache so the warm-up text is never stored
+    warmup=lambda engine: engine.encoder.encode(["warm up"])
+)
+models.register(
+    'skill_extractor',
+    lambda: SkillExtractor(
+        batch_size=app.config['SKILL_BATCH_SIZE'],
+        n_process=app.config['SKILL_PROCESSES'],
+        taxonomy_path=app.config['SKILL_TAXONOMY_PATH']
+    ),
+    warmup=lambda extractor: extractor.extract_skills("warm up")
+)
+def load_corpus_store():
+    store = CorpusStore(
+        app.config['CORPUS_FOLDER'],
+        dim=models.get('similarity_engine').get_embedding_dimension(),
+        nprobe=app.config['CORPUS_NPROBE'],
+        namespace=models.get('similarity_engine').cache_namespace
+    )
+    # Backfill the skill index of resumes ingested before it existed, so searches stay read-only
+    store.index_missing_skills(models.get('skill_extractor').extract_taxonomy_skills_batch)
+    return store
+
+models.register('corpus_store', load_corpus_store)
+models.register(
+    'match_pipeline',
+    lambda: MatchPipeline(
+        document_parser,
+        models.get('text_preprocessor'),
+        models.get('similarity_engine'),
+        models.get('skill_extractor'),
+        log_sample_rate=app.config['LOG_SAMPLE_RATE']
+    )
+)
+if app.config['MODEL_PRELOAD']:
+    models.preload()
+
+job_queue = JobQueue(
+    db_path=app.config['JOB_DB'] or None,
+    workers=app.config['JOB_WORKERS']
+)
+
+# Gauges read at scrape time; models that are not loaded yet are skipped, not loaded
+def cache_metrics(field):
+    caches = {'parse': document_parser.cache.stats() if document_parser.cache is not None else {}}
+    similarity_engine = models.peek('similarity_engine')
+    if similarity_engine is not None:
+        caches['embedding'] = similarity_engine.get_cache_stats()
+    return {(('cache', name),): stats[field] for name, stats in caches.items() if stats}
+
+pipeline_metrics.register_gauge('cache_hit_ratio', "Hit ratio of the parse and embedding caches", lambda: cache_metrics('hit_rate'))
+pipeline_metrics.register_gauge('cache_entries', "Entries held by the parse and embedding caches", lambda: cache_metrics('entries'))
+def scheduler_metrics(field):
+    similarity_engine = models.peek('similarity_engine')
+    if similarity_engine is None or similarity_engine.scheduler is None:
+        return {}
+    return {(): similarity_engine.scheduler.stats()[field]}
+
+pipeline_metrics.register_gauge('inference_requests', "Encode requests served by the inference scheduler", lambda: scheduler_metrics('requests'))
+pipeline_metrics.register_gauge('inference_batches', "Micro-batches run by the inference scheduler", lambda: scheduler_metrics('batches'))
+pipeline_metrics.register_gauge('inference_queued', "Encode requests waiting for the inference scheduler", lambda: scheduler_metrics('queued'))
+pipeline_metrics.register_gauge('resident_memory_bytes', "Resident set size of this worker process", lambda: {(): current_rss_bytes()})
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streaming responses are timed up to the first byte
+    if request.endpoint and request.endpoint != 'metrics' and 'request_start' in g:
+        elapsed = time.perf_counter() - g.request_start
+        pipeline_metrics.requests.inc(endpoint=request.endpoint, status=str(response.status_code))
+        pipeline_metrics.request_seconds.observe(elapsed, endpoint=request.endpoint)
+    return response
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
@@ -50,35 +216,75 @@ def index():
         "message": "Welcome to RezScan API",
         "endpoints": {
             "health": "/api/health",
-            "match": "/api/match"
+            "match": "/api/match",
+            "jobs": "/api/jobs",
+            "corpus_ingest": "/api/corpus/ingest",
+            "search": "/api/search",
+            "metrics": "/metrics"
         },
         "usage": {
             "health_check": "GET /api/health",
-            "resume_matching": "POST /api/match"
+            "resume_matching": "POST /api/match",
+            "resume_matching_job": "POST /api/jobs, then GET /api/jobs/<job_id>",
+            "corpus_ingest": "POST /api/corpus/ingest",
+            "corpus_search": "POST /api/search",
+            "metrics": "GET /metrics"
         },
         "note": "Please use HTTP for development server"
     })
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "RezScan API is running"})
+    health = {
+        "ready": models.ready,
+        "models": models.status(),
+        "rss_mb": round(current_rss_bytes() / (1024 * 1024), 1)
+    }
+    if not models.ready:
+        # Start loading in the background so the next probe can succeed
+        models.preload_async()
+        status = "unavailable" if models.failed else "loading"
+        return jsonify({"status": status, "message": "Models are not loaded", **health}), 503
+    return jsonify({"status": "healthy", "message": "RezScan API is running", **health})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(pipeline_metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # /api/match
-@app.route('/api/match', methods=['POST'])
-def match_resumes():
+def parse_skill_filter():
+    """
+    Read the optional boolean must-have skill filter (e.g. "java AND spring").
+    Returns a SkillQuery, or None when no filter is given.
+    Raises MatchError for malformed filters or skills outside the taxonomy.
+    """
+    expression = request.form.get('required_skills', '').strip()
+    if not expression:
+        return None
+    try:
+        return models.get('skill_extractor').parse_skill_filter(expression)
+    except ValueError as e:
+        raise MatchError(str(e))
+
+def parse_match_request():
+    """
+    Validate a match upload and read its similarity options.
+    Returns the job description file, the resume files, the similarity config and the skill filter.
+    Raises MatchError for invalid uploads.
+    """
     if 'job_description' not in request.files:
-        return jsonify({"error": "No job description file provided"}), 400
+        raise MatchError("No job description file provided")
     
     job_description = request.files['job_description']
     if not job_description or not allowed_file(job_description.filename):
-        return jsonify({"error": "Invalid job description file"}), 400
+        raise MatchError("Invalid job description file")
 
     if 'resumes' not in request.files:
-        return jsonify({"error": "No resume files provided"}), 400
+        raise MatchError("No resume files provided")
 
     resumes = request.files.getlist('resumes')
     if not resumes:
-        return jsonify({"error": "No resume files provided"}), 400
+        raise MatchError("No resume files provided")
 
     # Get similarity configuration
     similarity_metric = request.form.get('similarity_metric', 'cosine')
@@ -91,115 +297,282 @@ def match_resumes():
     top_k = int(request.form.get('top_k', 5))
     similarity_threshold = float(request.form.get('similarity_threshold', 0.0))
     
+    # Weights for the combined metric; a weight not given keeps its default (0.7 cosine, 0.3 euclidean)
+    weights = {
+        name: float(request.form[f"{name}_weight"])
+        for name in ('cosine', 'euclidean') if f"{name}_weight" in request.form
+    } or None
+    
     # Create similarity config
     similarity_config = SimilarityConfig(
         metric=metric,
         threshold=similarity_threshold,
-        top_k=top_k
+        top_k=top_k,
+        weights=weights
     )
+    return job_description, resumes, similarity_config, parse_skill_filter()
+
+@app.route('/api/match', methods=['POST'])
+def match_resumes():
+    try:
+        job_description, resumes, similarity_config, skill_filter = parse_match_request()
+    except MatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream_format = request.form.get('stream', '').lower()
+    if stream_format in ('ndjson', 'sse'):
+        return stream_match(job_description, resumes, similarity_config, skill_filter, stream_format)
 
+    jd_upload, resume_uploads = None, []
     try:
-        # Save uploaded files
-        jd_path, resume_paths = file_handler.save_files(job_description, resumes)
+        # Uploads are read batch by batch while parsing (large files are spooled to disk)
+        with pipeline_metrics.time_stage('save'):
+            jd_upload, resume_uploads = file_handler.read_files(job_description, resumes, lazy=True)
 
-        # Parse job description
-        jd_text = document_parser.parse_document(jd_path)
-        if not jd_text:
-            return jsonify({"error": "Failed to parse job description"}), 400
+        response = models.get('match_pipeline').run_to_completion(
+            jd_upload, resume_uploads, similarity_config,
+            batch_size=app.config['MATCH_BATCH_SIZE'],
+            skill_filter=skill_filter
+        )
+        return jsonify(response)
+
+    except MatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Parse resumes
-        resume_texts = []
-        for resume_path in resume_paths:
-            text = document_parser.parse_document(resume_path)
-            print(f"Parsing {resume_path}:")
-            print(f"Extracted text (first 200 chars): {text[:200] if text else 'None'}")
+    finally:
+        # Clean up any uploads that were spooled to disk
+        file_handler.cleanup_uploads([jd_upload] + resume_uploads)
+
+def stream_match(job_description, resumes, similarity_config, skill_filter, stream_format):
+    """
+    Stream match results as NDJSON lines or Server-Sent Events.
+    Each resume is sent as soon as its batch is scored, followed by a final ranking frame.
+    """
+    pipeline = models.get('match_pipeline')
+    with pipeline_metrics.time_stage('save'):
+        jd_upload, resume_uploads = file_handler.read_files(job_description, resumes, lazy=True)
+
+    def format_event(event):
+        data = json.dumps(event)
+        if stream_format == 'sse':
+            return f"event: {event['type']}\ndata: {data}\n\n"
+        return data + "\n"
+
+    def generate():
+        try:
+            for event in pipeline.stream(
+                jd_upload, resume_uploads, similarity_config,
+                batch_size=app.config['STREAM_BATCH_SIZE'],
+                skill_filter=skill_filter
+            ):
+                yield format_event(event)
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            yield format_event({"type": "error", "error": str(e)})
+        finally:
+            file_handler.cleanup_uploads([jd_upload] + resume_uploads)
+
+    # The request context (and its upload streams) stays open while the response streams
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if stream_format == 'sse' else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# /api/jobs
+@app.route('/api/jobs', methods=['POST'])
+def create_match_job():
+    try:
+        job_description, resumes, similarity_config, skill_filter = parse_match_request()
+    except MatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    jd_upload, resume_uploads = None, []
+    try:
+        # Uploads are read before returning; the job owns them until it finishes
+        pipeline = models.get('match_pipeline')
+        with pipeline_metrics.time_stage('save'):
+            jd_upload, resume_uploads = file_handler.read_files(job_description, resumes)
+        job_id = job_queue.submit(
+            lambda: pipeline.run(
+                jd_upload, resume_uploads, similarity_config,
+                batch_size=app.config['JOB_BATCH_SIZE'],
+                skill_filter=skill_filter
+            ),
+            on_finish=lambda: file_handler.cleanup_uploads([jd_upload] + resume_uploads)
+        )
+    except Exception as e:
+        file_handler.cleanup_uploads([jd_upload] + resume_uploads)
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_match_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job)
+
+# /api/corpus/ingest
+@app.route('/api/corpus/ingest', methods=['POST'])
+def ingest_resumes():
+    resumes = request.files.getlist('resumes')
+    if not resumes:
+        return jsonify({"error": "No resume files provided"}), 400
+
+    resume_uploads = []
+    try:
+        text_preprocessor = models.get('text_preprocessor')
+        similarity_engine = models.get('similarity_engine')
+        skill_extractor = models.get('skill_extractor')
+        corpus_store = models.get('corpus_store')
+
+        resume_uploads = file_handler.read_files_list(resumes)
+        parsed_resumes = document_parser.parse_documents(resume_uploads)
+
+        documents = []
+        failed = []
+        for upload, text in zip(resume_uploads, parsed_resumes):
             if text:
-                resume_texts.append(text)
+                documents.append({"filename": upload.filename, "text": text})
+            else:
+                failed.append(upload.filename)
 
-        if not resume_texts:
-            return jsonify({"error": "Failed to parse any resumes"}), 400
+        if not documents:
+            return jsonify({"error": "Failed to parse any resumes", "failed": failed}), 400
 
-        # Preprocess texts
-        jd_processed = text_preprocessor.preprocess_text(jd_text)
-        resume_processed = text_preprocessor.preprocess_batch({
-            f"resume_{i}": text for i, text in enumerate(resume_texts)
+        # Skip preprocessing and embedding for resumes already in the corpus
+        existing = corpus_store.find_existing([CorpusStore.content_hash(doc["text"]) for doc in documents])
+        new_documents = [doc for doc in documents if CorpusStore.content_hash(doc["text"]) not in existing]
+
+        if new_documents:
+            # Taxonomy skills feed the corpus skill index used by skill-filtered searches
+            skills = skill_extractor.extract_taxonomy_skills_batch([doc["text"] for doc in new_documents])
+            for doc, doc_skills in zip(new_documents, skills):
+                doc["skills"] = doc_skills
+            processed = text_preprocessor.preprocess_batch({
+                f"resume_{i}": doc["text"] for i, doc in enumerate(new_documents)
+            })
+            vectors = similarity_engine.encode(list(processed.values())).cpu().numpy()
+            corpus_store.add(new_documents, vectors)
+
+        resume_ids = corpus_store.find_existing([CorpusStore.content_hash(doc["text"]) for doc in documents])
+        return jsonify({
+            "message": "Resumes added to corpus",
+            "ingested": len(new_documents),
+            "duplicates": len(documents) - len(new_documents),
+            "failed": failed,
+            "resumes": [
+                {
+                    "resume_id": resume_ids[CorpusStore.content_hash(doc["text"])],
+                    "filename": doc["filename"]
+                }
+                for doc in documents
+            ],
+            "corpus": corpus_store.stats()
         })
 
-        print("Preprocessed JD:", jd_processed)
-        print("Preprocessed resumes:", resume_processed)
-
-        # Get text statistics
-        jd_stats = text_preprocessor.get_text_statistics(jd_text)
-        resume_stats = [
-            text_preprocessor.get_text_statistics(text)
-            for text in resume_texts
-        ]
-
-        # Compute similarities using BERT
-        matches = similarity_engine.compute_similarity(
-            jd_processed,
-            list(resume_processed.values()),
-            similarity_config
+    except CorpusError as e:
+        return jsonify({"error": str(e)}), 409
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    finally:
+        file_handler.cleanup_uploads(resume_uploads)
+
+# /api/search
+@app.route('/api/search', methods=['POST'])
+def search_corpus():
+    if 'job_description' not in request.files:
+        return jsonify({"error": "No job description file provided"}), 400
+
+    job_description = request.files['job_description']
+    if not job_description or not allowed_file(job_description.filename):
+        return jsonify({"error": "Invalid job description file"}), 400
+
+    try:
+        top_k = int(request.form.get('top_k', 10))
+        nprobe = int(request.form.get('nprobe', app.config['CORPUS_NPROBE']))
+    except ValueError:
+        return jsonify({"error": "top_k and nprobe must be integers"}), 400
+    if nprobe < 1:
+        return jsonify({"error": "nprobe must be at least 1"}), 400
+    try:
+        skill_filter = parse_skill_filter()
+    except MatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    jd_upload = None
+    try:
+        text_preprocessor = models.get('text_preprocessor')
+        similarity_engine = models.get('similarity_engine')
+        skill_extractor = models.get('skill_extractor')
+        corpus_store = models.get('corpus_store')
+
+        jd_upload = file_handler.read_files_list([job_description])[0]
+        jd_text = document_parser.parse_documents([jd_upload])[0]
+        if not jd_text:
+            return jsonify({"error": "Failed to parse job description"}), 400
+
+        # The skill index narrows the candidates before the JD is embedded
+        candidate_ids = None
+        if skill_filter is not None:
+            candidate_ids = corpus_store.match_skills(skill_filter)
+
+        if candidate_ids is not None and len(candidate_ids) == 0:
+            ranked = []
+        else:
+            jd_processed = text_preprocessor.preprocess_text(jd_text)
+            jd_vector = similarity_engine.encode([jd_processed]).cpu().numpy()[0]
+            # Only the returned top-k resumes are loaded and skill-matched
+            ranked = corpus_store.search(jd_vector, top_k=top_k, nprobe=nprobe, resume_ids=candidate_ids)
+        stored = corpus_store.get_documents([resume_id for resume_id, _ in ranked])
+        skill_match_results = skill_extractor.get_skill_matches(
+            jd_text,
+            [stored[resume_id]["text"] for resume_id, _ in ranked]
         )
-        
-        print("Matches:", matches)
-        
-        # Get ranking summary
-        ranking_summary = similarity_engine.get_ranking_summary(matches)
-        
-        # Get explanations for matches
-        match_explanations = {}
-        for match in matches:
-            resume_idx = match['index']
-            explanation = similarity_engine.get_similarity_explanation(
-                jd_processed,
-                resume_processed[f"resume_{resume_idx}"],
-                similarity_config
-            )
-            match_explanations[f"resume_{resume_idx}"] = explanation
-        
-        skill_matches = {}
-        for match in matches:
-            resume_idx = match['index']
-            skill_match = skill_extractor.get_skill_match(
-                jd_text,
-                resume_texts[resume_idx]
-            )
-            skill_matches[f"resume_{resume_idx}"] = skill_match
 
         response = {
-            "message": "Files processed successfully with BERT",
-            "similarity_metric": similarity_metric,
+            "message": "Corpus searched successfully",
             "top_k": top_k,
-            "similarity_threshold": similarity_threshold,
-            "ranking_summary": ranking_summary,
-            "job_description": {
-                "statistics": jd_stats
-            },
+            "nprobe": nprobe,
+            "corpus": corpus_store.stats(),
             "matches": [
                 {
-                    "resume_id": f"resume_{match['index']}",
-                    "rank": match['rank'],
-                    "similarity_score": match['similarity_score'],
-                    "explanation": match_explanations[f"resume_{match['index']}"],
-                    "skill_match": skill_matches[f"resume_{match['index']}"]
+                    "resume_id": resume_id,
+                    "filename": stored[resume_id]["filename"],
+                    "rank": rank,
+                    "similarity_score": score,
+                    "skill_match": skill_match
                 }
-                for match in matches
-            ],
-            "resumes": {
-                "count": len(resume_texts),
-                "statistics": resume_stats
-            }
+                for rank, ((resume_id, score), skill_match) in enumerate(zip(ranked, skill_match_results), start=1)
+            ]
         }
-
+        if skill_filter is not None:
+            response["skill_filter"] = {
+                "query": str(skill_filter),
+                "skills": sorted(skill_filter.skills),
+                "eligible": len(candidate_ids)
+            }
         return jsonify(response)
 
+    except CorpusError as e:
+        return jsonify({"error": str(e)}), 409
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
     finally:
-        # Clean up uploaded files
-        file_handler.cleanup_files(jd_path, resume_paths)
+        file_handler.cleanup_uploads([jd_upload])
 
 # Azure Functions handler - not needed for Hugging Face Spaces
 # def main(req: func.HttpRequest, context: func.Context) -> func.HttpResponse:
@@ -0,0 +1,129 @@
+import logging
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index for unit vectors.
+
+    Vectors are partitioned around ``nlist`` centroids found with spherical k-means.
+    A query only scores the vectors in its ``nprobe`` closest partitions, so
+    ``nprobe`` trades recall for latency: ``nprobe == nlist`` is an exact search.
+    The index stores only partition assignments; vectors stay in the caller's
+    (typically memory-mapped) matrix.
+    """
+
+    def __init__(self, dim: int, nlist: int, nprobe: int = 8, seed: int = 0):
+        """
+        Initialize an untrained index.
+
+        Args:
+            dim: Vector dimension
+            nlist: Number of partitions (k-means centroids)
+            nprobe: Default number of partitions scored per query
+            seed: Random seed for k-means initialization
+        """
+        self.logger = logging.getLogger(__name__)
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+
+    def train(self, vectors: np.ndarray, iterations: int = 10, sample_size: int = 50000) -> None:
+        """
+        Fit partition centroids with spherical k-means.
+
+        Args:
+            vectors: Unit vectors of shape [N, dim]
+            iterations: Number of k-means iterations
+            sample_size: Maximum number of vectors used for fitting
+        """
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > sample_size:
+            vectors = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        nlist = min(self.nlist, len(vectors))
+
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+                else:
+                    # Re-seed empty partitions so every centroid stays useful
+                    centroids[c] = vectors[rng.integers(len(vectors))]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        self.centroids = centroids
+        self.nlist = nlist
+        self.lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self.logger.info(f"Trained IVF index with {nlist} partitions on {len(vectors)} vectors")
+
+    def assign(self, vectors: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+        """
+        Find the partition of each vector.
+
+        Args:
+            vectors: Unit vectors of shape [N, dim]
+            batch_size: Vectors scored against the centroids per matmul
+
+        Returns:
+            Array of partition ids of shape [N]
+        """
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), batch_size):
+            batch = np.asarray(vectors[start:start + batch_size], dtype=np.float32)
+            assignments[start:start + batch_size] = np.argmax(batch @ self.centroids.T, axis=1)
+        return assignments
+
+    def set_assignments(self, assignments: np.ndarray) -> None:
+        """Rebuild the inverted lists from the partition id of every stored vector."""
+        assignments = np.asarray(assignments)
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(self.nlist + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]].astype(np.int64) for c in range(self.nlist)]
+
+    def search(
+        self,
+        query: np.ndarray,
+        vectors: np.ndarray,
+        top_k: int,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Approximate top-k search by inner product.
+
+        Args:
+            query: Unit query vector of shape [dim]
+            vectors: Matrix holding every indexed vector, addressed by id
+            top_k: Number of results to return
+            nprobe: Partitions to score (defaults to the index setting), clamped to [1, nlist]
+
+        Returns:
+            List of (id, score) pairs sorted by descending score
+        """
+        nprobe = min(max(1, self.nprobe if nprobe is None else nprobe), self.nlist)
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.concatenate([self.lists[c] for c in probes])
+        if len(candidates) == 0:
+            return []
+        candidates.sort()  # Sequential reads from the memory-mapped matrix
+        scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+        return top_k_scores(candidates, scores, top_k)
+
+
+def top_k_scores(ids: np.ndarray, scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+    """Select the top_k (id, score) pairs without fully sorting the scores."""
+    if top_k <= 0:
+        return []
+    if top_k < len(scores):
+        selected = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        selected = np.arange(len(scores))
+    selected = selected[np.argsort(-scores[selected], kind='stable')]
+    return [(int(ids[i]), float(scores[i])) for i in selected]
@@ -162,8 +162,14 @@
 #         } 
 
 
+import os
 import re
-from typing import List, Dict, Any
+from enum import Enum
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords, wordnet
@@ -171,25 +177,103 @@ from nltk.stem import WordNetLemmatizer
 from nltk import pos_tag
 import string
 import logging
+from app.services.chunking import SECTION_BREAK, split_sections
+
+class PreprocessingMode(Enum):
+    ACCURATE = "accurate"
+    FAST = "fast"
+
+# NLTK data used by TextPreprocessor; installed ahead of time, never downloaded at runtime
+NLTK_RESOURCES = (
+    'tokenizers/punkt',
+    'corpora/stopwords',
+    'corpora/wordnet',
+    'taggers/averaged_perceptron_tagger'
+)
+
+# Fast mode: URLs, emails and digits are dropped, other punctuation becomes a space
+_FAST_CLEAN_PATTERN = re.compile(r'(http\S+|www\S+|https\S+|\S+@\S+|\d+)|[^\w\s]')
+
+def _fast_clean_replacement(match: re.Match) -> str:
+    return '' if match.group(1) else ' '
+
+@dataclass
+class AnalyzedDocument:
+    """
+    Result of one cleaning and tokenization pass over a document.
+
+    Statistics count the words of the cleaned text, split on whitespace: lowercased,
+    without URLs, emails, digits and punctuation, and before stop words are removed.
+    Cleanup is the same in both modes, so FAST and ACCURATE report the same values.
+    (Before analyze_text, word_tokenize over the raw text also counted punctuation
+    and numbers as words.)
+    """
+    processed_text: str = ""  # Space-separated lemmas, each section on its own line
+    statistics: Dict[str, Any] = field(default_factory=lambda: {
+        'word_count': 0,
+        'unique_words': 0,
+        'avg_word_length': 0,
+        'keyword_density': 0
+    })
+
+    def keywords(self, top_n: int = 10) -> List[str]:
+        """Most frequent lemmas of the preprocessed text."""
+        counts = Counter(token for token in self.processed_text.split() if len(token) > 2)
+        return [word for word, _ in counts.most_common(top_n)]
+
+_worker_preprocessor = None
+
+def _init_preprocess_worker(mode: str, pos_tagging: bool, lemma_cache_size: int) -> None:
+    """Pool initializer: build one preprocessor per worker and load NLTK resources up front."""
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(PreprocessingMode(mode), pos_tagging, lemma_cache_size)
+    # Stopwords are loaded by the constructor; touch the tagger and WordNet so the
+    # first chunk does not pay their lazy-loading cost
+    _worker_preprocessor.preprocess_text("warm up the tagger and lemmatizer")
+
+def _analyze_chunk(texts: List[str]) -> List[AnalyzedDocument]:
+    """Pool entry point: analyze a chunk of documents."""
+    return [_worker_preprocessor.analyze_text(text) for text in texts]
 
 class TextPreprocessor:
     """Text preprocessing pipeline for resume and job description analysis."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        mode: PreprocessingMode = PreprocessingMode.ACCURATE,
+        pos_tagging: Optional[bool] = None,
+        lemma_cache_size: int = 65536,
+        workers: int = 1,
+        min_parallel_batch: int = 16
+    ):
+        """
+        Initialize the text preprocessor.
+        
+        Args:
+            mode: ACCURATE runs the original regex passes and word_tokenize; FAST uses
+                one precompiled regex and whitespace tokenization
+            pos_tagging: Whether to POS-tag tokens before lemmatizing. Defaults to True
+                in ACCURATE mode and False in FAST mode, where every token is
+                lemmatized as a noun
+            lemma_cache_size: Size of the memoized (token, POS) -> lemma table
+            workers: Worker processes for preprocess_batch (1 keeps it in-process)
+            min_parallel_batch: Smallest batch worth sending to the worker pool
+        """
         self.logger = logging.getLogger(__name__)
+        self.mode = mode
+        self.pos_tagging = pos_tagging if pos_tagging is not None else mode == PreprocessingMode.ACCURATE
         self.lemmatizer = WordNetLemmatizer()
+        # Resumes repeat the same vocabulary, so most WordNet lookups are cache hits
+        self._lemmatize = lru_cache(maxsize=lemma_cache_size)(self.lemmatizer.lemmatize)
+        self.lemma_cache_size = lemma_cache_size
+        self.workers = workers
+        self.min_parallel_batch = min_parallel_batch
+        self._executor = None
+        self._executor_workers = 0
         
-        # Download required NLTK data
-        try:
-            nltk.data.find('tokenizers/punkt')
-            nltk.data.find('corpora/stopwords')
-            nltk.data.find('corpora/wordnet')
-            nltk.data.find('taggers/averaged_perceptron_tagger')
-        except LookupError:
-            nltk.download('punkt')
-            nltk.download('stopwords')
-            nltk.download('wordnet')
-            nltk.download('averaged_perceptron_tagger')
+        # Fail fast on missing NLTK data (install with: python -m app.services.model_registry --download)
+        for resource_path in NLTK_RESOURCES:
+            nltk.data.find(resource_path)
         
         self.stop_words = set(stopwords.words('english'))
         # Add custom stop words specific to resumes and job descriptions
@@ -224,65 +308,202 @@ class TextPreprocessor:
         Returns:
             Preprocessed text
         """
+        return self.analyze_text(text).processed_text
+
+    def analyze_text(self, text: str) -> AnalyzedDocument:
+        """
+        Clean and tokenize a document once, deriving its preprocessed text and its
+        statistics from the same token stream.
+        
+        Args:
+            text: Raw text to analyze
+            
+        Returns:
+            AnalyzedDocument with the preprocessed text and text statistics
+        """
         if not text:
-            return ""
+            return AnalyzedDocument()
 
         try:
-            # Convert to lowercase
-            text = text.lower()
-            
-            # Remove lines that are mostly non-alphanumeric (e.g., lines of underscores)
-            lines = text.split('\n')
-            lines = [line for line in lines if sum(c.isalnum() for c in line) > len(line) * 0.3]
-            text = '\n'.join(lines)
-            
-            # Remove URLs
-            text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-            
-            # Remove email addresses
-            text = re.sub(r'\S+@\S+', '', text)
-            
-            # Remove special characters and digits
-            text = re.sub(r'[^\w\s]', ' ', text)
-            text = re.sub(r'\d+', '', text)
-            
-            # Remove extra whitespace
-            text = ' '.join(text.split())
-            
-            # Tokenize
-            tokens = word_tokenize(text)
-            
-            # POS tagging
-            pos_tags = pos_tag(tokens)
+            cleaned = self._clean_sections(text)
+            return AnalyzedDocument(
+                processed_text=self._lemmatize_tokens([self._tokenize(section) for section in cleaned]),
+                statistics=self._token_statistics([word for section in cleaned for word in section.split()])
+            )
             
+        except Exception as e:
+            self.logger.error(f"Error preprocessing text: {str(e)}")
+            return AnalyzedDocument()
+
+    def _clean_sections(self, text: str) -> List[str]:
+        """Clean each section of a document, in the preprocessor's mode."""
+        # Section headings are found on the raw lines, before cleanup removes them as
+        # stop words or merges them into the surrounding text
+        clean = self._clean_fast if self.mode == PreprocessingMode.FAST else self._clean
+        return [clean(section) for section in split_sections(text)]
+
+    def _tokenize(self, cleaned: str) -> List[str]:
+        """Tokens to lemmatize: word_tokenize in ACCURATE mode, whitespace in FAST mode."""
+        if self.mode == PreprocessingMode.FAST:
+            return cleaned.split()
+        return word_tokenize(cleaned)
+
+    def _clean(self, text: str) -> str:
+        """Regex cleanup for ACCURATE mode."""
+        # Convert to lowercase
+        text = text.lower()
+        
+        # Remove lines that are mostly non-alphanumeric (e.g., lines of underscores)
+        lines = text.split('\n')
+        lines = [line for line in lines if sum(c.isalnum() for c in line) > len(line) * 0.3]
+        text = '\n'.join(lines)
+        
+        # Remove URLs
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        
+        # Remove email addresses
+        text = re.sub(r'\S+@\S+', '', text)
+        
+        # Remove special characters and digits
+        text = re.sub(r'[^\w\s]', ' ', text)
+        text = re.sub(r'\d+', '', text)
+        
+        # Remove extra whitespace
+        return ' '.join(text.split())
+
+    def _clean_fast(self, text: str) -> str:
+        """Single-regex cleanup for FAST mode, equivalent to the ACCURATE passes."""
+        text = text.lower()
+        
+        # Remove lines that are mostly non-alphanumeric (e.g., lines of underscores)
+        lines = [line for line in text.split('\n') if sum(c.isalnum() for c in line) > len(line) * 0.3]
+        
+        # URLs, emails, punctuation and digits in one pass
+        return _FAST_CLEAN_PATTERN.sub(_fast_clean_replacement, '\n'.join(lines))
+
+    def _token_statistics(self, tokens: List[str]) -> Dict[str, Any]:
+        """Word count, vocabulary size, average word length and keyword density of the cleaned words."""
+        if not tokens:
+            return AnalyzedDocument().statistics
+
+        # Calculate average word length
+        avg_length = sum(len(token) for token in tokens) / len(tokens)
+        
+        # Calculate keyword density (percentage of non-stop words)
+        keywords = [token for token in tokens if token not in self.stop_words]
+        
+        return {
+            'word_count': len(tokens),
+            'unique_words': len(set(tokens)),
+            'avg_word_length': round(avg_length, 2),
+            'keyword_density': round(len(keywords) / len(tokens) * 100, 2)
+        }
+
+    def _lemmatize_tokens(self, sections: List[List[str]]) -> str:
+        """Filter stopwords and short tokens, lemmatize the rest and join them, one line per section."""
+        tokens = [token for section in sections for token in section]
+        if self.pos_tagging:
+            tagged = [(token, self.get_wordnet_pos(pos)) for token, pos in pos_tag(tokens)]
+        else:
+            tagged = [(token, wordnet.NOUN) for token in tokens]
+        
+        lines = []
+        position = 0
+        for section in sections:
             # Lemmatize with POS tags, remove stopwords, filter out non-alphanumeric tokens and short tokens
             processed_tokens = [
-                self.lemmatizer.lemmatize(token, self.get_wordnet_pos(pos))
-                for token, pos in pos_tags
+                self._lemmatize(token, pos)
+                for token, pos in tagged[position:position + len(section)]
                 if token.isalnum() and token not in self.stop_words and len(token) > 2
             ]
-            
-            return ' '.join(processed_tokens)
-            
-        except Exception as e:
-            self.logger.error(f"Error preprocessing text: {str(e)}")
-            return ""
+            position += len(section)
+            if processed_tokens:
+                lines.append(' '.join(processed_tokens))
+        
+        return SECTION_BREAK.join(lines)
 
-    def preprocess_batch(self, documents: Dict[str, str]) -> Dict[str, str]:
+    def preprocess_batch(
+        self,
+        documents: Dict[str, str],
+        workers: Optional[int] = None,
+        chunksize: Optional[int] = None
+    ) -> Dict[str, str]:
         """
-        Preprocess multiple documents.
+        Preprocess multiple documents, in a process pool when the batch is large enough.
         
         Args:
             documents: Dictionary mapping document IDs to their text content
+            workers: Worker processes to use (defaults to the preprocessor setting)
+            chunksize: Documents sent to a worker per task (defaults to about four
+                chunks per worker)
             
         Returns:
-            Dictionary mapping document IDs to preprocessed text
+            Dictionary mapping document IDs to preprocessed text, in input order
         """
         return {
-            doc_id: self.preprocess_text(text)
-            for doc_id, text in documents.items()
+            doc_id: analyzed.processed_text
+            for doc_id, analyzed in self.analyze_batch(documents, workers, chunksize).items()
         }
 
+    def analyze_batch(
+        self,
+        documents: Dict[str, str],
+        workers: Optional[int] = None,
+        chunksize: Optional[int] = None
+    ) -> Dict[str, AnalyzedDocument]:
+        """
+        Analyze multiple documents, in a process pool when the batch is large enough.
+        
+        Args:
+            documents: Dictionary mapping document IDs to their text content
+            workers: Worker processes to use (defaults to the preprocessor setting)
+            chunksize: Documents sent to a worker per task (defaults to about four
+                chunks per worker)
+            
+        Returns:
+            Dictionary mapping document IDs to AnalyzedDocuments, in input order
+        """
+        workers = workers or self.workers
+        if workers <= 1 or len(documents) < self.min_parallel_batch:
+            return {
+                doc_id: self.analyze_text(text)
+                for doc_id, text in documents.items()
+            }
+
+        doc_ids = list(documents)
+        texts = list(documents.values())
+        chunksize = chunksize or max(1, -(-len(texts) // (workers * 4)))
+        chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+
+        try:
+            analyzed = []
+            for chunk_result in self._get_executor(workers).map(_analyze_chunk, chunks):
+                analyzed.extend(chunk_result)
+        except Exception as e:
+            self.logger.error(f"Parallel preprocessing failed, falling back to serial: {str(e)}")
+            self.shutdown()
+            analyzed = [self.analyze_text(text) for text in texts]
+
+        return dict(zip(doc_ids, analyzed))
+
+    def shutdown(self) -> None:
+        """Stop the preprocessing worker pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self, workers: int) -> ProcessPoolExecutor:
+        if self._executor is not None and self._executor_workers != workers:
+            self.shutdown()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_preprocess_worker,
+                initargs=(self.mode.value, self.pos_tagging, self.lemma_cache_size)
+            )
+            self._executor_workers = workers
+        return self._executor
+
     def extract_keywords(self, text: str, top_n: int = 10) -> List[str]:
         """
         Extract top keywords from text.
@@ -297,22 +518,22 @@ class TextPreprocessor:
         if not text:
             return []
             
-        # Tokenize and count frequencies
-        tokens = word_tokenize(text.lower())
-        word_freq = {}
-        
-        for token in tokens:
-            if token not in self.stop_words and len(token) > 2:
-                word_freq[token] = word_freq.get(token, 0) + 1
-        
-        # Sort by frequency and get top N
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, _ in sorted_words[:top_n]]
+        # Preprocessed text is already tokenized; count its space-separated lemmas
+        word_freq = Counter(
+            token for token in text.lower().split()
+            if token not in self.stop_words and len(token) > 2
+        )
+        return [word for word, _ in word_freq.most_common(top_n)]
 
     def get_text_statistics(self, text: str) -> Dict[str, Any]:
         """
         Get basic statistics about the text.
         
+        Only cleans the text (the same pass analyze_text starts with), skipping
+        tokenization, POS tagging and lemmatization. Use analyze_text instead when the
+        preprocessed text is needed as well, so the document is only cleaned once. See
+        AnalyzedDocument for what counts as a word.
+        
         Args:
             text: Raw text to analyze
             
@@ -320,28 +541,11 @@ class TextPreprocessor:
             Dictionary containing text statistics
         """
         if not text:
-            return {
-                'word_count': 0,
-                'unique_words': 0,
-                'avg_word_length': 0,
-                'keyword_density': 0
-            }
+            return AnalyzedDocument().statistics
+
+        try:
+            return self._token_statistics([word for section in self._clean_sections(text) for word in section.split()])
             
-        # Basic statistics
-        words = word_tokenize(text.lower())
-        unique_words = set(words)
-        
-        # Calculate average word length
-        total_length = sum(len(word) for word in words)
-        avg_length = total_length / len(words) if words else 0
-        
-        # Calculate keyword density (percentage of non-stop words)
-        keywords = [word for word in words if word not in self.stop_words]
-        keyword_density = len(keywords) / len(words) if words else 0
-        
-        return {
-            'word_count': len(words),
-            'unique_words': len(unique_words),
-            'avg_word_length': round(avg_length, 2),
-            'keyword_density': round(keyword_density * 100, 2)
-        }
+        except Exception as e:
+            self.logger.error(f"Error computing text statistics: {str(e)}")
+            return AnalyzedDocument().statistics
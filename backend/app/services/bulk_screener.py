@@ -0,0 +1,253 @@
+import os
+import csv
+import json
+import time
+import heapq
+import hashlib
+import logging
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional
+
+from app.services.similarity_engine import SimilarityConfig, SimilarityMetric
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+
+class ScreeningError(ValueError):
+    """Raised when a screening run cannot start or resume."""
+
+
+@dataclass
+class ScreeningConfig:
+    metric: SimilarityMetric = SimilarityMetric.COSINE
+    threshold: float = 0.0
+    top_k: int = 10  # Matches kept per JD (0 keeps every resume above the threshold)
+    batch_size: int = 256  # Resumes parsed, embedded and scored per checkpoint
+    skills: bool = True  # Run skill matching on the final matches
+
+
+def find_documents(paths: List[str]) -> List[str]:
+    """
+    Collect the PDF and DOCX files under the given files and directories.
+
+    Args:
+        paths: Files and directories (searched recursively)
+
+    Returns:
+        Sorted, de-duplicated absolute file paths
+    """
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        found.add(os.path.abspath(os.path.join(root, name)))
+        elif os.path.isfile(path):
+            found.add(os.path.abspath(path))
+        else:
+            raise ScreeningError(f"No such file or directory: {path}")
+    return sorted(found)
+
+
+class BulkScreener:
+    """
+    Offline screening of M job descriptions against N resumes read from disk.
+
+    Every JD is parsed, preprocessed and encoded once. Resumes are processed in
+    batches of ``batch_size``: parsed and preprocessed in process pools, encoded in
+    one call and scored against every JD with one JDs x batch matmul, keeping a
+    running top-k per JD. After each
+    batch the rankings and the number of resumes done are written to a checkpoint,
+    so an interrupted run resumes at the next batch. Skill matching runs at the end,
+    on the final matches only; their text comes from the parse cache if one is set.
+    """
+
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, document_parser, text_preprocessor, similarity_engine, skill_extractor, config: ScreeningConfig):
+        """
+        Initialize the screener with the application's services.
+
+        Args:
+            document_parser: DocumentParser used for the files
+            text_preprocessor: TextPreprocessor applied before embedding
+            similarity_engine: SimilarityEngine used for ranking
+            skill_extractor: SkillExtractor used for skill matching
+            config: Screening settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.document_parser = document_parser
+        self.text_preprocessor = text_preprocessor
+        self.similarity_engine = similarity_engine
+        self.skill_extractor = skill_extractor
+        self.config = config
+        self.similarity_config = SimilarityConfig(metric=config.metric, threshold=config.threshold, top_k=config.top_k)
+
+    def run(self, jd_paths: List[str], resume_paths: List[str], checkpoint_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rank the resumes for every job description.
+
+        Args:
+            jd_paths: Job description files
+            resume_paths: Resume files, processed in this order
+            checkpoint_path: Where progress is saved after each batch (not saved if None)
+
+        Returns:
+            One row per (JD, match), ordered by JD and rank
+
+        Raises:
+            ScreeningError: If no JD can be parsed, or the checkpoint belongs to another run
+        """
+        jd_texts: Dict[str, str] = {}
+        for jd_path, text in zip(jd_paths, self.document_parser.parse_documents(jd_paths)):
+            if text:
+                jd_texts[jd_path] = text
+            else:
+                self.logger.warning(f"Failed to parse job description {jd_path}")
+        if not jd_texts:
+            raise ScreeningError("Failed to parse any job descriptions")
+        jd_processed = [self.text_preprocessor.preprocess_text(text) for text in jd_texts.values()]
+        jd_embeddings = self.similarity_engine.encode(jd_processed)
+
+        fingerprint = self._fingerprint(jd_paths, resume_paths)
+        state = self._load_checkpoint(checkpoint_path, fingerprint)
+        if state['done']:
+            self.logger.info(f"Resuming from checkpoint after {state['done']} of {len(resume_paths)} resumes")
+
+        start_time = time.perf_counter()
+        for start in range(state['done'], len(resume_paths), self.config.batch_size):
+            batch = resume_paths[start:start + self.config.batch_size]
+            self._screen_batch(batch, jd_texts, jd_embeddings, state)
+            state['done'] = start + len(batch)
+            if checkpoint_path:
+                self._save_checkpoint(checkpoint_path, state)
+            elapsed = time.perf_counter() - start_time
+            self.logger.info(
+                f"Screened {state['done']}/{len(resume_paths)} resumes "
+                f"({state['parsed']} parsed, {len(batch) / max(elapsed, 1e-9):.1f} resumes/s)"
+            )
+            start_time = time.perf_counter()
+
+        return self._build_rows(jd_texts, state['rankings'])
+
+    def _screen_batch(self, batch: List[str], jd_texts: Dict[str, str], jd_embeddings, state: Dict[str, Any]) -> None:
+        """Parse, preprocess, encode and score one batch, merging it into state['rankings']."""
+        parsed = [
+            (path, text) for path, text in zip(batch, self.document_parser.parse_documents(batch)) if text
+        ]
+        for path in set(batch) - {path for path, _ in parsed}:
+            self.logger.warning(f"Failed to parse {path}")
+        state['parsed'] += len(parsed)
+        if not parsed:
+            return
+
+        analyses = list(self.text_preprocessor.analyze_batch({path: text for path, text in parsed}).values())
+        embeddings = self.similarity_engine.encode([analysis.processed_text for analysis in analyses])
+        rankings = self.similarity_engine.rank_embeddings_matrix(jd_embeddings, embeddings, self.similarity_config)
+        for jd_path, ranking in zip(jd_texts, rankings):
+            batch_matches = [
+                {
+                    'resume': parsed[match['index']][0],
+                    'similarity_score': match['similarity_score'],
+                    'cosine_similarity': match['cosine_similarity'],
+                    'euclidean_similarity': match['euclidean_similarity']
+                }
+                for match in ranking
+            ]
+            merged = state['rankings'].get(jd_path, []) + batch_matches
+            key = lambda match: match['similarity_score']
+            if self.config.top_k > 0:
+                state['rankings'][jd_path] = heapq.nlargest(self.config.top_k, merged, key=key)
+            else:
+                state['rankings'][jd_path] = sorted(merged, key=key, reverse=True)
+
+    def _build_rows(self, jd_texts: Dict[str, str], rankings: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Attach ranks (and skill matches) to the final rankings."""
+        skill_matches: Dict[str, List[Dict[str, Any]]] = {}
+        if self.config.skills:
+            matched_paths = sorted({match['resume'] for ranking in rankings.values() for match in ranking})
+            resume_texts = dict(zip(matched_paths, self.document_parser.parse_documents(matched_paths)))
+            for jd_path, ranking in rankings.items():
+                skill_matches[jd_path] = self.skill_extractor.get_skill_matches(
+                    jd_texts[jd_path],
+                    [resume_texts[match['resume']] or '' for match in ranking]
+                )
+
+        rows = []
+        for jd_path in jd_texts:
+            ranking = rankings.get(jd_path, [])
+            for rank, match in enumerate(ranking, start=1):
+                row = {'job_description': jd_path, 'rank': rank, **match}
+                if jd_path in skill_matches:
+                    skill_match = skill_matches[jd_path][rank - 1]
+                    row['match_percentage'] = skill_match['match_percentage']
+                    row['matching_skills'] = sorted(skill_match['matching_skills'])
+                    row['missing_skills'] = sorted(skill_match['missing_skills'])
+                rows.append(row)
+        return rows
+
+    def _fingerprint(self, jd_paths: List[str], resume_paths: List[str]) -> str:
+        """Identify a run by its inputs and the settings that affect its rankings."""
+        settings = asdict(self.config)
+        settings['metric'] = self.config.metric.value
+        settings.pop('skills')
+        digest = hashlib.sha256(json.dumps({
+            'jds': jd_paths,
+            'resumes': resume_paths,
+            'settings': settings,
+            # Model, encoder backend and chunking, as for embedding cache keys
+            'embeddings': self.similarity_engine.cache_namespace,
+            'preprocessing': self.text_preprocessor.mode.value
+        }, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _load_checkpoint(self, path: Optional[str], fingerprint: str) -> Dict[str, Any]:
+        state = {'version': self.CHECKPOINT_VERSION, 'fingerprint': fingerprint, 'done': 0, 'parsed': 0, 'rankings': {}}
+        if not path or not os.path.exists(path):
+            return state
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get('version') != self.CHECKPOINT_VERSION or saved.get('fingerprint') != fingerprint:
+            raise ScreeningError(
+                f"Checkpoint {path} was written for different inputs or settings; "
+                "delete it to start over"
+            )
+        return saved
+
+    def _save_checkpoint(self, path: str, state: Dict[str, Any]) -> None:
+        # Written to a temporary file and renamed, so an interruption never leaves half a checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+
+def write_rows(rows: List[Dict[str, Any]], path: str, output_format: Optional[str] = None) -> None:
+    """
+    Write screening rows as CSV or JSON Lines.
+
+    Args:
+        rows: Rows returned by BulkScreener.run
+        path: Output file
+        output_format: 'csv' or 'jsonl' (taken from the file extension if None)
+    """
+    output_format = output_format or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        if output_format == 'jsonl':
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        else:
+            fields = ['job_description', 'rank', 'resume', 'similarity_score', 'cosine_similarity', 'euclidean_similarity']
+            if rows and 'match_percentage' in rows[0]:
+                fields += ['match_percentage', 'matching_skills', 'missing_skills']
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({
+                    field: ';'.join(row[field]) if isinstance(row[field], list) else row[field]
+                    for field in fields
+                })
+    os.replace(tmp_path, path)
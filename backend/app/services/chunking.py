@@ -0,0 +1,150 @@
+import re
+import logging
+import itertools
+from enum import Enum
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Resume and JD section headings at which chunks preferably start
+SECTION_HEADINGS = frozenset({
+    'summary', 'profile', 'objective', 'experience', 'employment', 'education',
+    'skill', 'skills', 'project', 'projects', 'internship', 'internships',
+    'certification', 'certifications', 'achievement', 'achievements', 'award', 'awards',
+    'publication', 'publications', 'language', 'languages', 'interest', 'interests',
+    'responsibility', 'responsibilities', 'requirement', 'requirements',
+    'qualification', 'qualifications'
+})
+# Words that may join heading words in a heading line, e.g. "Projects & Achievements"
+HEADING_CONNECTIVES = frozenset({'and', 'of', '&', '/', '-'})
+MAX_HEADING_WORDS = 4
+
+# Preprocessed text starts each section after the first on a new line
+SECTION_BREAK = '\n'
+
+
+def is_section_heading(line: str) -> bool:
+    """
+    Whether a raw text line is a section heading, e.g. "WORK EXPERIENCE" or "Technical Skills:".
+
+    The line must be short, name a known section, and be set apart as a heading
+    (upper case, title case, or ending in a colon), so body text that merely
+    mentions a project or a skill does not start a section.
+    """
+    line = line.strip()
+    words = line.rstrip(':').split()
+    if not words or len(words) > MAX_HEADING_WORDS:
+        return False
+    if not any(re.sub(r'[^a-z]', '', word.lower()) in SECTION_HEADINGS for word in words):
+        return False
+    return (
+        line.endswith(':')
+        or line.isupper()
+        or all(word[0].isupper() for word in words if word.lower() not in HEADING_CONNECTIVES)
+    )
+
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split raw document text into sections at heading lines.
+
+    Args:
+        text: Parsed document text, with its line breaks
+
+    Returns:
+        Section texts in document order, each starting with its heading line
+        (the first one may have no heading)
+    """
+    sections: List[List[str]] = []
+    for line in text.split('\n'):
+        if not sections or is_section_heading(line):
+            sections.append([])
+        sections[-1].append(line)
+    return ['\n'.join(lines) for lines in sections]
+
+
+class ChunkPooling(Enum):
+    MEAN = "mean"
+    MAX = "max"
+
+
+@dataclass
+class ChunkingConfig:
+    pooling: ChunkPooling = ChunkPooling.MEAN
+    max_tokens: Optional[int] = None  # Defaults to the model's sequence limit
+    overlap: int = 32
+
+
+class DocumentChunker:
+    """
+    Splits documents into windows that fit the encoder's sequence limit.
+
+    Windows are measured in the model's word pieces. Section headings are found in
+    the raw text before preprocessing (see split_sections), and TextPreprocessor
+    starts each section on a new line. A window ends early at a section start in its
+    second half, so chunks tend to follow resume sections; otherwise consecutive
+    windows overlap by ``overlap`` word pieces so no phrase is cut in two without
+    also appearing whole in one chunk.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int, overlap: int = 32):
+        """
+        Initialize the chunker.
+
+        Args:
+            tokenizer: Hugging Face tokenizer of the encoder model
+            max_tokens: Word pieces per chunk, excluding special tokens
+            overlap: Word pieces shared by consecutive windows within a section
+        """
+        self.logger = logging.getLogger(__name__)
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap = min(overlap, max_tokens // 2)
+
+    def chunk(self, text: str) -> List[str]:
+        """
+        Split a document into chunks.
+
+        Args:
+            text: Preprocessed document text, one section per line
+
+        Returns:
+            Chunk texts in document order (a single chunk for short documents)
+        """
+        sections = [section.split() for section in text.split(SECTION_BREAK)]
+        words = [word for section in sections for word in section]
+        section_starts = set(itertools.accumulate(len(section) for section in sections[:-1]))
+        if not words:
+            return [text]
+        lengths = [len(ids) for ids in self.tokenizer(words, add_special_tokens=False)['input_ids']]
+        if sum(lengths) <= self.max_tokens:
+            return [' '.join(words)]
+
+        chunks = []
+        start = 0
+        while start < len(words):
+            # Extend the window while it fits (always at least one word)
+            end, size = start, 0
+            while end < len(words) and (end == start or size + lengths[end] <= self.max_tokens):
+                size += lengths[end]
+                end += 1
+            if end == len(words):
+                chunks.append(' '.join(words[start:end]))
+                break
+
+            # Prefer ending the window where a new section starts
+            heading = next(
+                (i for i in range(end - 1, start + (end - start) // 2, -1) if i in section_starts),
+                None
+            )
+            if heading is not None:
+                chunks.append(' '.join(words[start:heading]))
+                start = heading
+                continue
+
+            chunks.append(' '.join(words[start:end]))
+            next_start, shared = end, 0
+            while next_start - 1 > start and shared + lengths[next_start - 1] <= self.overlap:
+                next_start -= 1
+                shared += lengths[next_start]
+            start = next_start
+        return chunks
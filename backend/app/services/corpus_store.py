@@ -0,0 +1,484 @@
+import os
+import json
+import hashlib
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Any, Optional, Tuple
+import numpy as np
+from app.services.ann_index import IVFIndex, top_k_scores
+from app.services.skill_index import SkillIndex, SkillQuery
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# SQLite's default limit on bound variables per statement is 999 on older builds
+SQL_CHUNK_SIZE = 500
+
+
+class CorpusError(ValueError):
+    """Raised when the corpus was embedded with a different model or settings."""
+
+
+class CorpusStore:
+    """
+    Persistent resume corpus: embeddings, metadata and an IVF index for JD search.
+
+    Layout of ``store_dir``:
+        vectors.f32      append-only float32 matrix of unit embeddings, row id = resume id
+        assignments.i32  append-only IVF partition id of every row (once the index is trained)
+        index.npz        IVF partition centroids and the corpus size they were trained on
+        corpus.sqlite3   resume metadata, cleaned text, taxonomy skills and the
+                         embedding namespace the vectors were computed with
+
+    Below ``min_train_size`` resumes, search is an exact brute-force scan. Once the
+    corpus reaches that size the IVF index is trained, and it is retrained whenever
+    the corpus has grown by ``retrain_factor`` since the last training. The skills
+    stored at ingest feed an in-memory SkillIndex (one bitset per skill over resume
+    ids) that restricts a search to the resumes satisfying a skill filter.
+    """
+
+    VECTORS_FILE = 'vectors.f32'
+    ASSIGNMENTS_FILE = 'assignments.i32'
+    CENTROIDS_FILE = 'index.npz'
+    DB_FILE = 'corpus.sqlite3'
+    LOCK_FILE = '.lock'
+
+    def __init__(
+        self,
+        store_dir: str,
+        dim: int,
+        nprobe: int = 8,
+        min_train_size: int = 2048,
+        retrain_factor: float = 2.0,
+        namespace: Optional[str] = None
+    ):
+        """
+        Open (or create) a corpus store.
+
+        Args:
+            store_dir: Directory holding the corpus files
+            dim: Embedding dimension
+            nprobe: Default IVF partitions scored per query (recall/latency knob)
+            min_train_size: Corpus size at which the IVF index is first trained
+            retrain_factor: Growth ratio since the last training that triggers retraining
+            namespace: Embedding namespace of the encoder (SimilarityEngine.cache_namespace).
+                It is recorded with the first vectors; a store opened with another
+                namespace refuses to add or search
+        """
+        self.logger = logging.getLogger(__name__)
+        self.store_dir = store_dir
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.namespace = namespace
+        self.stored_namespace: Optional[str] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        os.makedirs(store_dir, exist_ok=True)
+        self._vectors_path = os.path.join(store_dir, self.VECTORS_FILE)
+        self._assignments_path = os.path.join(store_dir, self.ASSIGNMENTS_FILE)
+        self._centroids_path = os.path.join(store_dir, self.CENTROIDS_FILE)
+        self._db_path = os.path.join(store_dir, self.DB_FILE)
+        self._lock_path = os.path.join(store_dir, self.LOCK_FILE)
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                "id INTEGER PRIMARY KEY, filename TEXT, content_hash TEXT UNIQUE, "
+                "text TEXT NOT NULL, metadata TEXT, "
+                "created_at REAL DEFAULT (strftime('%s', 'now')), skills TEXT)"
+            )
+            if 'skills' not in {row[1] for row in conn.execute("PRAGMA table_info(resumes)")}:
+                # Corpora created before skills were indexed; see index_missing_skills
+                conn.execute("ALTER TABLE resumes ADD COLUMN skills TEXT")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        with self._file_lock():
+            # A writer killed between appending vectors and committing their rows
+            stored = self._connection().execute("SELECT COALESCE(MAX(id) + 1, 0) FROM resumes").fetchone()[0]
+            self._truncate_vectors(stored)
+            self._check_namespace(stored)
+
+        self._vectors = None
+        self._count = 0
+        self._index: Optional[IVFIndex] = None
+        self._index_state: Tuple[float, int] = (0.0, 0)
+        self._trained_size = 0
+        self._skill_index = SkillIndex()
+        self._skills_loaded = 0
+        self._skills_next_id = 0
+        self._refresh()
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Deduplication key for a resume's cleaned text."""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=20).hexdigest()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    def find_existing(self, content_hashes: List[str]) -> Dict[str, int]:
+        """
+        Look up resumes that are already stored.
+
+        Args:
+            content_hashes: Keys from content_hash
+
+        Returns:
+            Dictionary mapping each stored hash to its resume id
+        """
+        rows = self._select_in("SELECT content_hash, id FROM resumes WHERE content_hash IN ({})", list(content_hashes))
+        return {content_hash: resume_id for content_hash, resume_id in rows}
+
+    def add(self, documents: List[Dict[str, Any]], vectors: np.ndarray) -> List[int]:
+        """
+        Append resumes and their embeddings to the corpus. Duplicates are skipped.
+
+        Args:
+            documents: Dicts with 'text' and optional 'filename', 'metadata' and
+                'skills' (canonical taxonomy skills) keys
+            vectors: Embeddings of shape [len(documents), dim]
+
+        Returns:
+            Resume id of each document (existing id for duplicates), in input order
+
+        Raises:
+            CorpusError: If the corpus was embedded with another namespace
+        """
+        if not documents:
+            return []
+        self._require_namespace()
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(documents), self.dim))
+        hashes = [self.content_hash(doc['text']) for doc in documents]
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            ids = self.find_existing(hashes)
+            new_rows = []
+            for i, content_hash in enumerate(hashes):
+                if content_hash in ids:
+                    continue
+                ids[content_hash] = self._count + len(new_rows)
+                new_rows.append(i)
+
+            if new_rows:
+                start = self._count
+                try:
+                    self._insert_rows(documents, hashes, new_rows, vectors, start)
+                except BaseException:
+                    # Drop vectors appended for rows that were rolled back
+                    self._truncate_vectors(start)
+                    raise
+                self._refresh()
+                self._update_index(start)
+
+        return [ids[content_hash] for content_hash in hashes]
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 10,
+        nprobe: Optional[int] = None,
+        resume_ids: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Rank stored resumes against a query embedding by cosine similarity.
+
+        Args:
+            query_vector: Embedding of the job description
+            top_k: Number of results to return
+            nprobe: IVF partitions to score, clamped to [1, partitions]; higher is more
+                accurate and slower
+            resume_ids: Only rank these resumes (e.g. from match_skills), with an
+                exact scan of their vectors
+
+        Returns:
+            List of (resume id, cosine similarity) pairs, best first
+
+        Raises:
+            CorpusError: If the corpus was embedded with another namespace
+        """
+        self._require_namespace()
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            self._refresh()
+            if self._count == 0:
+                return []
+            if resume_ids is not None:
+                resume_ids = np.asarray(resume_ids, dtype=np.int64)
+                resume_ids = resume_ids[resume_ids < self._count]
+                scores = np.asarray(self._vectors[resume_ids], dtype=np.float32) @ query
+                return top_k_scores(resume_ids, scores, top_k)
+            if self._index is None:
+                scores = np.asarray(self._vectors, dtype=np.float32) @ query
+                return top_k_scores(np.arange(self._count), scores, top_k)
+            return self._index.search(query, self._vectors, top_k, nprobe)
+
+    def index_missing_skills(
+        self,
+        extract: Callable[[List[str]], List[List[str]]],
+        batch_size: int = 256
+    ) -> int:
+        """
+        Extract and store skills for resumes ingested before skills were indexed.
+
+        Runs once when the service loads the corpus (a full scan, and spaCy over every
+        old resume), not per search. Skills are extracted outside the corpus lock and
+        written under it; rows another process indexed meanwhile are left alone.
+
+        Args:
+            extract: Maps resume texts to their canonical taxonomy skills
+                (SkillExtractor.extract_taxonomy_skills_batch)
+            batch_size: Resumes loaded and updated per batch
+
+        Returns:
+            Number of resumes indexed
+        """
+        indexed = 0
+        conn = self._connection()
+        while True:
+            rows = conn.execute(
+                "SELECT id, text FROM resumes WHERE skills IS NULL ORDER BY id LIMIT ?", (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+            skills = extract([text for _, text in rows])
+            with self._file_lock(), conn:
+                conn.executemany(
+                    "UPDATE resumes SET skills = ? WHERE id = ? AND skills IS NULL",
+                    [(json.dumps(sorted(resume_skills)), resume_id) for (resume_id, _), resume_skills in zip(rows, skills)]
+                )
+            indexed += len(rows)
+        if indexed:
+            self.logger.info(f"Indexed skills of {indexed} existing corpus resumes")
+        return indexed
+
+    def match_skills(self, query: SkillQuery) -> np.ndarray:
+        """
+        Find the resumes that satisfy a skill filter.
+
+        Args:
+            query: Parsed skill filter
+
+        Returns:
+            Ascending resume ids. Resumes whose skills are not indexed yet (see
+            index_missing_skills) are treated as having no skills
+        """
+        with self._lock:
+            self._refresh()
+            self._refresh_skills()
+            return self._skill_index.match(query)
+
+    def get_documents(self, resume_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Fetch stored metadata and text for resumes.
+
+        Args:
+            resume_ids: Resume ids to fetch
+
+        Returns:
+            Dictionary mapping resume id to its stored fields
+        """
+        rows = self._select_in(
+            "SELECT id, filename, text, metadata, created_at FROM resumes WHERE id IN ({})",
+            [int(resume_id) for resume_id in resume_ids]
+        )
+        return {
+            resume_id: {
+                'resume_id': resume_id,
+                'filename': filename,
+                'text': text,
+                'metadata': json.loads(metadata) if metadata else {},
+                'created_at': created_at
+            }
+            for resume_id, filename, text, metadata, created_at in rows
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return corpus size and index state."""
+        with self._lock:
+            self._refresh()
+            return {
+                'resumes': self._count,
+                'index': 'ivf' if self._index is not None else 'exact',
+                'partitions': self._index.nlist if self._index is not None else 0,
+                'default_nprobe': self.nprobe,
+                'namespace': self.stored_namespace
+            }
+
+    def _check_namespace(self, stored_count: int) -> None:
+        """Record the namespace in a new corpus, or load the one the corpus was built with."""
+        conn = self._connection()
+        row = conn.execute("SELECT value FROM meta WHERE name = 'namespace'").fetchone()
+        self.stored_namespace = row[0] if row else None
+        if self.stored_namespace is None and self.namespace is not None:
+            if stored_count:
+                self.logger.warning(
+                    f"Corpus at {self.store_dir} predates namespace tracking; assuming it was embedded with {self.namespace}"
+                )
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('namespace', ?)", (self.namespace,))
+            self.stored_namespace = self.namespace
+        elif self.namespace is not None and self.stored_namespace != self.namespace:
+            self.logger.error(
+                f"Corpus at {self.store_dir} was embedded with {self.stored_namespace}, not {self.namespace}; "
+                "it is unusable until re-ingested into another CORPUS_FOLDER"
+            )
+
+    def _require_namespace(self) -> None:
+        if self.namespace is not None and self.stored_namespace != self.namespace:
+            raise CorpusError(
+                f"Corpus was embedded with {self.stored_namespace}, not {self.namespace}; "
+                "re-ingest the resumes into a new corpus folder"
+            )
+
+    def _insert_rows(
+        self,
+        documents: List[Dict[str, Any]],
+        hashes: List[str],
+        new_rows: List[int],
+        vectors: np.ndarray,
+        start: int
+    ) -> None:
+        """Insert new resumes as ids ``start``... and append their vectors, in one transaction."""
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO resumes (id, filename, content_hash, text, metadata, skills) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        start + offset,
+                        documents[i].get('filename'),
+                        hashes[i],
+                        documents[i]['text'],
+                        json.dumps(documents[i].get('metadata') or {}),
+                        json.dumps(sorted(documents[i]['skills'])) if 'skills' in documents[i] else None
+                    )
+                    for offset, i in enumerate(new_rows)
+                ]
+            )
+            # Appended inside the transaction: a failed write rolls back the rows, and
+            # add truncates the vectors again if the commit fails
+            with open(self._vectors_path, 'ab') as f:
+                f.write(vectors[new_rows].tobytes())
+
+    def _truncate_vectors(self, count: int) -> None:
+        """Cut the vector file back to ``count`` rows."""
+        if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) > count * 4 * self.dim:
+            self.logger.warning(f"Discarding corpus vectors past row {count} that have no stored resume")
+            self._vectors = None
+            os.truncate(self._vectors_path, count * 4 * self.dim)
+
+    def _update_index(self, first_new_id: int) -> None:
+        """Assign new rows to IVF partitions, training or retraining the index when due."""
+        if self._count < self.min_train_size:
+            return
+        if self._index is None or self._count >= self._trained_size * self.retrain_factor:
+            index = IVFIndex(self.dim, nlist=self._default_nlist(self._count), nprobe=self.nprobe)
+            index.train(self._vectors)
+            assignments = index.assign(self._vectors)
+            # Replace both files atomically so readers never see a half-written index
+            tmp_suffix = f".{os.getpid()}.tmp"
+            assignments.tofile(self._assignments_path + tmp_suffix)
+            with open(self._centroids_path + tmp_suffix, 'wb') as f:
+                np.savez(f, centroids=index.centroids, trained_size=self._count)
+            os.replace(self._assignments_path + tmp_suffix, self._assignments_path)
+            os.replace(self._centroids_path + tmp_suffix, self._centroids_path)
+        else:
+            assignments = self._index.assign(self._vectors[first_new_id:self._count])
+            with open(self._assignments_path, 'ab') as f:
+                f.write(assignments.tobytes())
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Re-map files that this or another process has appended to."""
+        count = os.path.getsize(self._vectors_path) // (4 * self.dim) if os.path.exists(self._vectors_path) else 0
+        if count != self._count or self._vectors is None:
+            self._count = count
+            self._vectors = (
+                np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(count, self.dim))
+                if count else np.zeros((0, self.dim), dtype=np.float32)
+            )
+
+        if not os.path.exists(self._centroids_path) or not os.path.exists(self._assignments_path):
+            self._index = None
+            return
+        mtime = os.path.getmtime(self._centroids_path)
+        assigned = os.path.getsize(self._assignments_path) // 4
+        if (mtime, assigned) == self._index_state:
+            return
+        with np.load(self._centroids_path) as data:
+            centroids = data['centroids']
+            self._trained_size = int(data['trained_size'])
+        assignments = np.fromfile(self._assignments_path, dtype=np.int32)[:self._count]
+        index = IVFIndex(self.dim, nlist=len(centroids), nprobe=self.nprobe)
+        index.centroids = centroids
+        index.set_assignments(assignments)
+        self._index = index
+        self._index_state = (mtime, assigned)
+
+    def _refresh_skills(self) -> None:
+        """Load skills stored since the last refresh into the skill index."""
+        conn = self._connection()
+        stored = conn.execute("SELECT COUNT(*) FROM resumes WHERE skills IS NOT NULL").fetchone()[0]
+        if stored != self._skills_loaded:
+            rows = conn.execute(
+                "SELECT id, skills FROM resumes WHERE skills IS NOT NULL AND id >= ?", (self._skills_next_id,)
+            ).fetchall()
+            if self._skills_loaded + len(rows) != stored:
+                # Older rows were backfilled (possibly by another process): rebuild
+                self._skill_index = SkillIndex()
+                self._skills_loaded = self._skills_next_id = 0
+                rows = conn.execute("SELECT id, skills FROM resumes WHERE skills IS NOT NULL").fetchall()
+            for resume_id, skills in rows:
+                self._skill_index.add(resume_id, json.loads(skills))
+                self._skills_next_id = max(self._skills_next_id, resume_id + 1)
+            self._skills_loaded += len(rows)
+        # Resumes without any skills still count for NOT filters
+        self._skill_index.resize(self._count)
+
+    def _select_in(self, query: str, values: List[Any]) -> List[tuple]:
+        """Run a ``... IN ({})`` query over ``values`` in chunks of SQL_CHUNK_SIZE."""
+        conn = self._connection()
+        rows = []
+        for start in range(0, len(values), SQL_CHUNK_SIZE):
+            chunk = values[start:start + SQL_CHUNK_SIZE]
+            rows.extend(conn.execute(query.format(','.join('?' * len(chunk))), chunk).fetchall())
+        return rows
+
+    @staticmethod
+    def _default_nlist(count: int) -> int:
+        return max(1, int(4 * np.sqrt(count)))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross threads or forked processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self._db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
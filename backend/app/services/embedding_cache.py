@@ -0,0 +1,256 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# SQLite's default limit on bound variables per statement is 999 on older builds
+SQL_CHUNK_SIZE = 500
+
+
+class EmbeddingCache:
+    """
+    Disk-backed, content-addressed cache of document embeddings.
+
+    Vectors live in a memory-mapped float32 matrix (``embeddings.f32``) with one row
+    per slot. ``index.sqlite3`` maps each slot to the content key stored in it and
+    its last use, so writers touch only the slots they change. Once ``max_entries``
+    slots are in use, the least recently used entry is evicted and its row reused.
+
+    Processes sharing the directory coordinate through a lock file: writers hold it
+    exclusively while they remap slots and overwrite rows, and readers hold it shared
+    while they look up slots and copy rows, so a reader never copies a row that is
+    being reassigned to another key.
+
+    A cache created with a different ``dim`` or ``max_entries`` (e.g. by the API with
+    another EMBEDDING_CACHE_SIZE) is opened read-only with its stored shape instead
+    of being reset.
+    """
+
+    INDEX_FILE = 'index.sqlite3'
+    MATRIX_FILE = 'embeddings.f32'
+    LOCK_FILE = '.lock'
+
+    def __init__(self, cache_dir: str, dim: int, max_entries: int = 50000):
+        """
+        Open (or create) an embedding cache.
+
+        Args:
+            cache_dir: Directory holding the matrix and index files
+            dim: Embedding dimension of the model being cached
+            max_entries: Maximum number of vectors kept before LRU eviction
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.dim = dim
+        self.max_entries = max_entries
+        self.read_only = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, self.INDEX_FILE)
+        self._matrix_path = os.path.join(cache_dir, self.MATRIX_FILE)
+        self._lock_path = os.path.join(cache_dir, self.LOCK_FILE)
+
+        with self._file_lock():
+            self._matrix = self._open()
+
+    @staticmethod
+    def make_key(text: str, model_name: str) -> str:
+        """Content address for a (model, preprocessed text) pair."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(model_name.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[int, np.ndarray]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys: Content keys from make_key
+
+        Returns:
+            Dictionary mapping the position of each cached key to a copy of its vector
+        """
+        if self._matrix is None:
+            with self._lock:
+                self.misses += len(keys)
+            return {}
+        found = {}
+        with self._lock, self._file_lock(shared=True):
+            slots = self._find_slots(keys)
+            for position, key in enumerate(keys):
+                slot = slots.get(key)
+                if slot is None:
+                    self.misses += 1
+                    continue
+                found[position] = np.array(self._matrix[slot], dtype=np.float32)
+                self.hits += 1
+            if slots and not self.read_only:
+                now = time.time()
+                with self._connection() as conn:
+                    conn.executemany(
+                        "UPDATE slots SET last_used = ? WHERE slot = ?",
+                        [(now, slot) for slot in slots.values()]
+                    )
+        return found
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """
+        Store vectors for the given keys, evicting least recently used entries as needed.
+
+        Args:
+            keys: Content keys from make_key
+            vectors: Float array of shape [len(keys), dim]
+        """
+        if not keys or self.read_only:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dim)
+        # A key repeated within the batch is stored once, with its last vector
+        latest = {key: i for i, key in enumerate(keys)}
+        with self._lock, self._file_lock():
+            conn = self._connection()
+            slots = self._find_slots(list(latest))
+            new_keys = [key for key in latest if key not in slots]
+            if new_keys:
+                used = conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+                fresh = list(range(used, min(used + len(new_keys), self.max_entries)))
+                evicted = []
+                if len(fresh) < len(new_keys):
+                    evicted = self._oldest_slots(len(new_keys) - len(fresh), set(slots.values()))
+                    # Unmap reused slots before their rows are overwritten, so a crash
+                    # mid-write can never leave a key pointing at another key's vector
+                    with conn:
+                        conn.executemany("UPDATE slots SET key = NULL WHERE slot = ?", [(slot,) for slot in evicted])
+                    self.evictions += len(evicted)
+                for key, slot in zip(new_keys, fresh + evicted):
+                    slots[key] = slot
+
+            for key, slot in slots.items():
+                self._matrix[slot] = vectors[latest[key]]
+            self._matrix.flush()
+
+            now = time.time()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO slots (slot, key, last_used) VALUES (?, ?, ?)",
+                    [(slot, key, now) for key, slot in slots.items()]
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and occupancy."""
+        lookups = self.hits + self.misses
+        entries = self._connection().execute("SELECT COUNT(key) FROM slots").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'read_only': self.read_only
+        }
+
+    def clear(self) -> None:
+        """Drop every cached vector."""
+        if self.read_only:
+            return
+        with self._lock, self._file_lock():
+            with self._connection() as conn:
+                conn.execute("DELETE FROM slots")
+
+    def _find_slots(self, keys: List[str]) -> Dict[str, int]:
+        """Map the stored keys among ``keys`` to their slots."""
+        conn = self._connection()
+        slots = {}
+        for start in range(0, len(keys), SQL_CHUNK_SIZE):
+            chunk = keys[start:start + SQL_CHUNK_SIZE]
+            slots.update(conn.execute(
+                f"SELECT key, slot FROM slots WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return slots
+
+    def _oldest_slots(self, count: int, keep: set) -> List[int]:
+        """Least recently used slots (unmapped ones first), skipping the slots in ``keep``."""
+        rows = self._connection().execute(
+            "SELECT slot FROM slots ORDER BY key IS NOT NULL, last_used LIMIT ?", (count + len(keep),)
+        ).fetchall()
+        return [slot for slot, in rows if slot not in keep][:count]
+
+    def _open(self) -> Optional[np.memmap]:
+        """Create or validate the index and open the matrix; called under the exclusive file lock."""
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS slots ("
+                "slot INTEGER PRIMARY KEY, key TEXT UNIQUE, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS slots_last_used ON slots (last_used)")
+            stored = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+
+        dim = stored.get('dim', self.dim)
+        max_entries = stored.get('max_entries', self.max_entries)
+        expected_size = max_entries * dim * np.dtype(np.float32).itemsize
+        matrix_ok = os.path.exists(self._matrix_path) and os.path.getsize(self._matrix_path) == expected_size
+
+        if stored and matrix_ok and (dim, max_entries) != (self.dim, self.max_entries):
+            # Another process (e.g. the API) owns this cache with another shape: share it
+            # read-only rather than resetting it under that process
+            self.logger.warning(
+                f"Embedding cache at {self.cache_dir} holds {max_entries} x {dim} vectors, "
+                f"not {self.max_entries} x {self.dim}; opening it read-only"
+            )
+            self.read_only = True
+            self.max_entries = max_entries
+            if dim != self.dim:
+                return None
+            return np.memmap(self._matrix_path, dtype=np.float32, mode='r', shape=(max_entries, dim))
+
+        if not (stored and matrix_ok):
+            if stored:
+                self.logger.warning("Embedding matrix does not match index, resetting cache")
+            with self._connection() as conn:
+                conn.execute("DELETE FROM slots")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                    [('dim', self.dim), ('max_entries', self.max_entries)]
+                )
+            return np.memmap(self._matrix_path, dtype=np.float32, mode='w+', shape=(self.max_entries, self.dim))
+        return np.memmap(self._matrix_path, dtype=np.float32, mode='r+', shape=(self.max_entries, self.dim))
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross threads or forked processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self._index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,288 @@
+import os
+import re
+import inspect
+import logging
+from enum import Enum
+from typing import List, Optional
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import Normalize, Pooling
+
+try:
+    import onnxruntime
+except ImportError:  # Only needed for the ONNX backends
+    onnxruntime = None
+
+
+class EncoderBackend(Enum):
+    TORCH = "torch"
+    TORCH_INT8 = "torch-int8"
+    ONNX = "onnx"
+    ONNX_INT8 = "onnx-int8"
+
+
+class SentenceEncoder:
+    """Common interface of the embedding backends used by SimilarityEngine."""
+
+    def __init__(self, model_name: str, backend: EncoderBackend):
+        self.logger = logging.getLogger(__name__)
+        self.model_name = model_name
+        self.backend = backend
+
+    @property
+    def cache_namespace(self) -> str:
+        """Embedding cache namespace; backends that change the vectors get their own."""
+        if self.backend == EncoderBackend.TORCH:
+            return self.model_name
+        return f"{self.model_name}:{self.backend.value}"
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode texts into sentence embeddings.
+
+        Args:
+            texts: List of document texts
+            batch_size: Number of texts per forward pass
+
+        Returns:
+            Float32 array of shape [len(texts), dim]
+        """
+        raise NotImplementedError
+
+    def get_dimension(self) -> int:
+        """Return the size of the vectors produced by encode."""
+        raise NotImplementedError
+
+    @property
+    def tokenizer(self):
+        """Hugging Face tokenizer of the model."""
+        raise NotImplementedError
+
+    @property
+    def max_seq_length(self) -> int:
+        """Word pieces per input (including special tokens) beyond which text is truncated."""
+        raise NotImplementedError
+
+
+class TorchEncoder(SentenceEncoder):
+    """
+    The sentence-transformers PyTorch model, optionally with int8 dynamic quantization.
+
+    Dynamic quantization converts the Linear layers to int8 weights with activations
+    quantized on the fly. It only runs on CPU.
+    """
+
+    def __init__(self, model_name: str, device: str = 'cpu', quantize: bool = False):
+        super().__init__(model_name, EncoderBackend.TORCH_INT8 if quantize else EncoderBackend.TORCH)
+        if quantize:
+            device = 'cpu'
+        self.device = device
+        self.model = load_sentence_transformer(model_name, device=device)
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        embeddings = self.model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+
+    def get_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
+
+
+class _TokenEmbeddings(torch.nn.Module):
+    """Transformer body taking positional inputs and returning token embeddings, for ONNX export."""
+
+    def __init__(self, transformer: torch.nn.Module, input_names: List[str]):
+        super().__init__()
+        self.transformer = transformer
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.transformer(**dict(zip(self.input_names, inputs)), return_dict=True).last_hidden_state
+
+
+class OnnxEncoder(SentenceEncoder):
+    """
+    The transformer exported to ONNX and run with ONNX Runtime on CPU.
+
+    The export (and its int8 dynamically quantized copy) is written to ``export_dir``
+    the first time a model is used and reused afterwards. Tokenization, mean pooling
+    and normalization mirror the sentence-transformers pipeline, so embeddings match
+    the PyTorch backend up to float rounding (or quantization error for int8).
+    """
+
+    def __init__(self, model_name: str, export_dir: str, quantize: bool = False, threads: int = 0):
+        """
+        Load (exporting first if needed) an ONNX encoder.
+
+        Args:
+            model_name: Name of the sentence-transformer model to export
+            export_dir: Directory holding exported .onnx files
+            quantize: Use the int8 dynamically quantized export
+            threads: ONNX Runtime intra-op threads (0 lets the runtime decide)
+        """
+        super().__init__(model_name, EncoderBackend.ONNX_INT8 if quantize else EncoderBackend.ONNX)
+        if onnxruntime is None:
+            raise ImportError("The ONNX encoder backends require the onnxruntime package")
+
+        model = load_sentence_transformer(model_name, device='cpu')
+        pooling = [module for module in model if isinstance(module, Pooling)]
+        if len(pooling) != 1 or not self._is_mean_pooling(pooling[0]):
+            raise ValueError(f"ONNX backend supports mean-pooled models only: {model_name}")
+        self.normalize = any(isinstance(module, Normalize) for module in model)
+        self._tokenizer = model.tokenizer
+        self._max_seq_length = model.max_seq_length
+        self.dimension = model.get_sentence_embedding_dimension()
+
+        os.makedirs(export_dir, exist_ok=True)
+        base_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        model_path = os.path.join(export_dir, f"{base_name}.onnx")
+        if not os.path.exists(model_path):
+            self._export(model, model_path)
+        if quantize:
+            quantized_path = os.path.join(export_dir, f"{base_name}.int8.onnx")
+            if not os.path.exists(quantized_path):
+                self._quantize(model_path, quantized_path)
+            model_path = quantized_path
+        del model  # Only the tokenizer is needed from here on
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.logger.info(f"Loaded ONNX encoder {model_path}")
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        texts = list(texts)
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        # Length-sorted batches keep padding, and so wasted compute, to a minimum
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            features = self.tokenizer(
+                [texts[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+            token_embeddings = self.session.run(None, inputs)[0]
+
+            mask = features['attention_mask'][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.normalize:
+                pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            embeddings[batch] = pooled
+        return embeddings
+
+    def get_dimension(self) -> int:
+        return self.dimension
+
+    @property
+    def tokenizer(self):
+        return self._tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self._max_seq_length
+
+    @staticmethod
+    def _is_mean_pooling(pooling: Pooling) -> bool:
+        config = pooling.get_config_dict()
+        if 'pooling_mode' in config:
+            return config['pooling_mode'] == 'mean'
+        modes = {key for key, value in config.items() if key.startswith('pooling_mode') and value is True}
+        return modes == {'pooling_mode_mean_tokens'}
+
+    def _export(self, model: SentenceTransformer, path: str) -> None:
+        """Export the transformer body (token embeddings) with dynamic batch and sequence axes."""
+        input_names = list(self.tokenizer.model_input_names)
+        transformer = _TokenEmbeddings(model[0].auto_model, input_names).eval()
+        sample = self.tokenizer(['export sample'], return_tensors='pt')
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes['token_embeddings'] = {0: 'batch', 1: 'sequence'}
+
+        kwargs = {}
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            kwargs['dynamo'] = False  # Newer torch defaults to the dynamo exporter
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=['token_embeddings'],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                **kwargs
+            )
+        os.replace(tmp_path, path)
+        self.logger.info(f"Exported {self.model_name} to {path}")
+
+    def _quantize(self, source_path: str, path: str) -> None:
+        """Write an int8 dynamically quantized copy of an exported model."""
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp_path = f"{path}.{os.getpid()}.tmp.onnx"
+        quantize_dynamic(source_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, path)
+        self.logger.info(f"Quantized {source_path} to {path}")
+
+
+def load_sentence_transformer(model_name: str, device: str = 'cpu') -> SentenceTransformer:
+    """
+    Load a sentence-transformer from the local Hugging Face cache only.
+
+    Models are fetched ahead of time (python -m app.services.model_registry --download),
+    so a missing model fails at once instead of stalling startup on a download.
+
+    Raises:
+        OSError: If the model is not in the local cache
+    """
+    try:
+        return SentenceTransformer(model_name, device=device, local_files_only=True)
+    except OSError as e:
+        raise OSError(
+            f"Model {model_name} is not in the local Hugging Face cache; "
+            "run python -m app.services.model_registry --download"
+        ) from e
+
+
+def create_encoder(
+    backend: EncoderBackend,
+    model_name: str,
+    device: str = 'cpu',
+    export_dir: Optional[str] = None,
+    threads: int = 0
+) -> SentenceEncoder:
+    """
+    Build the encoder for a backend.
+
+    Args:
+        backend: Inference backend
+        model_name: Name of the sentence-transformer model
+        device: Torch device for the PyTorch backend
+        export_dir: Directory for ONNX exports (required for the ONNX backends)
+        threads: ONNX Runtime intra-op threads (0 lets the runtime decide)
+
+    Returns:
+        Encoder instance
+    """
+    if backend in (EncoderBackend.ONNX, EncoderBackend.ONNX_INT8):
+        if not export_dir:
+            raise ValueError("export_dir is required for the ONNX encoder backends")
+        return OnnxEncoder(model_name, export_dir, quantize=backend == EncoderBackend.ONNX_INT8, threads=threads)
+    return TorchEncoder(model_name, device=device, quantize=backend == EncoderBackend.TORCH_INT8)
@@ -1,12 +1,58 @@
 import os
 import tempfile
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from typing import IO, List, Tuple, Optional
 from werkzeug.datastructures import FileStorage
 import shutil
+import logging
+
+@dataclass
+class UploadedDocument:
+    """
+    An uploaded file held in memory, or spooled to disk when it is large.
+
+    Lazily read uploads keep the request's upload stream instead of a copy of its
+    bytes: load() reads it just before parsing and release() drops the copy again,
+    so only the batch being parsed is held in memory.
+    """
+    filename: str
+    extension: str
+    data: Optional[bytes] = field(default=None, repr=False)
+    path: Optional[str] = None
+    stream: Optional[IO[bytes]] = field(default=None, repr=False, compare=False)
+
+    def load(self) -> None:
+        """Read a lazily read upload's stream into memory."""
+        if self.data is None and self.path is None and self.stream is not None:
+            self.stream.seek(0)
+            self.data = self.stream.read()
+
+    def release(self) -> None:
+        """Drop the in-memory bytes once the document has been parsed."""
+        self.data = None
+
+    def __getstate__(self):
+        # Upload streams belong to the request and are not sent to parse workers
+        state = self.__dict__.copy()
+        state['stream'] = None
+        return state
+
+    def __str__(self) -> str:
+        return self.filename
 
 class FileHandler:
-    def __init__(self, upload_folder: str):
+    def __init__(self, upload_folder: str, spool_threshold: int = 4 * 1024 * 1024):
+        """
+        Initialize the file handler.
+        
+        Args:
+            upload_folder: Directory under which temporary upload directories are created
+            spool_threshold: Uploads larger than this many bytes are written to disk
+                instead of being parsed from memory
+        """
+        self.logger = logging.getLogger(__name__)
         self.upload_folder = upload_folder
+        self.spool_threshold = spool_threshold
         self.temp_dir = None
 
     def create_temp_directory(self) -> str:
@@ -16,27 +62,85 @@ class FileHandler:
 
     def save_files(self, job_description: FileStorage, resumes: List[FileStorage]) -> Tuple[str, List[str]]:
         """
-        Save uploaded files to temporary directory.
+        Save uploaded files to a new temporary directory.
         Returns paths to saved job description and resume files.
         """
-        if not self.temp_dir:
-            self.create_temp_directory()
+        # One directory per call: a directory shared on the handler is reused across
+        # requests and leaks whenever a worker exits without running cleanup
+        temp_dir = tempfile.mkdtemp(dir=self.upload_folder)
 
         # Save job description
         jd_filename = f'job_description.{job_description.filename.split(".")[-1]}'
-        jd_path = os.path.join(self.temp_dir, jd_filename)
+        jd_path = os.path.join(temp_dir, jd_filename)
         job_description.save(jd_path)
 
         # Save resumes
         resume_paths = []
         for i, resume in enumerate(resumes):
             filename = f'resume_{i}.{resume.filename.split(".")[-1]}'
-            resume_path = os.path.join(self.temp_dir, filename)
+            resume_path = os.path.join(temp_dir, filename)
             resume.save(resume_path)
             resume_paths.append(resume_path)
 
         return jd_path, resume_paths
 
+    def read_files(
+        self,
+        job_description: FileStorage,
+        resumes: List[FileStorage],
+        lazy: bool = False
+    ) -> Tuple[UploadedDocument, List[UploadedDocument]]:
+        """
+        Read uploaded files into memory for direct parsing.
+        Only uploads above the spool threshold are written to a temporary directory.
+        With lazy=True small uploads keep their request stream and are only read
+        when loaded, which is valid while the request is still open.
+        Returns the job description and resume documents.
+        """
+        spool = {'dir': None}
+        jd_upload = self._read_upload(job_description, 'job_description', spool, lazy)
+        resume_uploads = [
+            self._read_upload(resume, f'resume_{i}', spool, lazy)
+            for i, resume in enumerate(resumes)
+        ]
+        return jd_upload, resume_uploads
+
+    def read_files_list(self, uploads: List[FileStorage]) -> List[UploadedDocument]:
+        """
+        Read a list of uploaded files into memory, spooling large ones like read_files.
+        Returns the documents in upload order.
+        """
+        spool = {'dir': None}
+        return [
+            self._read_upload(upload, f'document_{i}', spool)
+            for i, upload in enumerate(uploads)
+        ]
+
+    def _read_upload(self, upload: FileStorage, name: str, spool: dict, lazy: bool = False) -> UploadedDocument:
+        extension = f'.{upload.filename.split(".")[-1].lower()}'
+        document = UploadedDocument(filename=upload.filename, extension=extension)
+
+        stream = upload.stream
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+
+        if size > self.spool_threshold:
+            if spool['dir'] is None:
+                spool['dir'] = tempfile.mkdtemp(dir=self.upload_folder)
+            document.path = os.path.join(spool['dir'], f'{name}{extension}')
+            upload.save(document.path)
+        elif lazy:
+            document.stream = stream
+        else:
+            document.data = stream.read()
+        return document
+
+    def cleanup_uploads(self, uploads: List[Optional[UploadedDocument]]):
+        """Remove any spooled upload files and their temporary directories."""
+        paths = [upload.path for upload in uploads if upload is not None and upload.path]
+        self.cleanup_files(None, paths)
+
     def cleanup(self):
         """Remove temporary directory and its contents."""
         if self.temp_dir and os.path.exists(self.temp_dir):
@@ -45,13 +149,16 @@ class FileHandler:
 
     def cleanup_files(self, jd_path, resume_paths):
         try:
-            if os.path.exists(jd_path):
-                os.remove(jd_path)
-            for path in resume_paths:
+            paths = ([jd_path] if jd_path else []) + list(resume_paths)
+            for path in paths:
                 if os.path.exists(path):
                     os.remove(path)
+            # Remove the per-call temporary directories once they are empty
+            for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+                if directory != os.path.abspath(self.upload_folder) and os.path.isdir(directory) and not os.listdir(directory):
+                    os.rmdir(directory)
         except Exception as e:
-            print(f"Error cleaning up files: {e}")
+            self.logger.error(f"Error cleaning up files: {e}")
 
     def __del__(self):
         """Ensure cleanup on object destruction."""
@@ -0,0 +1,168 @@
+import os
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+
+@dataclass
+class SchedulerConfig:
+    max_batch_size: int = 64  # Texts per encoder call
+    max_wait_ms: float = 5.0  # How long the first queued request waits for company
+    threads: int = 0  # Intra-op threads for inference (0 leaves the runtime default)
+
+
+class InferenceScheduler:
+    """
+    Coalesces encode requests from concurrent callers into shared micro-batches.
+
+    Requests are queued and served by a single inference thread per process. When a
+    request arrives, the thread waits up to ``max_wait_ms`` for more requests (or
+    until ``max_batch_size`` texts are queued), sorts all queued texts by length and
+    encodes them in micro-batches of similar length, so concurrent small matches
+    share forward passes and pad less. Each caller gets a Future resolving to the
+    embeddings of its own texts, in order. Requests only coalesce when several
+    threads encode at once: request threads of a threaded server (gunicorn gthread
+    workers, see gunicorn.conf.py), match job threads and streaming responses.
+
+    Because all inference runs on that one thread, the scheduler also owns the
+    intra-op thread setting: ``torch.set_num_threads`` is applied when the thread
+    starts, instead of concurrent requests each spreading over every core. The
+    thread is started lazily in the process that first submits work, so a
+    scheduler built in the gunicorn master is safe to use after forking.
+    """
+
+    def __init__(self, encoder, config: Optional[SchedulerConfig] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            encoder: SentenceEncoder run on the inference thread
+            config: Batching and threading settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.encoder = encoder
+        self.config = config or SchedulerConfig()
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Queue texts for encoding.
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            Future resolving to a float32 array of shape [len(texts), dim]
+        """
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, self.encoder.get_dimension()), dtype=np.float32))
+            return future
+        self._ensure_thread()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts through the scheduler and wait for the result."""
+        return self.submit(texts).result()
+
+    def stats(self) -> dict:
+        """Return request and micro-batch counters (exported on /metrics)."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'queued': self._queue.qsize()
+            }
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive fork, so a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._serve, name='inference-scheduler', daemon=True)
+                self._thread.start()
+
+    def _serve(self) -> None:
+        if self.config.threads:
+            torch.set_num_threads(self.config.threads)
+        self.logger.info(
+            f"Inference scheduler started (batch {self.config.max_batch_size}, "
+            f"wait {self.config.max_wait_ms}ms, {torch.get_num_threads()} threads)"
+        )
+        while True:
+            pending = [self._queue.get()]
+            queued = len(pending[0][0])
+            deadline = time.monotonic() + self.config.max_wait_ms / 1000
+            while queued < self.config.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                queued += len(request[0])
+            try:
+                self._run(pending)
+            except Exception as e:
+                self.logger.error(f"Inference scheduler batch failed: {str(e)}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run(self, pending: List[Tuple[List[str], Future]]) -> None:
+        """Encode the texts of all pending requests and resolve their futures."""
+        pending = [(texts, future) for texts, future in pending if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+        texts = [text for request_texts, _ in pending for text in request_texts]
+        owners = np.repeat(np.arange(len(pending)), [len(request_texts) for request_texts, _ in pending])
+
+        # Length buckets: neighbours in length order share a micro-batch
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings: Optional[np.ndarray] = None
+        failed = {}
+        batches = 0
+        for start in range(0, len(order), self.config.max_batch_size):
+            batch = order[start:start + self.config.max_batch_size]
+            try:
+                encoded = self.encoder.encode([texts[i] for i in batch], batch_size=len(batch))
+            except Exception as e:
+                self.logger.error(f"Error encoding a batch of {len(batch)} texts: {str(e)}")
+                for owner in set(owners[batch].tolist()):
+                    failed.setdefault(owner, e)
+                continue
+            if embeddings is None:
+                embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            embeddings[batch] = encoded
+            batches += 1
+
+        # Counters are read by the metrics endpoint on request threads
+        with self._lock:
+            self.batches += batches
+            self.requests += len(pending)
+        offset = 0
+        for owner, (request_texts, future) in enumerate(pending):
+            if owner in failed:
+                future.set_exception(failed[owner])
+            else:
+                future.set_result(embeddings[offset:offset + len(request_texts)].copy())
+            offset += len(request_texts)
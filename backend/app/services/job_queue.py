@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import sqlite3
+import threading
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterator, Optional
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobQueue:
+    """
+    In-process work queue for long-running match jobs.
+
+    Jobs run on a small thread pool inside the worker that accepted them. Job state
+    (status, current stage, per-stage progress, partial ranking, result) is written
+    to a SQLite database, so a status request served by any gunicorn worker sees it.
+    Without a database path the state is kept in memory and only visible to this
+    process.
+
+    Each stored job records the host and pid of the worker that runs it. A job left
+    queued or running by a worker that has since died (e.g. killed by the gunicorn
+    timeout) is marked failed when the queue starts and when its status is read: at
+    once if that worker was on this host, otherwise once the job has not been
+    updated for ``stale_after`` seconds.
+
+    A job is a callable returning an iterator of MatchPipeline events.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        workers: int = 1,
+        retention: float = 86400.0,
+        stale_after: float = 3600.0
+    ):
+        """
+        Initialize the job queue.
+
+        Args:
+            db_path: Path of the SQLite job database (in-memory state if None)
+            workers: Number of jobs run concurrently
+            retention: Seconds finished jobs are kept before they are purged
+            stale_after: Seconds without an update after which an unfinished job run
+                on another host is presumed lost
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.workers = workers
+        self.retention = retention
+        self.stale_after = stale_after
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = None
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT, progress TEXT, "
+                    "partial_ranking TEXT, result TEXT, error TEXT, "
+                    "created_at REAL NOT NULL, updated_at REAL NOT NULL, owner TEXT)"
+                )
+                if 'owner' not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            self._fail_orphaned()
+
+    def submit(
+        self,
+        job: Callable[[], Iterator[Dict[str, Any]]],
+        on_finish: Optional[Callable[[], None]] = None
+    ) -> str:
+        """
+        Queue a job.
+
+        Args:
+            job: Callable producing the job's events
+            on_finish: Called after the job completes or fails (e.g. to remove uploads)
+
+        Returns:
+            Job id
+        """
+        self._purge()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        fields = {
+            'status': JobStatus.QUEUED.value,
+            'stage': None,
+            'progress': {},
+            'partial_ranking': [],
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now
+        }
+        if self.db_path:
+            fields['owner'] = f"{socket.gethostname()}:{os.getpid()}"
+        self._save(job_id, fields, insert=True)
+        self._get_executor().submit(self._run, job_id, job, on_finish)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the current state of a job.
+
+        Args:
+            job_id: Id returned by submit
+
+        Returns:
+            Job state dictionary, or None if the job is unknown or purged
+        """
+        if not self.db_path:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                return {'job_id': job_id, **job} if job is not None else None
+
+        self._fail_orphaned(job_id)
+        row = self._connection().execute(
+            "SELECT status, stage, progress, partial_ranking, result, error, created_at, updated_at "
+            "FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, stage, progress, partial_ranking, result, error, created_at, updated_at = row
+        return {
+            'job_id': job_id,
+            'status': status,
+            'stage': stage,
+            'progress': json.loads(progress) if progress else {},
+            'partial_ranking': json.loads(partial_ranking) if partial_ranking else [],
+            'result': json.loads(result) if result else None,
+            'error': error,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and optionally wait for running ones."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _run(
+        self,
+        job_id: str,
+        job: Callable[[], Iterator[Dict[str, Any]]],
+        on_finish: Optional[Callable[[], None]]
+    ) -> None:
+        self._save(job_id, {'status': JobStatus.RUNNING.value})
+        try:
+            for event in job():
+                if event['type'] == 'progress':
+                    self._save(job_id, {'stage': event['stage'], 'progress': event['progress']})
+                elif event['type'] == 'ranking':
+                    self._save(job_id, {'partial_ranking': event['matches']})
+                elif event['type'] == 'result':
+                    self._save(job_id, {
+                        'status': JobStatus.COMPLETED.value,
+                        'stage': None,
+                        'result': event['result']
+                    })
+        except Exception as e:
+            self.logger.error(f"Job {job_id} failed: {str(e)}")
+            self._save(job_id, {'status': JobStatus.FAILED.value, 'error': str(e)})
+        finally:
+            if on_finish is not None:
+                on_finish()
+
+    def _save(self, job_id: str, fields: Dict[str, Any], insert: bool = False) -> None:
+        fields = dict(fields, updated_at=time.time())
+        if not self.db_path:
+            with self._lock:
+                self._jobs.setdefault(job_id, {}).update(fields)
+            return
+
+        columns = {
+            key: json.dumps(value) if key in ('progress', 'partial_ranking', 'result') and value is not None else value
+            for key, value in fields.items()
+        }
+        with self._connection() as conn:
+            if insert:
+                conn.execute(
+                    f"INSERT INTO jobs (id, {', '.join(columns)}) VALUES (?{', ?' * len(columns)})",
+                    [job_id] + list(columns.values())
+                )
+            else:
+                conn.execute(
+                    f"UPDATE jobs SET {', '.join(f'{key} = ?' for key in columns)} WHERE id = ?",
+                    list(columns.values()) + [job_id]
+                )
+
+    def _purge(self) -> None:
+        """Drop finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention
+        finished = (JobStatus.COMPLETED.value, JobStatus.FAILED.value)
+        if not self.db_path:
+            with self._lock:
+                for job_id in [
+                    job_id for job_id, job in self._jobs.items()
+                    if job['status'] in finished and job['updated_at'] < cutoff
+                ]:
+                    del self._jobs[job_id]
+            return
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                finished + (cutoff,)
+            )
+
+    def _fail_orphaned(self, job_id: Optional[str] = None) -> None:
+        """Mark unfinished jobs (all, or just ``job_id``) failed if their worker is gone."""
+        query = "SELECT id, owner, updated_at FROM jobs WHERE status IN (?, ?)"
+        params = [JobStatus.QUEUED.value, JobStatus.RUNNING.value]
+        if job_id is not None:
+            query += " AND id = ?"
+            params.append(job_id)
+        conn = self._connection()
+        now = time.time()
+        orphaned = []
+        for orphan_id, owner, updated_at in conn.execute(query, params).fetchall():
+            alive = self._owner_alive(owner)
+            if alive is False or (alive is None and now - updated_at > self.stale_after):
+                orphaned.append(orphan_id)
+        if not orphaned:
+            return
+        self.logger.warning(f"Marking {len(orphaned)} jobs failed whose worker stopped before they finished")
+        with conn:
+            conn.executemany(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                [
+                    (
+                        JobStatus.FAILED.value, "Worker stopped before the job finished", now,
+                        orphan_id, JobStatus.QUEUED.value, JobStatus.RUNNING.value
+                    )
+                    for orphan_id in orphaned
+                ]
+            )
+
+    @staticmethod
+    def _owner_alive(owner: Optional[str]) -> Optional[bool]:
+        """Whether the process that owns a job is running; None if it cannot be checked here."""
+        if not owner:
+            return None
+        host, _, pid = owner.rpartition(':')
+        if host != socket.gethostname():
+            return None
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True  # Exists, owned by another user
+        except ValueError:
+            return None
+        return True
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='match-job')
+        return self._executor
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross threads or forked processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
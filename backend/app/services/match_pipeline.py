@@ -0,0 +1,416 @@
+import heapq
+import logging
+from dataclasses import replace
+from typing import List, Dict, Any, Iterator, Optional
+from app.services.file_handler import UploadedDocument
+from app.services.similarity_engine import SimilarityConfig
+from app.services.skill_index import SkillIndex, SkillQuery
+from app.services.metrics import pipeline_metrics, log_sampled
+
+
+class MatchError(ValueError):
+    """Raised when uploaded documents cannot be matched; reported to clients as a bad request."""
+
+
+class MatchPipeline:
+    """
+    Runs the parse -> preprocess -> embed -> skills pipeline of a JD against resumes.
+
+    Resumes go through parsing, preprocessing and embedding in batches. The top-k
+    ranking is merged after each batch, so callers observe progress and partial
+    rankings while a large upload is still being processed. Text statistics come out
+    of the preprocessing pass and are kept for every parsed resume (a few numbers
+    each); skill matching runs once, on the final matches only.
+
+    Memory is bounded by the batch size and top_k rather than the upload count: an
+    upload's bytes are loaded just before its batch is parsed and released after,
+    embeddings and analyses live for one batch, and across batches only the running
+    top-k (with each match's text) and the per-resume statistics are kept.
+
+    With a skill filter, each parsed batch is indexed by taxonomy skill (tokenizer
+    and phrase matcher only) and resumes that fail the filter are dropped before
+    preprocessing and embedding.
+
+    run() and stream() are generators of events:
+        {'type': 'progress', 'stage': ..., 'progress': {stage: {'done': n, 'total': m}}}
+        {'type': 'ranking', 'matches': [{'resume_id', 'rank', 'similarity_score'}, ...]}
+        {'type': 'result', 'result': <the /api/match response body>}  (run only)
+        {'type': 'resume', 'resume_id': ..., 'similarity_score': ..., ...}  (stream only)
+    """
+
+    STAGES = ('parsing', 'preprocessing', 'embedding', 'skills')
+
+    def __init__(
+        self,
+        document_parser,
+        text_preprocessor,
+        similarity_engine,
+        skill_extractor,
+        log_sample_rate: float = 0.1
+    ):
+        """
+        Initialize the pipeline with the application's services.
+
+        Args:
+            document_parser: DocumentParser used for the uploads
+            text_preprocessor: TextPreprocessor applied before embedding
+            similarity_engine: SimilarityEngine used for ranking
+            skill_extractor: SkillExtractor used for skill matching
+            log_sample_rate: Fraction of documents whose text is logged at DEBUG level
+        """
+        self.logger = logging.getLogger(__name__)
+        self.log_sample_rate = log_sample_rate
+        self.document_parser = document_parser
+        self.text_preprocessor = text_preprocessor
+        self.similarity_engine = similarity_engine
+        self.skill_extractor = skill_extractor
+
+    def run(
+        self,
+        jd_upload: UploadedDocument,
+        resume_uploads: List[UploadedDocument],
+        config: SimilarityConfig,
+        batch_size: Optional[int] = None,
+        skill_filter: Optional[SkillQuery] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Match resumes against a job description, yielding events as stages complete.
+
+        Args:
+            jd_upload: Job description upload
+            resume_uploads: Resume uploads
+            config: Similarity configuration
+            batch_size: Resumes per batch (all at once if None)
+            skill_filter: Must-have skills; other resumes are not ranked
+
+        Yields:
+            Progress, partial ranking and final result events
+
+        Raises:
+            MatchError: If the job description or every resume fails to parse
+        """
+        total = len(resume_uploads)
+        batch_size = batch_size or max(total, 1)
+        progress = {stage: {'done': 0, 'total': total} for stage in self.STAGES}
+        jd_text, jd_analysis, jd_embedding = self._encode_job_description(jd_upload)
+
+        # Resume ids count successfully parsed resumes, in upload order
+        parsed_count = 0
+        eligible_count = 0
+        matches: List[Dict[str, Any]] = []
+        match_texts: Dict[int, str] = {}
+        resume_stats: List[Dict[str, Any]] = []
+        for start in range(0, total, batch_size):
+            resume_texts, batch_matches, eligible, batch_stats = yield from self._rank_batch(
+                resume_uploads[start:start + batch_size], parsed_count, jd_analysis.processed_text, jd_embedding,
+                config, progress, skill_filter
+            )
+            parsed_count += len(resume_texts)
+            eligible_count += eligible
+            matches = self._merge_matches(matches, batch_matches, config.top_k)
+            # Text statistics come from the same analysis pass as the preprocessed text
+            resume_stats.extend(
+                {"resume_id": f"resume_{i}", **batch_stats[i]} for i, _ in resume_texts
+            )
+
+            # Only keep the texts of resumes that are still ranked
+            batch_texts = dict(resume_texts)
+            match_texts = {
+                match['index']: match_texts.get(match['index']) or batch_texts[match['index']]
+                for match in matches
+            }
+            yield self._ranking(matches)
+
+        if parsed_count == 0:
+            raise MatchError("Failed to parse any resumes")
+
+        self.logger.info(
+            f"Ranked {len(matches)} of {parsed_count} parsed resumes"
+            + (f" (top score {matches[0]['similarity_score']:.3f})" if matches else "")
+        )
+        progress['skills']['total'] = len(matches)
+
+        # Get ranking summary
+        ranking_summary = self.similarity_engine.get_ranking_summary(matches)
+
+        # Extract JD skills once and batch all resumes through spaCy
+        match_chars = sum(len(match_texts[match['index']]) for match in matches)
+        with pipeline_metrics.time_stage('skills', documents=len(matches) + 1, chars=match_chars + len(jd_text)):
+            skill_match_results = self.skill_extractor.get_skill_matches(
+                jd_text,
+                [match_texts[match['index']] for match in matches]
+            )
+        yield self._progress('skills', progress, len(matches))
+
+        result = {
+            "message": "Files processed successfully with BERT",
+            "similarity_metric": config.metric.value,
+            "top_k": config.top_k,
+            "similarity_threshold": config.threshold,
+            "ranking_summary": ranking_summary,
+            "job_description": {
+                "statistics": jd_analysis.statistics
+            },
+            "matches": [
+                {
+                    "resume_id": f"resume_{match['index']}",
+                    "rank": match['rank'],
+                    "similarity_score": match['similarity_score'],
+                    # Explanations come precomputed from the same embeddings used for ranking
+                    "explanation": match['explanation'],
+                    "skill_match": skill_match
+                }
+                for match, skill_match in zip(matches, skill_match_results)
+            ],
+            "resumes": {
+                "count": parsed_count,
+                "statistics": resume_stats
+            }
+        }
+        if skill_filter is not None:
+            result["skill_filter"] = self._skill_filter_summary(skill_filter, eligible_count)
+        yield {'type': 'result', 'result': result}
+
+    def stream(
+        self,
+        jd_upload: UploadedDocument,
+        resume_uploads: List[UploadedDocument],
+        config: SimilarityConfig,
+        batch_size: int = 32,
+        skill_filter: Optional[SkillQuery] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Match resumes against a job description, yielding each resume as soon as it is scored.
+
+        Every resume above config.threshold produces a 'resume' event with its score,
+        explanation and skill match, regardless of whether it ends up in the top-k.
+        Only the running top-k ranking is held in memory. The last event is a
+        'ranking' event with final=True, the ranking summary and the resume count.
+
+        Args:
+            jd_upload: Job description upload
+            resume_uploads: Resume uploads
+            config: Similarity configuration
+            batch_size: Resumes per batch
+            skill_filter: Must-have skills; other resumes are not scored or reported
+
+        Yields:
+            Progress, per-resume and ranking events
+
+        Raises:
+            MatchError: If the job description or every resume fails to parse
+        """
+        total = len(resume_uploads)
+        progress = {stage: {'done': 0, 'total': total} for stage in self.STAGES}
+        jd_text, jd_analysis, jd_embedding = self._encode_job_description(jd_upload)
+        # Every resume above the threshold is reported, so batches are not cut to top_k
+        batch_config = replace(config, top_k=0)
+        with pipeline_metrics.time_stage('skills', documents=1, chars=len(jd_text)):
+            jd_skills = self.skill_extractor.extract_skills(jd_text)
+
+        parsed_count = 0
+        eligible_count = 0
+        matches: List[Dict[str, Any]] = []
+        for start in range(0, total, batch_size):
+            resume_texts, batch_matches, eligible, _ = yield from self._rank_batch(
+                resume_uploads[start:start + batch_size], parsed_count, jd_analysis.processed_text, jd_embedding,
+                batch_config, progress, skill_filter
+            )
+            parsed_count += len(resume_texts)
+            eligible_count += eligible
+
+            batch_texts = dict(resume_texts)
+            skill_texts = [batch_texts[match['index']] for match in batch_matches]
+            with pipeline_metrics.time_stage('skills', documents=len(skill_texts), chars=sum(map(len, skill_texts))):
+                skill_match_results = self.skill_extractor.get_skill_matches(
+                    jd_text,
+                    skill_texts,
+                    jd_skills=jd_skills
+                )
+            for match, skill_match in zip(batch_matches, skill_match_results):
+                yield {
+                    'type': 'resume',
+                    'resume_id': f"resume_{match['index']}",
+                    'similarity_score': match['similarity_score'],
+                    'cosine_similarity': match['cosine_similarity'],
+                    'euclidean_similarity': match['euclidean_similarity'],
+                    'explanation': match['explanation'],
+                    'skill_match': skill_match,
+                    'statistics': match['statistics']
+                }
+            yield self._progress('skills', progress, min(batch_size, total - start))
+
+            matches = self._merge_matches(matches, batch_matches, config.top_k)
+
+        if parsed_count == 0:
+            raise MatchError("Failed to parse any resumes")
+
+        final = dict(
+            self._ranking(matches),
+            final=True,
+            ranking_summary=self.similarity_engine.get_ranking_summary(matches),
+            resumes={"count": parsed_count}
+        )
+        if skill_filter is not None:
+            final['skill_filter'] = self._skill_filter_summary(skill_filter, eligible_count)
+        yield final
+
+    def run_to_completion(
+        self,
+        jd_upload: UploadedDocument,
+        resume_uploads: List[UploadedDocument],
+        config: SimilarityConfig,
+        batch_size: Optional[int] = None,
+        skill_filter: Optional[SkillQuery] = None
+    ) -> Dict[str, Any]:
+        """Run the pipeline and return the final result (single batch if batch_size is None)."""
+        for event in self.run(jd_upload, resume_uploads, config, batch_size=batch_size, skill_filter=skill_filter):
+            if event['type'] == 'result':
+                return event['result']
+        raise MatchError("Pipeline finished without a result")
+
+    def _encode_job_description(self, jd_upload: UploadedDocument):
+        """Parse, preprocess and encode the job description once. Returns (text, AnalyzedDocument, embedding)."""
+        with pipeline_metrics.time_stage('parse', documents=1) as sample:
+            jd_upload.load()
+            jd_text = self.document_parser.parse_documents([jd_upload])[0]
+            jd_upload.release()
+            sample['chars'] = len(jd_text or '')
+        if not jd_text:
+            raise MatchError("Failed to parse job description")
+        with pipeline_metrics.time_stage('preprocess', documents=1, chars=len(jd_text)):
+            jd_analysis = self.text_preprocessor.analyze_text(jd_text)
+        self.logger.debug("Preprocessed JD (first 200 chars): %s", jd_analysis.processed_text[:200])
+        with pipeline_metrics.time_stage('embed', documents=1, chars=len(jd_text)):
+            jd_embedding = self.similarity_engine.encode([jd_analysis.processed_text])[0]
+        return jd_text, jd_analysis, jd_embedding
+
+    def _rank_batch(
+        self,
+        batch: List[UploadedDocument],
+        first_id: int,
+        jd_processed: str,
+        jd_embedding,
+        config: SimilarityConfig,
+        progress: Dict[str, Dict[str, int]],
+        skill_filter: Optional[SkillQuery] = None
+    ):
+        """
+        Parse, preprocess and rank one batch of resumes, yielding progress events.
+        Resumes failing the skill filter are dropped before preprocessing, and in
+        cascade mode only the resumes kept by the sparse prefilter are embedded.
+
+        Returns (via StopIteration) the parsed (resume index, text) pairs, the
+        batch's ranked matches, whose 'index' is the resume index and whose
+        'statistics' are the resume's text statistics, the number of parsed
+        resumes that passed the skill filter, and the text statistics of every
+        parsed resume by resume index. Resumes dropped by the skill filter are
+        only cleaned for their statistics, not lemmatized.
+        """
+        # Parse resumes in parallel, keeping upload order; only this batch's bytes are loaded
+        resume_texts = []
+        with pipeline_metrics.time_stage('parse', documents=len(batch)) as sample:
+            for resume_upload in batch:
+                resume_upload.load()
+            parsed = self.document_parser.parse_documents(batch)
+            for resume_upload in batch:
+                resume_upload.release()
+            sample['chars'] = sum(len(text) for text in parsed if text)
+        for resume_upload, text in zip(batch, parsed):
+            if text:
+                log_sampled(
+                    self.logger, logging.DEBUG, self.log_sample_rate,
+                    "Extracted text of %s (first 200 chars): %s", resume_upload, text[:200]
+                )
+                resume_texts.append((first_id + len(resume_texts), text))
+            else:
+                self.logger.warning(f"Failed to parse {resume_upload}")
+        yield self._progress('parsing', progress, len(batch))
+
+        eligible = resume_texts
+        if skill_filter is not None and resume_texts:
+            chars = sum(len(text) for _, text in resume_texts)
+            with pipeline_metrics.time_stage('skill_filter', documents=len(resume_texts), chars=chars):
+                skill_index = SkillIndex()
+                texts = [text for _, text in resume_texts]
+                for position, skills in enumerate(self.skill_extractor.extract_taxonomy_skills_batch(texts)):
+                    skill_index.add(position, skills)
+                eligible = [resume_texts[position] for position in skill_index.match(skill_filter)]
+
+        batch_matches = []
+        statistics: Dict[int, Dict[str, Any]] = {}
+        if eligible:
+            chars = sum(len(text) for _, text in eligible)
+            with pipeline_metrics.time_stage('preprocess', documents=len(eligible), chars=chars):
+                resume_analyses = list(self.text_preprocessor.analyze_batch({
+                    f"resume_{i}": text for i, text in eligible
+                }).values())
+            for (i, _), analysis in zip(eligible, resume_analyses):
+                statistics[i] = analysis.statistics
+                log_sampled(
+                    self.logger, logging.DEBUG, self.log_sample_rate,
+                    "Preprocessed resume_%s (first 200 chars): %s", i, analysis.processed_text[:200]
+                )
+            yield self._progress('preprocessing', progress, len(batch))
+
+            candidates = self.similarity_engine.select_candidates(
+                jd_processed, [analysis.processed_text for analysis in resume_analyses]
+            )
+            candidate_chars = sum(len(eligible[i][1]) for i in candidates)
+            with pipeline_metrics.time_stage('embed', documents=len(candidates), chars=candidate_chars):
+                embeddings = self.similarity_engine.encode([resume_analyses[i].processed_text for i in candidates])
+            batch_matches = self.similarity_engine.rank_embeddings(jd_embedding, embeddings, config)
+            for match in batch_matches:
+                candidate = candidates[match['index']]
+                match['statistics'] = resume_analyses[candidate].statistics
+                match['index'] = eligible[candidate][0]
+        else:
+            yield self._progress('preprocessing', progress, len(batch))
+        yield self._progress('embedding', progress, len(batch))
+        for i, text in resume_texts:
+            if i not in statistics:
+                statistics[i] = self.text_preprocessor.get_text_statistics(text)
+        return resume_texts, batch_matches, len(eligible), statistics
+
+    @staticmethod
+    def _ranking(matches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            'type': 'ranking',
+            'matches': [
+                {
+                    'resume_id': f"resume_{match['index']}",
+                    'rank': match['rank'],
+                    'similarity_score': match['similarity_score']
+                }
+                for match in matches
+            ]
+        }
+
+    @staticmethod
+    def _skill_filter_summary(skill_filter: SkillQuery, eligible_count: int) -> Dict[str, Any]:
+        return {'query': str(skill_filter), 'skills': sorted(skill_filter.skills), 'eligible': eligible_count}
+
+    @staticmethod
+    def _progress(stage: str, progress: Dict[str, Dict[str, int]], count: int) -> Dict[str, Any]:
+        progress[stage]['done'] += count
+        return {
+            'type': 'progress',
+            'stage': stage,
+            'progress': {name: dict(counts) for name, counts in progress.items()}
+        }
+
+    @staticmethod
+    def _merge_matches(
+        matches: List[Dict[str, Any]],
+        batch_matches: List[Dict[str, Any]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """Merge a batch's ranked matches into the running top-k and re-rank."""
+        key = lambda match: match['similarity_score']
+        if top_k > 0:
+            merged = heapq.nlargest(top_k, matches + batch_matches, key=key)
+        else:
+            merged = sorted(matches + batch_matches, key=key, reverse=True)
+        for rank, match in enumerate(merged, start=1):
+            match['rank'] = rank
+        return merged
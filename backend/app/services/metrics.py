@@ -0,0 +1,194 @@
+import time
+import random
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# Latency buckets in seconds, from a cached lookup to a large batch
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Document size classes (characters of extracted text) used as a metric label
+SIZE_CLASSES = ((2000, 'small'), (8000, 'medium'), (32000, 'large'))
+
+
+def size_class(chars: float) -> str:
+    """Label for a document of the given length in characters."""
+    for limit, label in SIZE_CLASSES:
+        if chars < limit:
+            return label
+    return 'xlarge'
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels."""
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # Per-bucket counts, then the +Inf count and the sum
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative:g}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style monotonically increasing counter with labels."""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        lines.extend(f"{self.name}{_format_labels(key)} {value:g}" for key, value in sorted(values.items()))
+        return lines
+
+
+class PipelineMetrics:
+    """
+    Per-stage timing of the matching pipeline, exported in the Prometheus text format.
+
+    Stages are timed with ``time_stage``, which records the stage duration and, when
+    the number and total size of the documents involved are given, the time per
+    document by document size class. Gauges such as cache hit rates are read from
+    registered callbacks at scrape time. Values are per process: each gunicorn worker
+    exposes its own series.
+    """
+
+    def __init__(self, prefix: str = 'rezscan'):
+        self.prefix = prefix
+        self.stage_seconds = Histogram(f"{prefix}_stage_seconds", "Wall time of a pipeline stage call")
+        self.document_seconds = Histogram(
+            f"{prefix}_stage_document_seconds",
+            "Wall time of a pipeline stage per document, by document size class"
+        )
+        self.stage_documents = Counter(f"{prefix}_stage_documents_total", "Documents processed by a pipeline stage")
+        self.requests = Counter(f"{prefix}_requests_total", "API requests by endpoint and status code")
+        self.request_seconds = Histogram(f"{prefix}_request_seconds", "API request latency by endpoint")
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]]] = {}
+
+    @contextmanager
+    def time_stage(self, stage: str, documents: int = 0, chars: int = 0):
+        """
+        Time a pipeline stage.
+
+        Yields a dict whose 'documents' and 'chars' entries may be updated inside the
+        block when they are only known after the work is done (e.g. after parsing).
+
+        Args:
+            stage: Stage name (e.g. 'parse', 'embed')
+            documents: Number of documents handled in this call
+            chars: Total extracted text length of those documents ('unknown' size if 0)
+        """
+        sample = {'documents': documents, 'chars': chars}
+        start = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_seconds.observe(elapsed, stage=stage)
+            if sample['documents']:
+                self.stage_documents.inc(sample['documents'], stage=stage)
+                self.document_seconds.observe(
+                    elapsed / sample['documents'],
+                    stage=stage,
+                    size=size_class(sample['chars'] / sample['documents']) if sample['chars'] else 'unknown'
+                )
+
+    def register_gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]
+    ) -> None:
+        """
+        Register a gauge read at scrape time.
+
+        Args:
+            name: Metric name without the prefix
+            documentation: Help text
+            callback: Returns {label tuple: value}
+        """
+        self._gauges[f"{self.prefix}_{name}"] = (documentation, callback)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in (
+            self.stage_seconds, self.document_seconds, self.stage_documents,
+            self.requests, self.request_seconds
+        ):
+            lines.extend(metric.render())
+        for name, (documentation, callback) in self._gauges.items():
+            try:
+                values = callback()
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"Error collecting {name}: {str(e)}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{_format_labels(key)} {value:g}" for key, value in sorted(values.items()))
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide metrics, shared by the services and the /metrics endpoint
+pipeline_metrics = PipelineMetrics()
+
+
+def log_sampled(logger: logging.Logger, level: int, rate: float, message: str, *args) -> None:
+    """
+    Log a message for a random fraction of calls, for per-document debug output.
+
+    The message is only formatted when it is actually emitted.
+
+    Args:
+        logger: Logger to write to
+        level: Logging level
+        rate: Fraction of calls that are logged (0 disables, 1 logs every call)
+        message: %-style format string
+        args: Format arguments
+    """
+    if rate > 0 and logger.isEnabledFor(level) and (rate >= 1 or random.random() < rate):
+        logger.log(level, message, *args)
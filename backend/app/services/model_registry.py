@@ -0,0 +1,174 @@
+import os
+import time
+import logging
+import argparse
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: RSS is reported from /proc only
+    resource = None
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where the current value is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+class ModelRegistry:
+    """
+    Lazily built, process-wide registry of the application's models and services.
+
+    Each entry is built once by its loader, either on first use or by preload().
+    Under gunicorn with ``preload_app`` the master process preloads every entry
+    before forking, so workers share the model weights copy-on-write instead of each
+    loading their own. Loaders must only read local files; models are fetched ahead
+    of time with ``python -m app.services.model_registry --download``.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmups: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._preload_thread: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None
+    ) -> None:
+        """
+        Register a model.
+
+        Args:
+            name: Registry key
+            loader: Builds the model; called at most once
+            warmup: Optional call run on the built model to initialize lazy state
+                (thread pools, caches) in each serving process
+        """
+        self._loaders[name] = loader
+        self._warmups[name] = warmup
+        self._locks[name] = threading.Lock()
+        self._status[name] = {'loaded': False, 'load_seconds': None, 'rss_mb': None, 'error': None}
+
+    def get(self, name: str) -> Any:
+        """
+        Return a model, building it on first use.
+
+        Args:
+            name: Registry key
+
+        Returns:
+            The model instance
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._locks[name]:
+            if name not in self._instances:
+                rss_before = current_rss_bytes()
+                start = time.perf_counter()
+                try:
+                    self._instances[name] = self._loaders[name]()
+                except Exception as e:
+                    self._status[name]['error'] = str(e)
+                    self.logger.error(f"Error loading {name}: {str(e)}")
+                    raise
+                elapsed = time.perf_counter() - start
+                rss_mb = (current_rss_bytes() - rss_before) / (1024 * 1024)
+                self._status[name].update({
+                    'loaded': True,
+                    'load_seconds': round(elapsed, 3),
+                    'rss_mb': round(rss_mb, 1),
+                    'error': None
+                })
+                self.logger.info(f"Loaded {name} in {elapsed:.2f}s (+{rss_mb:.1f} MB RSS)")
+            return self._instances[name]
+
+    def peek(self, name: str) -> Optional[Any]:
+        """Return a model if it is already built, without loading it."""
+        return self._instances.get(name)
+
+    def preload(self, names: Optional[List[str]] = None) -> None:
+        """Build the given models (all registered models if None) in registration order."""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def preload_async(self) -> None:
+        """Start preloading in a background thread, once per process."""
+        if self._preload_thread is None or (
+            not self._preload_thread.is_alive() and not self.ready and not self.failed
+        ):
+            self._preload_thread = threading.Thread(target=self._preload_quietly, name='model-preload', daemon=True)
+            self._preload_thread.start()
+
+    def warm_up(self) -> None:
+        """Run every loaded model's warm-up call (e.g. once per forked worker)."""
+        for name, warmup in self._warmups.items():
+            if warmup is not None and name in self._instances:
+                try:
+                    warmup(self._instances[name])
+                except Exception as e:
+                    self.logger.warning(f"Warm-up of {name} failed: {str(e)}")
+
+    @property
+    def ready(self) -> bool:
+        """Whether every registered model is loaded."""
+        return all(name in self._instances for name in self._loaders)
+
+    @property
+    def failed(self) -> bool:
+        """Whether any model failed to load."""
+        return any(status['error'] for status in self._status.values())
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load state, load time in seconds and RSS growth in MB while loading."""
+        return {name: dict(status) for name, status in self._status.items()}
+
+    def _preload_quietly(self) -> None:
+        try:
+            self.preload()
+        except Exception:
+            pass  # Recorded in status() by get()
+
+
+def download_models(
+    sentence_model: str = 'all-MiniLM-L6-v2',
+    spacy_model: str = 'en_core_web_sm'
+) -> None:
+    """Fetch the NLTK data, spaCy pipeline and sentence-transformer weights the app loads."""
+    import nltk
+    import spacy
+    from sentence_transformers import SentenceTransformer
+    from app.services.batch_processor import NLTK_RESOURCES
+
+    for resource_path in NLTK_RESOURCES:
+        nltk.download(resource_path.split('/')[-1])
+    if not spacy.util.is_package(spacy_model):
+        spacy.cli.download(spacy_model)
+    SentenceTransformer(sentence_model)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Model management for the RezScan backend")
+    parser.add_argument('--download', action='store_true', help='Download all models used by the API')
+    parser.add_argument('--sentence-model', default='all-MiniLM-L6-v2', help='Sentence-transformer model name')
+    args = parser.parse_args()
+    if args.download:
+        download_models(args.sentence_model)
+    else:
+        parser.print_help()
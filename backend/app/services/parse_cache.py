@@ -0,0 +1,140 @@
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+
+class ParseCache:
+    """
+    Two-tier cache of cleaned document text keyed by a hash of the file bytes.
+
+    The first tier is an in-process LRU dictionary. The optional second tier is a
+    SQLite database, so identical uploads are shared across requests, gunicorn
+    workers and restarts.
+    """
+
+    # Bump when extraction/cleaning logic changes so stale entries are not served
+    PARSER_VERSION = 2
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None):
+        """
+        Initialize the parse cache.
+
+        Args:
+            max_entries: Maximum number of texts held in the in-process LRU tier
+            db_path: Path of the SQLite database for the on-disk tier (disabled if None)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS parsed_documents ("
+                    "key TEXT PRIMARY KEY, text TEXT NOT NULL, "
+                    "created_at REAL DEFAULT (strftime('%s', 'now')))"
+                )
+
+    @classmethod
+    def make_key(cls, data: bytes, extension: str) -> str:
+        """Content address for the raw bytes of an uploaded file."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"v{cls.PARSER_VERSION}:{extension.lower()}:".encode('utf-8'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up cleaned text for a content key.
+
+        Args:
+            key: Content key from make_key
+
+        Returns:
+            Cached text, or None on a miss
+        """
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return text
+
+        if self.db_path:
+            try:
+                with self._connection() as conn:
+                    row = conn.execute(
+                        "SELECT text FROM parsed_documents WHERE key = ?", (key,)
+                    ).fetchone()
+                if row is not None:
+                    with self._lock:
+                        self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+            except sqlite3.Error as e:
+                self.logger.error(f"Error reading parse cache: {str(e)}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Store cleaned text for a content key in both tiers.
+
+        Args:
+            key: Content key from make_key
+            text: Cleaned document text
+        """
+        self._remember(key, text)
+        if self.db_path:
+            try:
+                with self._connection() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO parsed_documents (key, text) VALUES (?, ?)",
+                        (key, text)
+                    )
+            except sqlite3.Error as e:
+                self.logger.error(f"Error writing parse cache: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for both tiers."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross threads or forked processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
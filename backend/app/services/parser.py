@@ -1,15 +1,110 @@
 import os
-from typing import Optional
+import io
+import time
+import signal
+import itertools
+import threading
+import multiprocessing
+from typing import Optional, List, Dict, Union, BinaryIO
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from PyPDF2 import PdfReader
 from docx import Document
 import logging
 from PIL import Image
 import re
+from app.services.parse_cache import ParseCache
+from app.services.file_handler import UploadedDocument
+
+DocumentSource = Union[str, UploadedDocument]
+
+_worker_parser = None
+_worker_started = None
+
+class ParseTimeoutError(Exception):
+    """Raised in a parse worker when a document takes longer than the timeout."""
+
+def _raise_parse_timeout(signum, frame):
+    raise ParseTimeoutError()
+
+def _init_parse_worker(started_queue) -> None:
+    """Pool initializer: keep the queue on which workers report the tasks they start."""
+    global _worker_started
+    _worker_started = started_queue
+
+def _parse_in_worker(source: DocumentSource, task_id: int = -1, timeout: float = 0) -> Optional[str]:
+    """
+    Pool entry point: parse one document with a per-process, cache-less parser.
+    Reports the task's start to the parent and enforces the timeout with SIGALRM.
+    """
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = DocumentParser()
+    if _worker_started is not None:
+        _worker_started.put(task_id)
+    use_alarm = timeout > 0 and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_parse_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _worker_parser.parse_source(source)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+class _ParsePool:
+    """A parse worker pool, its start-report queue, and the pool rounds running on it."""
+
+    def __init__(self, workers: int):
+        context = multiprocessing.get_context()
+        self.workers = workers
+        self.started_queue = context.SimpleQueue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_parse_worker,
+            initargs=(self.started_queue,)
+        )
+        self.users = 0
+        self.retired = False
+
+    def terminate(self) -> None:
+        # ProcessPoolExecutor has no public API to kill a busy worker
+        for process in list(getattr(self.executor, '_processes', {}).values()):
+            process.terminate()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
 class DocumentParser:
-    """Parser service for extracting text from PDF and DOCX files."""
+    """
+    Parser service for extracting text from PDF and DOCX files.
+
+    parse_documents runs on a process pool shared by the request threads of a
+    worker. A pool with a stuck or dead process is retired: new rounds get a fresh
+    pool, and the retired one is terminated once the last round using it finishes.
+    """
+
+    # Seconds past the timeout before the parent abandons a worker that did not interrupt itself
+    TIMEOUT_GRACE = 5.0
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ParseCache] = None, workers: Optional[int] = None, timeout: float = 30.0):
+        """
+        Initialize the document parser.
+        
+        Args:
+            cache: Optional parse cache keyed by file content hash
+            workers: Default process pool size for parse_documents (CPU count if None)
+            timeout: Default per-file parse timeout in seconds for parse_documents
+        """
         self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._pool: Optional[_ParsePool] = None
+        self._pool_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        # Start reports drained by any request thread, until the thread that owns the task reads them
+        self._started_at: Dict[int, float] = {}
+        self._started_lock = threading.Lock()
 
     def extract_text(self, file_path: str) -> Optional[str]:
         """
@@ -26,35 +121,59 @@ class DocumentParser:
             return None
 
         file_extension = os.path.splitext(file_path)[1].lower()
-        
+        if file_extension not in ('.pdf', '.docx'):
+            self.logger.error(f"Unsupported file format: {file_extension}")
+            return None
+
         try:
-            if file_extension == '.pdf':
-                return self._extract_from_pdf(file_path)
-            elif file_extension == '.docx':
-                return self._extract_from_docx(file_path)
-            else:
-                self.logger.error(f"Unsupported file format: {file_extension}")
-                return None
+            with open(file_path, 'rb') as file:
+                return self._extract(file, file_extension)
         except Exception as e:
             self.logger.error(f"Error extracting text from {file_path}: {str(e)}")
             return None
 
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file."""
+    def extract_text_from_bytes(self, data: bytes, file_extension: str) -> Optional[str]:
+        """
+        Extract text from an in-memory document (PDF or DOCX).
+        
+        Args:
+            data: Raw file bytes
+            file_extension: File extension including the dot, e.g. '.pdf'
+            
+        Returns:
+            Extracted text as string, or None if extraction fails
+        """
+        file_extension = file_extension.lower()
+        if file_extension not in ('.pdf', '.docx'):
+            self.logger.error(f"Unsupported file format: {file_extension}")
+            return None
+
+        try:
+            return self._extract(io.BytesIO(data), file_extension)
+        except Exception as e:
+            self.logger.error(f"Error extracting text from in-memory {file_extension} document: {str(e)}")
+            return None
+
+    def _extract(self, stream: BinaryIO, file_extension: str) -> str:
+        if file_extension == '.pdf':
+            return self._extract_from_pdf(stream)
+        return self._extract_from_docx(stream)
+
+    def _extract_from_pdf(self, stream: BinaryIO) -> str:
+        """Extract text from a PDF file object."""
         text = []
-        with open(file_path, 'rb') as file:
-            pdf_reader = PdfReader(file)
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    # Fix spaced text
-                    page_text = self._fix_spaced_text(page_text)
-                    text.append(page_text)
+        pdf_reader = PdfReader(stream)
+        for page in pdf_reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                # Fix spaced text
+                page_text = self._fix_spaced_text(page_text)
+                text.append(page_text)
         return '\n'.join(text)
 
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file."""
-        doc = Document(file_path)
+    def _extract_from_docx(self, stream: BinaryIO) -> str:
+        """Extract text from a DOCX file object."""
+        doc = Document(stream)
         return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
 
     def clean_text(self, text: str) -> str:
@@ -73,8 +192,9 @@ class DocumentParser:
         # Replace multiple newlines with single newline
         text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
         
-        # Replace multiple spaces with single space
-        text = ' '.join(text.split())
+        # Replace multiple spaces with single space, keeping line breaks so section
+        # headings can be found at line starts
+        text = '\n'.join(' '.join(line.split()) for line in text.split('\n'))
         
         return text
 
@@ -88,11 +208,244 @@ class DocumentParser:
         Returns:
             Cleaned text content, or None if parsing fails
         """
-        raw_text = self.extract_text(file_path)
+        return self._parse_cached(file_path, lambda: self.extract_text(file_path))
+
+    def parse_bytes(self, data: bytes, file_extension: str) -> Optional[str]:
+        """
+        Parse an in-memory document and return cleaned text, without touching disk.
+        
+        Args:
+            data: Raw file bytes
+            file_extension: File extension including the dot, e.g. '.pdf'
+            
+        Returns:
+            Cleaned text content, or None if parsing fails
+        """
+        upload = UploadedDocument(filename=f"upload{file_extension}", extension=file_extension, data=data)
+        return self._parse_cached(upload, lambda: self.extract_text_from_bytes(data, file_extension))
+
+    def parse_source(self, source: DocumentSource) -> Optional[str]:
+        """
+        Parse a file path or an uploaded document, whichever form it is held in.
+        
+        Args:
+            source: Path to a document file, or an UploadedDocument held in memory
+                or spooled to disk
+            
+        Returns:
+            Cleaned text content, or None if parsing fails
+        """
+        if isinstance(source, UploadedDocument):
+            if source.data is not None:
+                return self.parse_bytes(source.data, source.extension)
+            return self.parse_document(source.path)
+        return self.parse_document(source)
+
+    def _parse_cached(self, source: DocumentSource, extract) -> Optional[str]:
+        cache_key = self._cache_key(source)
+        if cache_key is not None:
+            cached_text = self.cache.get(cache_key)
+            if cached_text is not None:
+                return cached_text
+
+        raw_text = extract()
         if raw_text is None:
             return None
             
-        return self.clean_text(raw_text)
+        text = self.clean_text(raw_text)
+        if cache_key is not None:
+            self.cache.put(cache_key, text)
+        return text
+
+    def parse_documents(
+        self,
+        file_paths: List[DocumentSource],
+        workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[Optional[str]]:
+        """
+        Parse several documents in parallel using a process pool.
+        
+        Every document is parsed in the pool, even a single one, so the timeout
+        applies to all of them. Only with a timeout of 0 (none) are documents
+        parsed in the calling thread when there is at most one to parse.
+        
+        Args:
+            file_paths: Paths to the document files, or UploadedDocuments
+            workers: Number of worker processes (defaults to the parser setting)
+            timeout: Per-file timeout in seconds (defaults to the parser setting)
+            
+        Returns:
+            Cleaned text for each document in input order; None for documents that
+            failed, were unsupported or timed out
+        """
+        workers = max(1, workers or self.workers)
+        timeout = timeout if timeout is not None else self.timeout
+        results: List[Optional[str]] = [None] * len(file_paths)
+
+        # Serve cache hits in-process; only misses go to the pool
+        pending: Dict[int, Optional[str]] = {}
+        for i, file_path in enumerate(file_paths):
+            cache_key = self._cache_key(file_path)
+            if cache_key is not None:
+                cached_text = self.cache.get(cache_key)
+                if cached_text is not None:
+                    results[i] = cached_text
+                    continue
+            pending[i] = cache_key
+
+        if not pending:
+            return results
+        if timeout <= 0 and (workers == 1 or len(pending) == 1):
+            for i in pending:
+                results[i] = self.parse_source(file_paths[i])
+            return results
+
+        # Files hit by a crashed worker are retried once in a fresh pool
+        remaining = list(pending)
+        for _ in range(2):
+            remaining = self._parse_in_pool(file_paths, remaining, results, workers, timeout)
+            if not remaining:
+                break
+        for i in remaining:
+            self.logger.error(f"Worker crashed while parsing {file_paths[i]}")
+
+        if self.cache is not None:
+            for i, cache_key in pending.items():
+                if cache_key is not None and results[i] is not None:
+                    self.cache.put(cache_key, results[i])
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the parse worker pool, if one was started; a busy one stops when its rounds finish."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            if pool is None:
+                return
+            pool.retired = True
+            idle = pool.users == 0
+        if idle:
+            pool.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _parse_in_pool(
+        self,
+        file_paths: List[DocumentSource],
+        indices: List[int],
+        results: List[Optional[str]],
+        workers: int,
+        timeout: float
+    ) -> List[int]:
+        """
+        Run one pool round, filling results in place. Returns indices lost to a broken pool.
+
+        Workers interrupt a document themselves once it exceeds the timeout. As a
+        backstop for a worker stuck outside the interpreter, the parent also gives up on
+        a document a grace period after its worker reported starting it; futures
+        queued in the executor are not timed, however long they wait.
+        """
+        pool = self._acquire_pool(workers)
+        try:
+            return self._run_pool_round(pool, file_paths, indices, results, timeout)
+        except BaseException:
+            self._release_pool(pool, retire=False)
+            raise
+
+    def _run_pool_round(
+        self,
+        pool: _ParsePool,
+        file_paths: List[DocumentSource],
+        indices: List[int],
+        results: List[Optional[str]],
+        timeout: float
+    ) -> List[int]:
+        executor = pool.executor
+        started_queue = pool.started_queue
+        futures: Dict[Future, int] = {}
+        task_ids: Dict[int, Future] = {}
+        for i in indices:
+            task_id = next(self._task_ids)
+            future = executor.submit(_parse_in_worker, file_paths[i], task_id, timeout)
+            futures[future] = i
+            task_ids[task_id] = future
+
+        started: Dict[Future, float] = {}
+        not_done = set(futures)
+        timed_out = False
+        while not_done:
+            _, not_done = wait(not_done, timeout=0.1, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            with self._started_lock:
+                while not started_queue.empty():
+                    self._started_at[started_queue.get()] = now
+                for task_id, future in task_ids.items():
+                    if task_id in self._started_at:
+                        started[future] = self._started_at.pop(task_id)
+            for future in list(not_done):
+                if future in started and now - started[future] > timeout + self.TIMEOUT_GRACE:
+                    self.logger.error(
+                        f"Worker did not interrupt itself {timeout + self.TIMEOUT_GRACE}s into "
+                        f"parsing {file_paths[futures[future]]}; abandoning it"
+                    )
+                    not_done.discard(future)
+                    timed_out = True
+        with self._started_lock:
+            for task_id in task_ids:
+                self._started_at.pop(task_id, None)
+
+        broken = []
+        for future, i in futures.items():
+            if not future.done():
+                continue
+            try:
+                results[i] = future.result()
+            except ParseTimeoutError:
+                self.logger.error(f"Timed out after {timeout}s parsing {file_paths[i]}")
+            except BrokenProcessPool:
+                broken.append(i)
+            except Exception as e:
+                self.logger.error(f"Error parsing {file_paths[i]}: {str(e)}")
+
+        # Stuck or dead workers cannot be reclaimed; retire the whole pool
+        self._release_pool(pool, retire=timed_out or bool(broken))
+        return broken
+
+    def _acquire_pool(self, workers: int) -> _ParsePool:
+        """Register a pool round on the current pool, starting one if needed."""
+        with self._pool_lock:
+            pool = self._pool
+            if pool is not None and pool.workers != workers and pool.users == 0:
+                # Resize an idle pool; a busy one is shared at its current size
+                pool.executor.shutdown(wait=False, cancel_futures=True)
+                pool = None
+            if pool is None:
+                pool = self._pool = _ParsePool(workers)
+            pool.users += 1
+            return pool
+
+    def _release_pool(self, pool: _ParsePool, retire: bool) -> None:
+        """End a pool round; terminate the pool once it is retired and no round uses it."""
+        with self._pool_lock:
+            pool.users -= 1
+            if retire:
+                pool.retired = True
+                if self._pool is pool:
+                    self._pool = None
+            terminate = pool.retired and pool.users == 0
+        if terminate:
+            pool.terminate()
+
+    def _cache_key(self, source: DocumentSource) -> Optional[str]:
+        """Content-hash cache key for a document, or None when caching is disabled."""
+        if self.cache is None:
+            return None
+        if isinstance(source, UploadedDocument):
+            if source.data is not None:
+                return ParseCache.make_key(source.data, source.extension)
+            source = source.path
+        if not os.path.exists(source):
+            return None
+        with open(source, 'rb') as file:
+            return ParseCache.make_key(file.read(), os.path.splitext(source)[1])
 
     def _fix_spaced_text(self, text: str) -> str:
         fixed_lines = []
@@ -3,8 +3,14 @@ import numpy as np
 import logging
 from dataclasses import dataclass
 from enum import Enum
-from sentence_transformers import SentenceTransformer
 import torch
+import torch.nn.functional as F
+from app.services.embedding_cache import EmbeddingCache
+from app.services.encoders import EncoderBackend, create_encoder
+from app.services.chunking import ChunkingConfig, ChunkPooling, DocumentChunker
+from app.services.metrics import pipeline_metrics
+from app.services.inference_scheduler import InferenceScheduler, SchedulerConfig
+from app.services.sparse_prefilter import CascadeConfig, SparsePrefilter
 
 class SimilarityMetric(Enum):
     COSINE = "cosine"
@@ -18,20 +24,75 @@ class SimilarityConfig:
     top_k: int = 5
     weights: Optional[Dict[str, float]] = None
 
+# Weights used by SimilarityMetric.COMBINED for any weight SimilarityConfig.weights does not set
+DEFAULT_COMBINED_WEIGHTS = {'cosine': 0.7, 'euclidean': 0.3}
+
 class SimilarityEngine:
     """Engine for computing semantic similarity between documents using BERT embeddings."""
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        cache_dir: Optional[str] = None,
+        cache_max_entries: int = 50000,
+        backend: EncoderBackend = EncoderBackend.TORCH,
+        export_dir: Optional[str] = None,
+        chunking: Optional[ChunkingConfig] = None,
+        scheduler: Optional[SchedulerConfig] = None,
+        cascade: Optional[CascadeConfig] = None
+    ):
         """
         Initialize the similarity engine with a BERT model.
         
         Args:
             model_name: Name of the sentence-transformer model to use
+            cache_dir: Directory for the persistent embedding cache (disabled if None)
+            cache_max_entries: Maximum number of cached embeddings before LRU eviction
+            backend: Inference backend (PyTorch, ONNX Runtime, or their int8 variants)
+            export_dir: Directory for ONNX model exports (ONNX backends only)
+            chunking: Embed long documents as pooled chunk embeddings (truncated if None)
+            scheduler: Batch encode calls from concurrent requests on one inference
+                thread (each call encodes on its own if None)
+            cascade: Rerank only the targets a sparse lexical prefilter keeps (every
+                target is encoded if None)
         """
         self.logger = logging.getLogger(__name__)
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model = SentenceTransformer(model_name, device=self.device)
-        self.logger.info(f"Initialized BERT model {model_name} on {self.device}")
+        self.model_name = model_name
+        self.backend = backend
+        # ONNX Runtime and quantized kernels run on CPU; the embeddings follow them
+        self.device = 'cuda' if torch.cuda.is_available() and backend == EncoderBackend.TORCH else 'cpu'
+        self.encoder = create_encoder(
+            backend, model_name, device=self.device, export_dir=export_dir,
+            threads=scheduler.threads if scheduler is not None else 0
+        )
+        self.logger.info(f"Initialized BERT model {model_name} with the {backend.value} backend on {self.device}")
+        self.scheduler = InferenceScheduler(self.encoder, scheduler) if scheduler is not None else None
+
+        self.chunking = chunking
+        self.chunker = None
+        self.cache_namespace = self.encoder.cache_namespace
+        if chunking is not None:
+            # Leave room for the [CLS] and [SEP] tokens
+            max_tokens = chunking.max_tokens or self.encoder.max_seq_length - 2
+            self.chunker = DocumentChunker(self.encoder.tokenizer, max_tokens, chunking.overlap)
+            self.cache_namespace += f":chunks-{max_tokens}-{chunking.overlap}-{chunking.pooling.value}"
+            self.logger.info(f"Embedding documents as {chunking.pooling.value}-pooled chunks of {max_tokens} tokens")
+
+        self.cache = None
+        if cache_dir:
+            self.cache = EmbeddingCache(
+                cache_dir,
+                dim=self.get_embedding_dimension(),
+                max_entries=cache_max_entries
+            )
+            self.logger.info(f"Using embedding cache at {cache_dir}")
+
+        self.prefilter = SparsePrefilter(cascade) if cascade is not None else None
+        if cascade is not None:
+            self.logger.info(
+                f"Cascade ranking: {cascade.method.value} prefilter keeps {cascade.keep_fraction:.0%} "
+                f"of candidates (at least {cascade.min_candidates})"
+            )
 
     def compute_similarity(
         self,
@@ -41,46 +102,300 @@ class SimilarityEngine:
     ) -> List[Dict[str, Any]]:
         """
         Compute similarity between source text and target texts using BERT embeddings.
-        Rank by combined (average) of cosine and euclidean similarity.
+        Rank by config.metric: cosine, euclidean, or the config.weights combination of both.
+        
+        Only targets scoring at least config.threshold are kept, and only the best
+        config.top_k of those are returned (all of them if top_k <= 0). In cascade
+        mode only the targets kept by the sparse prefilter are encoded and ranked.
         """
         try:
-            # Generate embeddings
-            source_embedding = self.model.encode(source_text, convert_to_tensor=True)
-            target_embeddings = self.model.encode(target_texts, convert_to_tensor=True)
+            candidates = self.select_candidates(source_text, target_texts)
 
-            # Compute both similarities
-            cosine_similarities = self._compute_cosine_similarity(source_embedding, target_embeddings)
-            euclidean_similarities = self._compute_euclidean_similarity(source_embedding, target_embeddings)
+            # Encode the source and all candidates in a single batched forward pass
+            source_embedding, target_embeddings = self.encode_documents(
+                source_text, [target_texts[i] for i in candidates]
+            )
+            results = self.rank_embeddings(source_embedding, target_embeddings, config)
+            for result in results:
+                result['index'] = candidates[result['index']]
 
-            # Compute combined (average) score for each resume
-            combined_scores = (cosine_similarities + euclidean_similarities) / 2
+            self.logger.debug(f"Returning {len(results)} matches")
 
-            # Build results using combined score for ranking
-            results = [
-                {
-                    'index': i,
-                    'similarity_score': float(combined_scores[i]),  # Use combined score for ranking
-                    'cosine_similarity': float(cosine_similarities[i]),
-                    'euclidean_similarity': float(euclidean_similarities[i]),
-                    'rank': 0  # Will be updated after sorting
-                }
-                for i in range(len(combined_scores))
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Error computing similarity: {str(e)}")
+            return []
+
+    def select_candidates(self, source_text: str, target_texts: List[str]) -> List[int]:
+        """
+        First stage of cascade ranking: pick the targets worth encoding.
+        
+        Args:
+            source_text: Preprocessed source text
+            target_texts: Preprocessed target texts
+            
+        Returns:
+            Indices of the kept targets in ascending order (all of them without a cascade)
+        """
+        if self.prefilter is None:
+            return list(range(len(target_texts)))
+        with pipeline_metrics.time_stage('prefilter', documents=len(target_texts)):
+            candidates = self.prefilter.select(source_text, target_texts).tolist()
+        self.logger.debug(f"Prefilter kept {len(candidates)} of {len(target_texts)} targets")
+        return candidates
+
+    def rank_embeddings(
+        self,
+        source_embedding: torch.Tensor,
+        target_embeddings: torch.Tensor,
+        config: SimilarityConfig
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank already-encoded targets against an encoded source.
+        
+        Args:
+            source_embedding: Source embedding of shape [dim]
+            target_embeddings: Target embeddings of shape [N, dim]
+            config: Similarity configuration
+            
+        Returns:
+            Ranked matches in the compute_similarity format
+        """
+        documents = len(target_embeddings)
+        with pipeline_metrics.time_stage('score', documents=documents):
+            scores = self.score_matrix(source_embedding, target_embeddings, config)
+            score_row = scores['score'][0].cpu().numpy()
+            cosine_row = scores['cosine'][0].cpu().numpy()
+            euclidean_row = scores['euclidean'][0].cpu().numpy()
+        with pipeline_metrics.time_stage('explain', documents=documents):
+            return self._build_results(score_row, cosine_row, euclidean_row, config)
+
+    def rank_embeddings_matrix(
+        self,
+        source_embeddings: torch.Tensor,
+        target_embeddings: torch.Tensor,
+        config: SimilarityConfig
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Rank already-encoded targets against several encoded sources with one M x N matmul.
+        
+        Args:
+            source_embeddings: Source embeddings of shape [M, dim]
+            target_embeddings: Target embeddings of shape [N, dim]
+            config: Similarity configuration applied to every source
+            
+        Returns:
+            For each source, its ranked matches in the compute_similarity format
+        """
+        documents = len(target_embeddings)
+        with pipeline_metrics.time_stage('score', documents=documents):
+            scores = self.score_matrix(source_embeddings, target_embeddings, config)
+            score_rows = scores['score'].cpu().numpy()
+            cosine_rows = scores['cosine'].cpu().numpy()
+            euclidean_rows = scores['euclidean'].cpu().numpy()
+        with pipeline_metrics.time_stage('explain', documents=documents):
+            return [
+                self._build_results(score_rows[i], cosine_rows[i], euclidean_rows[i], config)
+                for i in range(len(score_rows))
             ]
 
-            # Sort by combined score
-            results.sort(key=lambda x: x['similarity_score'], reverse=True)
+    def compute_similarity_matrix(
+        self,
+        source_texts: List[str],
+        target_texts: List[str],
+        config: SimilarityConfig
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Score many source documents (e.g. JDs) against many targets (e.g. resumes) at once.
+        
+        All documents are encoded in one batch and scored as an M x N matrix with a
+        single matmul.
+        
+        Args:
+            source_texts: M source document texts
+            target_texts: N target document texts
+            config: Similarity configuration applied to every source
+            
+        Returns:
+            For each source, its ranked matches in the compute_similarity format
+        """
+        try:
+            embeddings = self.encode(list(source_texts) + list(target_texts))
+            scores = self.score_matrix(embeddings[:len(source_texts)], embeddings[len(source_texts):], config)
+            score_rows = scores['score'].cpu().numpy()
+            cosine_rows = scores['cosine'].cpu().numpy()
+            euclidean_rows = scores['euclidean'].cpu().numpy()
+            return [
+                self._build_results(score_rows[i], cosine_rows[i], euclidean_rows[i], config)
+                for i in range(len(source_texts))
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Error computing similarity matrix: {str(e)}")
+            return [[] for _ in source_texts]
+
+    def score_matrix(
+        self,
+        source_embeddings: torch.Tensor,
+        target_embeddings: torch.Tensor,
+        config: SimilarityConfig
+    ) -> Dict[str, torch.Tensor]:
+        """
+        Fused scoring kernel over unit-normalized embeddings.
+        
+        Cosine similarity is one matmul. Euclidean similarity is derived from it, since
+        for unit vectors ||a - b||^2 = 2 - 2 * cos(a, b). The ranking score applies
+        config.metric and config.weights.
+        
+        Args:
+            source_embeddings: Tensor of shape [M, dim] (or [dim] for a single source)
+            target_embeddings: Tensor of shape [N, dim]
+            config: Similarity configuration
+            
+        Returns:
+            Dictionary with 'cosine', 'euclidean' and 'score' tensors of shape [M, N]
+        """
+        if source_embeddings.dim() == 1:
+            source_embeddings = source_embeddings.unsqueeze(0)
+        source = F.normalize(source_embeddings.float(), dim=-1)
+        target = F.normalize(target_embeddings.float(), dim=-1)
+
+        cosine = source @ target.T
+        euclidean = 1 / (1 + torch.sqrt(torch.clamp(2 - 2 * cosine, min=0)))
+
+        if config.metric == SimilarityMetric.COSINE:
+            score = cosine
+        elif config.metric == SimilarityMetric.EUCLIDEAN:
+            score = euclidean
+        else:
+            weights = {**DEFAULT_COMBINED_WEIGHTS, **(config.weights or {})}
+            score = weights['cosine'] * cosine + weights['euclidean'] * euclidean
+
+        return {'cosine': cosine, 'euclidean': euclidean, 'score': score}
 
-            # Update rankings
-            for i, result in enumerate(results):
-                result['rank'] = i + 1
+    def _build_results(
+        self,
+        scores: np.ndarray,
+        cosine_similarities: np.ndarray,
+        euclidean_similarities: np.ndarray,
+        config: SimilarityConfig
+    ) -> List[Dict[str, Any]]:
+        """Select the top-k targets of one score row and build their ranked results."""
+        # Threshold and top-k selection on the score vector; only survivors are materialized
+        selected = self._select_top_k(scores, config.threshold, config.top_k)
+
+        # The explanation is derived from the scores computed here, so callers never
+        # need to re-encode.
+        return [
+            {
+                'index': int(i),
+                'similarity_score': float(scores[i]),
+                'cosine_similarity': float(cosine_similarities[i]),
+                'euclidean_similarity': float(euclidean_similarities[i]),
+                'explanation': self._build_explanation(
+                    float(cosine_similarities[i]),
+                    float(euclidean_similarities[i])
+                ),
+                'rank': rank
+            }
+            for rank, i in enumerate(selected, start=1)
+        ]
 
-            print("Results to return:", results)
+    def _select_top_k(self, scores: np.ndarray, threshold: float, top_k: int) -> np.ndarray:
+        """
+        Indices of the best scores at or above threshold, best first.
+        
+        Uses argpartition so only the surviving top_k entries are sorted.
+        """
+        candidates = np.flatnonzero(scores >= threshold)
+        if 0 < top_k < len(candidates):
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
 
-            return results
+    def encode_documents(
+        self,
+        source_text: str,
+        target_texts: List[str]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Encode a source document and its targets with one batched model call.
+        
+        Args:
+            source_text: Source document text
+            target_texts: List of target document texts
+            
+        Returns:
+            Tuple of (source embedding [dim], target embeddings [N, dim])
+        """
+        embeddings = self.encode([source_text] + list(target_texts))
+        return embeddings[0], embeddings[1:]
 
-        except Exception as e:
-            self.logger.error(f"Error computing similarity: {str(e)}")
-            return []
+    def encode(self, texts: List[str]) -> torch.Tensor:
+        """
+        Encode texts in one batch, serving repeated texts from the embedding cache.
+        
+        Args:
+            texts: List of (preprocessed) document texts
+            
+        Returns:
+            Tensor of shape [len(texts), dim] on the engine device
+        """
+        if self.cache is None:
+            return torch.from_numpy(self._encode_uncached(texts)).to(self.device)
+
+        keys = [EmbeddingCache.make_key(text, self.cache_namespace) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = [i for i in range(len(texts)) if i not in cached]
+
+        vectors = np.zeros((len(texts), self.cache.dim), dtype=np.float32)
+        for i, vector in cached.items():
+            vectors[i] = vector
+
+        if missing:
+            encoded = self._encode_uncached([texts[i] for i in missing]).reshape(len(missing), self.cache.dim)
+            vectors[missing] = encoded
+            self.cache.put_many([keys[i] for i in missing], encoded)
+
+        return torch.from_numpy(vectors).to(self.device)
+
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        """Run the encoder on texts, pooling chunk embeddings when chunking is enabled."""
+        if self.chunker is None:
+            return self._run_encoder(texts)
+
+        chunks, starts = [], []
+        for text in texts:
+            starts.append(len(chunks))
+            chunks.extend(self.chunker.chunk(text))
+
+        # One encode call over the chunks of every document, sorted by length so that
+        # each batch pads to similar lengths
+        order = np.argsort([-len(chunk) for chunk in chunks], kind='stable')
+        chunk_embeddings = np.empty((len(chunks), self.get_embedding_dimension()), dtype=np.float32)
+        chunk_embeddings[order] = self._run_encoder([chunks[i] for i in order])
+
+        # Each document's chunks are contiguous, starting at starts[i]
+        if self.chunking.pooling == ChunkPooling.MAX:
+            pooled = np.maximum.reduceat(chunk_embeddings, starts, axis=0)
+        else:
+            counts = np.diff(starts + [len(chunks)])
+            pooled = np.add.reduceat(chunk_embeddings, starts, axis=0) / counts[:, None]
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def _run_encoder(self, texts: List[str]) -> np.ndarray:
+        """Encode texts through the inference scheduler when one is configured."""
+        if self.scheduler is not None:
+            return self.scheduler.encode(texts)
+        return self.encoder.encode(texts)
+
+    def get_embedding_dimension(self) -> int:
+        """Return the size of the vectors produced by encode."""
+        return self.encoder.get_dimension()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return embedding cache counters, or an empty dict when caching is disabled."""
+        return self.cache.stats() if self.cache is not None else {}
 
     def get_ranking_summary(
         self,
@@ -130,70 +445,6 @@ class SimilarityEngine:
             ]
         }
 
-    def _compute_cosine_similarity(
-        self,
-        source_embedding: torch.Tensor,
-        target_embeddings: torch.Tensor
-    ) -> np.ndarray:
-        """Compute cosine similarity between BERT embeddings."""
-        from torch.nn.functional import cosine_similarity
-        # source_embedding: [384], target_embeddings: [N, 384]
-        if len(target_embeddings.shape) == 1:
-            # Single vector, for explanation
-            return cosine_similarity(source_embedding, target_embeddings, dim=0).item()
-        else:
-            # Batch, for compute_similarity
-            similarities = cosine_similarity(target_embeddings, source_embedding.unsqueeze(0), dim=1)
-            return similarities.cpu().numpy()
-
-    def _compute_euclidean_similarity(
-        self,
-        source_embedding: torch.Tensor,
-        target_embeddings: torch.Tensor
-    ) -> np.ndarray:
-        """Compute similarity based on Euclidean distance between BERT embeddings."""
-        # source_embedding: [384], target_embeddings: [N, 384]
-        if len(target_embeddings.shape) == 1:
-            # Single vector, for explanation
-            # Ensure both are 2D
-            if len(source_embedding.shape) == 1:
-                source_embedding = source_embedding.unsqueeze(0)
-            if len(target_embeddings.shape) == 1:
-                target_embeddings = target_embeddings.unsqueeze(0)
-            distance = torch.cdist(source_embedding, target_embeddings, p=2)[0][0]
-            similarity = 1 / (1 + distance)
-            return similarity.item()
-        else:
-            # Batch, for compute_similarity
-            distances = torch.cdist(target_embeddings, source_embedding.unsqueeze(0), p=2).squeeze(1)
-            similarities = 1 / (1 + distances)
-            return similarities.cpu().numpy()
-
-    def _compute_combined_similarity(
-        self,
-        source_embedding: torch.Tensor,
-        target_embeddings: torch.Tensor,
-        weights: Optional[Dict[str, float]] = None
-    ) -> np.ndarray:
-        """Compute combined similarity using multiple metrics."""
-        if weights is None:
-            weights = {
-                'cosine': 0.7,
-                'euclidean': 0.3
-            }
-
-        # Compute individual similarities
-        cosine_sim = self._compute_cosine_similarity(source_embedding, target_embeddings)
-        euclidean_sim = self._compute_euclidean_similarity(source_embedding, target_embeddings)
-
-        # Combine similarities with weights
-        combined_sim = (
-            weights['cosine'] * cosine_sim +
-            weights['euclidean'] * euclidean_sim
-        )
-
-        return combined_sim
-
     def get_similarity_explanation(
         self,
         source_text: str,
@@ -213,27 +464,14 @@ class SimilarityEngine:
         """
         try:
             # Generate embeddings
-            source_embedding = self.model.encode(source_text, convert_to_tensor=True)
-            target_embedding = self.model.encode(target_text, convert_to_tensor=True)
-
-            # Ensure both are 1D tensors
-            if len(source_embedding.shape) > 1:
-                source_embedding = source_embedding.squeeze(0)
-            if len(target_embedding.shape) > 1:
-                target_embedding = target_embedding.squeeze(0)
+            source_embedding, target_embeddings = self.encode_documents(source_text, [target_text])
 
             # Compute similarities
-            cosine_score = float(self._compute_cosine_similarity(source_embedding, target_embedding))
-            euclidean_score = float(self._compute_euclidean_similarity(source_embedding, target_embedding))
-
-            # Generate explanation
-            explanation = self._generate_explanation(cosine_score, euclidean_score)
+            scores = self.score_matrix(source_embedding, target_embeddings, config)
+            cosine_score = float(scores['cosine'][0, 0])
+            euclidean_score = float(scores['euclidean'][0, 0])
 
-            return {
-                'cosine_similarity': cosine_score,
-                'euclidean_similarity': euclidean_score,
-                'explanation': explanation
-            }
+            return self._build_explanation(cosine_score, euclidean_score)
 
         except Exception as e:
             self.logger.error(f"Error generating similarity explanation: {str(e)}")
@@ -243,6 +481,18 @@ class SimilarityEngine:
                 'explanation': "Error generating explanation"
             }
 
+    def _build_explanation(
+        self,
+        cosine_score: float,
+        euclidean_score: float
+    ) -> Dict[str, Any]:
+        """Build the explanation payload for a pair of precomputed scores."""
+        return {
+            'cosine_similarity': cosine_score,
+            'euclidean_similarity': euclidean_score,
+            'explanation': self._generate_explanation(cosine_score, euclidean_score)
+        }
+
     def _generate_explanation(
         self,
         cosine_score: float,
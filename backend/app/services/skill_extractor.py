@@ -1,17 +1,36 @@
 import spacy
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
+from app.services.skill_taxonomy import SkillTaxonomy
+from app.services.skill_index import SkillQuery
 
 class SkillExtractor:
-    def __init__(self):
+    # Only the entity recognizer (and the embedding layer it reads from) feeds skill extraction
+    NER_COMPONENTS = ('tok2vec', 'ner')
+
+    def __init__(self, batch_size: int = 32, n_process: int = 1, taxonomy_path: Optional[str] = None):
+        """
+        Initialize the skill extractor.
+        
+        Args:
+            batch_size: Number of documents per nlp.pipe batch
+            n_process: Number of processes nlp.pipe may use for batch extraction
+            taxonomy_path: Path to a skill taxonomy JSON file (bundled taxonomy if None)
+        """
         self.logger = logging.getLogger(__name__)
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            self.logger.warning("Downloading spaCy model...")
-            spacy.cli.download("en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+        self.batch_size = batch_size
+        self.n_process = n_process
+        # The model is installed ahead of time (python -m app.services.model_registry --download)
+        self.nlp = spacy.load("en_core_web_sm")
+
+        # Parser, tagger and lemmatizer output is never read, so skip running them
+        self.nlp.select_pipes(disable=[
+            name for name in self.nlp.pipe_names if name not in self.NER_COMPONENTS
+        ])
+
+        # Compiled once; matches every taxonomy skill in a single pass per document
+        self.taxonomy = SkillTaxonomy(self.nlp, taxonomy_path)
 
     def extract_skills(self, text: str) -> List[str]:
         """
@@ -23,32 +42,66 @@ class SkillExtractor:
         Returns:
             List of extracted skills
         """
-        # Common technical skills and programming languages
-        technical_skills = {
-            'programming': ['python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust'],
-            'frameworks': ['react', 'angular', 'vue', 'django', 'flask', 'spring', 'express', 'laravel', 'rails', 'asp.net'],
-            'databases': ['sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sqlite', 'cassandra'],
-            'cloud': ['aws', 'azure', 'gcp', 'cloud', 'docker', 'kubernetes', 'terraform'],
-            'tools': ['git', 'jenkins', 'jira', 'confluence', 'slack', 'trello', 'figma', 'sketch'],
-            'methodologies': ['agile', 'scrum', 'kanban', 'waterfall', 'devops', 'ci/cd'],
-        }
+        return self._skills_from_doc(self.nlp(text))
+
+    def extract_skills_batch(self, texts: List[str]) -> List[List[str]]:
+        """
+        Extract skills from many texts, streaming them through nlp.pipe.
+        
+        Args:
+            texts: Input texts to extract skills from
+            
+        Returns:
+            List of extracted skills for each text, in input order
+        """
+        docs = self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)
+        return [self._skills_from_doc(doc) for doc in docs]
+
+    def extract_taxonomy_skills_batch(self, texts: List[str]) -> List[List[str]]:
+        """
+        Find taxonomy skills only, for building skill indexes.
+        
+        Runs the tokenizer and the phrase matchers but not the NER model, so it is
+        cheap enough to run on every resume before ranking.
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Sorted canonical skill names for each text, in input order
+        """
+        docs = self.nlp.tokenizer.pipe(texts, batch_size=self.batch_size)
+        return [sorted(self.taxonomy.match(doc)) for doc in docs]
 
-        # Convert text to lowercase for better matching
-        text_lower = text.lower()
+    def parse_skill_filter(self, expression: str) -> SkillQuery:
+        """
+        Parse a must-have skill filter such as "java AND spring".
         
-        # Extract skills using NER
-        doc = self.nlp(text)
+        Args:
+            expression: Boolean skill expression (see SkillQuery)
+            
+        Returns:
+            Query over canonical taxonomy skill names
+            
+        Raises:
+            ValueError: If the expression is malformed or names a skill outside the taxonomy
+        """
+        query = SkillQuery(expression, normalize=self.taxonomy.normalize)
+        unknown = sorted(query.skills - self.taxonomy.skills)
+        if unknown:
+            raise ValueError(f"Unknown skills in skill filter: {', '.join(unknown)}")
+        return query
+
+    def _skills_from_doc(self, doc) -> List[str]:
+        """Combine NER entities from a processed doc with taxonomy matches."""
+        # Extract skills using NER, mapping known aliases to canonical names
         ner_skills = []
         for ent in doc.ents:
             if ent.label_ in ['PRODUCT', 'ORG', 'LANGUAGE']:
-                ner_skills.append(ent.text.lower())
+                ner_skills.append(self.taxonomy.normalize(ent.text))
 
-        # Extract skills using keyword matching
-        keyword_skills = []
-        for category, skills in technical_skills.items():
-            for skill in skills:
-                if skill in text_lower:
-                    keyword_skills.append(skill)
+        # Extract skills using the compiled taxonomy matcher
+        keyword_skills = list(self.taxonomy.match(doc))
 
         # Combine and deduplicate skills
         all_skills = list(set(ner_skills + keyword_skills))
@@ -77,7 +130,37 @@ class SkillExtractor:
         """
         jd_skills = self.extract_skills(job_description)
         resume_skills = self.extract_skills(resume)
+        return self._compare_skills(jd_skills, resume_skills)
+
+    def get_skill_matches(
+        self,
+        job_description: str,
+        resumes: List[str],
+        jd_skills: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare skills between one job description and many resumes.
+        
+        The job description is processed once and the resumes are streamed through
+        nlp.pipe, instead of re-running the JD through spaCy for every resume.
         
+        Args:
+            job_description: Job description text
+            resumes: Resume texts
+            jd_skills: Skills already extracted from the job description (extracted if None)
+            
+        Returns:
+            List of skill match analyses, one per resume in input order
+        """
+        if jd_skills is None:
+            jd_skills = self.extract_skills(job_description)
+        return [
+            self._compare_skills(jd_skills, resume_skills)
+            for resume_skills in self.extract_skills_batch(resumes)
+        ]
+
+    def _compare_skills(self, jd_skills: List[str], resume_skills: List[str]) -> Dict[str, Any]:
+        """Build the skill match analysis for one resume."""
         # Find matching and missing skills
         matching_skills = list(set(jd_skills) & set(resume_skills))
         missing_skills = list(set(jd_skills) - set(resume_skills))
@@ -0,0 +1,191 @@
+import re
+from typing import Callable, Dict, Iterable, List, Set, Tuple, Union
+
+import numpy as np
+
+# Parsed query nodes: ('skill', name), ('not', node), ('and', [nodes]) or ('or', [nodes])
+QueryNode = Tuple[str, Union[str, 'QueryNode', List['QueryNode']]]
+
+
+class SkillQuery:
+    """
+    Boolean must-have skill filter, e.g. ``java AND (spring OR "spring boot") AND NOT php``.
+
+    AND, OR and NOT are case-insensitive and bind in the usual order (NOT, then AND,
+    then OR); a comma is an AND. Adjacent words without an operator form one
+    multi-word skill, as do double-quoted phrases. Skill names are passed through
+    ``normalize`` so aliases resolve to the canonical names stored in the index.
+    """
+
+    TOKEN = re.compile(r'\s*(?:([(),])|"([^"]*)"|([^\s(),"]+))')
+    OPERATORS = {'and', 'or', 'not'}
+
+    def __init__(self, expression: str, normalize: Callable[[str], str] = str.lower):
+        """
+        Parse a filter expression.
+
+        Args:
+            expression: Boolean skill expression
+            normalize: Maps a skill as written to its indexed name
+
+        Raises:
+            ValueError: If the expression is empty or malformed
+        """
+        self.expression = expression.strip()
+        self.normalize = normalize
+        self.skills: Set[str] = set()
+        self._tokens = self._tokenize(self.expression)
+        self._position = 0
+        if not self._tokens:
+            raise ValueError("Skill filter is empty")
+        self.root = self._parse_or()
+        if self._position < len(self._tokens):
+            raise ValueError(f"Unexpected '{self._tokens[self._position][1]}' in skill filter")
+
+    def __str__(self) -> str:
+        return self.expression
+
+    def _tokenize(self, expression: str) -> List[Tuple[str, str]]:
+        """Split into ('op', and/or/not), ('punct', '(' ')' ','), and ('word'/'phrase', text) tokens."""
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = self.TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"Unbalanced quote in skill filter: {expression}")
+            punct, phrase, word = match.groups()
+            if punct:
+                tokens.append(('punct', punct))
+            elif phrase is not None:
+                tokens.append(('phrase', phrase))
+            elif word.lower() in self.OPERATORS:
+                tokens.append(('op', word.lower()))
+            else:
+                tokens.append(('word', word))
+            position = match.end()
+        return tokens
+
+    def _peek(self) -> Tuple[str, str]:
+        return self._tokens[self._position] if self._position < len(self._tokens) else ('end', '')
+
+    def _parse_or(self) -> QueryNode:
+        operands = [self._parse_and()]
+        while self._peek() == ('op', 'or'):
+            self._position += 1
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else ('or', operands)
+
+    def _parse_and(self) -> QueryNode:
+        operands = [self._parse_not()]
+        while self._peek() in (('op', 'and'), ('punct', ',')):
+            self._position += 1
+            operands.append(self._parse_not())
+        return operands[0] if len(operands) == 1 else ('and', operands)
+
+    def _parse_not(self) -> QueryNode:
+        if self._peek() == ('op', 'not'):
+            self._position += 1
+            return ('not', self._parse_not())
+        return self._parse_atom()
+
+    def _parse_atom(self) -> QueryNode:
+        kind, text = self._peek()
+        if (kind, text) == ('punct', '('):
+            self._position += 1
+            node = self._parse_or()
+            if self._peek() != ('punct', ')'):
+                raise ValueError("Missing ')' in skill filter")
+            self._position += 1
+            return node
+        if kind == 'phrase':
+            self._position += 1
+            return self._skill(text)
+        if kind == 'word':
+            words = []
+            while self._peek()[0] == 'word':
+                words.append(self._peek()[1])
+                self._position += 1
+            return self._skill(' '.join(words))
+        raise ValueError(f"Expected a skill in skill filter, found '{text or 'end of input'}'")
+
+    def _skill(self, name: str) -> QueryNode:
+        skill = self.normalize(name)
+        if not skill:
+            raise ValueError("Empty skill name in skill filter")
+        self.skills.add(skill)
+        return ('skill', skill)
+
+
+class SkillIndex:
+    """
+    Inverted index from skill to the documents that mention it, as bitsets.
+
+    Each posting list is a little-endian packed bit array over document ids, so a
+    boolean filter is evaluated with a few vectorized AND/OR/NOT passes over
+    ``size / 8`` bytes per skill, independent of how many documents match.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._capacity = 0  # Bytes allocated per posting list
+        self._postings: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, doc_id: int, skills: Iterable[str]) -> None:
+        """
+        Index a document's skills.
+
+        Args:
+            doc_id: Non-negative document id (ids need not be added in order)
+            skills: Canonical skill names found in the document
+        """
+        self.resize(max(self.size, doc_id + 1))
+        byte, bit = divmod(doc_id, 8)
+        for skill in skills:
+            bits = self._postings.get(skill)
+            if bits is None:
+                bits = self._postings[skill] = np.zeros(self._capacity, dtype=np.uint8)
+            bits[byte] |= np.uint8(1 << bit)
+
+    def resize(self, size: int) -> None:
+        """Extend the id range to ``size`` documents (documents without skills included)."""
+        needed = (size + 7) // 8
+        if needed > self._capacity:
+            capacity = max(needed, 2 * self._capacity, 64)
+            for skill, bits in self._postings.items():
+                grown = np.zeros(capacity, dtype=np.uint8)
+                grown[:len(bits)] = bits
+                self._postings[skill] = grown
+            self._capacity = capacity
+        self.size = max(self.size, size)
+
+    def match(self, query: SkillQuery) -> np.ndarray:
+        """
+        Evaluate a skill filter.
+
+        Args:
+            query: Parsed skill filter
+
+        Returns:
+            Ascending ids of the documents that satisfy it
+        """
+        bits = self._evaluate(query.root)
+        return np.flatnonzero(np.unpackbits(bits, count=self.size, bitorder='little'))
+
+    def _evaluate(self, node: QueryNode) -> np.ndarray:
+        kind, value = node
+        if kind == 'skill':
+            bits = self._postings.get(value)
+            return bits.copy() if bits is not None else np.zeros(self._capacity, dtype=np.uint8)
+        if kind == 'not':
+            # Bits past size are never unpacked, so inverting them is harmless
+            return np.invert(self._evaluate(value))
+        operands = [self._evaluate(operand) for operand in value]
+        combine = np.bitwise_and if kind == 'and' else np.bitwise_or
+        result = operands[0]
+        for operand in operands[1:]:
+            combine(result, operand, out=result)
+        return result
@@ -0,0 +1,82 @@
+import os
+import json
+import logging
+from typing import Dict, List, Set, Optional
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'skill_taxonomy.json')
+
+class SkillTaxonomy:
+    """
+    Skill vocabulary compiled into spaCy phrase matchers.
+
+    The taxonomy file maps categories to canonical skill names, each with a list of
+    aliases (e.g. 'postgres' -> 'postgresql'). Matching is done on token boundaries in
+    a single pass over a document, so 'go' no longer matches inside 'good' and 'sql'
+    no longer matches inside 'mysql'. Skills listed under ``case_sensitive`` are
+    ordinary English words and only match when capitalized ('Go', 'GO'); their
+    aliases still match in any case.
+    """
+
+    def __init__(self, nlp, path: Optional[str] = None):
+        """
+        Load a taxonomy and compile it against a spaCy pipeline's vocabulary.
+
+        Args:
+            nlp: spaCy Language object whose tokenizer the documents will use
+            path: Path to the taxonomy JSON file (bundled taxonomy if None)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = path or DEFAULT_TAXONOMY_PATH
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.categories: Dict[str, List[str]] = {}
+        self.aliases: Dict[str, str] = {}
+        self.skills: Set[str] = set()
+        case_sensitive = set(data.get('case_sensitive', []))
+
+        self._matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        self._case_matcher = PhraseMatcher(nlp.vocab, attr='ORTH')
+        for category, skills in data.get('categories', {}).items():
+            self.categories[category] = list(skills)
+            for canonical, aliases in skills.items():
+                canonical = canonical.lower()
+                self.skills.add(canonical)
+                if canonical in case_sensitive:
+                    self._case_matcher.add(canonical, [
+                        nlp.make_doc(form) for form in {canonical.title(), canonical.upper()}
+                    ])
+                    names = list(aliases)
+                else:
+                    names = [canonical] + list(aliases)
+                for name in names:
+                    self.aliases[name.lower()] = canonical
+                if names:
+                    self._matcher.add(canonical, [nlp.make_doc(name) for name in names])
+
+        self.logger.info(f"Compiled skill taxonomy with {len(self)} skills from {self.path}")
+
+    def __len__(self) -> int:
+        return sum(len(skills) for skills in self.categories.values())
+
+    def match(self, doc: Doc) -> Set[str]:
+        """
+        Find canonical skills mentioned in a document.
+
+        Args:
+            doc: Tokenized spaCy document
+
+        Returns:
+            Set of canonical skill names
+        """
+        vocab_strings = doc.vocab.strings
+        skills = {vocab_strings[match_id] for match_id, _, _ in self._matcher(doc)}
+        skills.update(vocab_strings[match_id] for match_id, _, _ in self._case_matcher(doc))
+        return skills
+
+    def normalize(self, skill: str) -> str:
+        """Map an alias to its canonical skill name (unknown skills are returned lowercased)."""
+        skill = skill.lower().strip()
+        return self.aliases.get(skill, skill)
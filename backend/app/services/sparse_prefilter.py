@@ -0,0 +1,133 @@
+import math
+import logging
+from enum import Enum
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from nltk.stem import PorterStemmer
+
+try:
+    import joblib
+except ImportError:  # Only needed for the shipped TF-IDF vectorizer
+    joblib = None
+
+
+class PrefilterMethod(Enum):
+    BM25 = "bm25"
+    TFIDF = "tfidf"
+
+
+@dataclass
+class CascadeConfig:
+    method: PrefilterMethod = PrefilterMethod.BM25
+    keep_fraction: float = 0.2  # Share of the candidates passed on to dense ranking
+    min_candidates: int = 50  # Batches this small are not filtered at all
+    vectorizer_path: Optional[str] = None  # Fitted TfidfVectorizer for PrefilterMethod.TFIDF
+
+
+class SparsePrefilter:
+    """
+    Cheap lexical first stage of the retrieval cascade.
+
+    Scores every candidate against the query with one sparse matrix product and
+    keeps the best ``keep_fraction`` of them for dense reranking. BM25 weights are
+    computed over the candidate set itself, so no fitted model is needed. TFIDF uses
+    the vectorizer shipped in backend/models, which was fitted on Porter-stemmed
+    text, so tokens are stemmed before it is applied; terms outside its vocabulary
+    do not contribute to the score.
+    """
+
+    # BM25 term-frequency saturation and length normalization
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, config: CascadeConfig):
+        """
+        Initialize the prefilter.
+
+        Args:
+            config: Cascade settings
+        """
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.vectorizer = None
+        if config.method == PrefilterMethod.TFIDF:
+            if joblib is None:
+                raise ImportError("joblib (installed with scikit-learn) is required for the TF-IDF prefilter")
+            if not config.vectorizer_path:
+                raise ValueError("vectorizer_path is required for the TF-IDF prefilter")
+            self.vectorizer = joblib.load(config.vectorizer_path)
+            self._stem = lru_cache(maxsize=65536)(PorterStemmer().stem)
+            self.logger.info(
+                f"Loaded TF-IDF prefilter with {len(self.vectorizer.vocabulary_)} terms from {config.vectorizer_path}"
+            )
+
+    def select(self, query: str, documents: List[str]) -> np.ndarray:
+        """
+        Pick the candidates to rerank.
+
+        Args:
+            query: Preprocessed query (job description) text
+            documents: Preprocessed candidate texts
+
+        Returns:
+            Indices of the kept documents, in ascending order
+        """
+        keep = max(self.config.min_candidates, math.ceil(self.config.keep_fraction * len(documents)))
+        if keep >= len(documents):
+            return np.arange(len(documents))
+        scores = self.scores(query, documents)
+        return np.sort(np.argpartition(-scores, keep - 1)[:keep])
+
+    def scores(self, query: str, documents: List[str]) -> np.ndarray:
+        """
+        Score candidates against the query.
+
+        Args:
+            query: Preprocessed query text
+            documents: Preprocessed candidate texts
+
+        Returns:
+            Array of shape [len(documents)] with higher values for better matches
+        """
+        if self.vectorizer is not None:
+            matrix = self.vectorizer.transform([self._stem_text(text) for text in documents])
+            query_vector = self.vectorizer.transform([self._stem_text(query)])
+            return np.asarray((matrix @ query_vector.T).todense()).ravel()
+        return self._bm25_scores(query, documents)
+
+    def _stem_text(self, text: str) -> str:
+        return ' '.join(self._stem(token) for token in text.split())
+
+    def _bm25_scores(self, query: str, documents: List[str]) -> np.ndarray:
+        vocabulary: Dict[str, int] = {}
+        rows, columns = [], []
+        for i, text in enumerate(documents):
+            for token in text.split():
+                columns.append(vocabulary.setdefault(token, len(vocabulary)))
+                rows.append(i)
+        query_terms = [vocabulary[token] for token in set(query.split()) if token in vocabulary]
+        if not query_terms:
+            return np.zeros(len(documents), dtype=np.float32)
+
+        # Term frequencies (duplicate entries are summed), document lengths and document frequencies
+        tf = sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.float32), (rows, columns)),
+            shape=(len(documents), len(vocabulary))
+        )
+        lengths = np.bincount(rows, minlength=len(documents)).astype(np.float32)
+        df = np.bincount(tf.indices, minlength=len(vocabulary))
+        idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # Saturate each nonzero term frequency in place
+        norms = self.K1 * (1 - self.B + self.B * lengths / max(lengths.mean(), 1.0))
+        tf.data = tf.data * (self.K1 + 1) / (tf.data + np.repeat(norms, np.diff(tf.indptr)))
+
+        query_vector = sparse.csr_matrix(
+            (idf[query_terms], (query_terms, np.zeros(len(query_terms), dtype=np.int64))),
+            shape=(len(vocabulary), 1)
+        )
+        return np.asarray((tf @ query_vector).todense()).ravel()
@@ -0,0 +1,79 @@
+"""
+Recall-vs-latency report for cascade ranking (sparse prefilter + dense reranking).
+
+Each corpus is ranked against the sample JD, once with every resume embedded
+('dense') and once per prefilter method and keep fraction. The timing covers
+prefiltering, embedding the kept resumes and ranking them. Accuracy is measured
+against the dense ranking:
+    recall_at_k      share of the dense top-k that the cascade also returns in its top-k
+    kept_fraction    share of the resumes that were embedded
+"""
+import os
+from typing import List
+
+import pytest
+
+from app.services.similarity_engine import SimilarityConfig
+from app.services.sparse_prefilter import CascadeConfig, PrefilterMethod, SparsePrefilter
+
+TOP_K = 10
+CONFIG = SimilarityConfig(top_k=TOP_K, threshold=-1.0)
+KEEP_FRACTIONS = (0.05, 0.1, 0.2, 0.5)
+VECTORIZER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'tfidf_vectorizer.pkl'
+)
+CONFIGURATIONS = [pytest.param('dense', None, id='dense')] + [
+    pytest.param(method.value, fraction, id=f"{method.value}-{fraction:.0%}")
+    for method in PrefilterMethod for fraction in KEEP_FRACTIONS
+]
+
+
+@pytest.fixture(scope='module')
+def jd_processed(preprocessor, job_description) -> str:
+    return preprocessor.preprocess_text(job_description)
+
+
+@pytest.fixture(scope='module')
+def dense_top_k(engine, jd_processed, corpora):
+    """Resume indices of the dense top-k per corpus."""
+    cache = {}
+
+    def get(corpus) -> set:
+        if corpus not in cache:
+            jd_embedding = engine.encode([jd_processed])[0]
+            matches = engine.rank_embeddings(jd_embedding, corpora(corpus, 'embeddings'), CONFIG)
+            cache[corpus] = {match['index'] for match in matches}
+        return cache[corpus]
+
+    return get
+
+
+def cascade_rank(engine, prefilter, jd_processed: str, processed: List[str]) -> List[int]:
+    """Prefilter, embed the kept resumes and rank them; returns the top-k resume indices."""
+    candidates = prefilter.select(jd_processed, processed).tolist() if prefilter is not None else list(range(len(processed)))
+    jd_embedding, embeddings = engine.encode_documents(jd_processed, [processed[i] for i in candidates])
+    return [int(candidates[match['index']]) for match in engine.rank_embeddings(jd_embedding, embeddings, CONFIG)]
+
+
+@pytest.mark.parametrize('method, keep_fraction', CONFIGURATIONS)
+def bench_cascade(benchmark, engine, jd_processed, dense_top_k, corpora, corpus, method, keep_fraction):
+    processed = corpora(corpus, 'processed')
+    prefilter = None
+    if method != 'dense':
+        try:
+            prefilter = SparsePrefilter(CascadeConfig(
+                method=PrefilterMethod(method), keep_fraction=keep_fraction,
+                min_candidates=TOP_K, vectorizer_path=VECTORIZER_PATH
+            ))
+        except (ImportError, OSError, ValueError) as e:
+            pytest.skip(f"{method} prefilter unavailable: {e}")
+
+    top_k = benchmark(lambda: cascade_rank(engine, prefilter, jd_processed, processed), documents=len(processed))
+
+    reference = dense_top_k(corpus)
+    kept = len(prefilter.select(jd_processed, processed)) if prefilter is not None else len(processed)
+    benchmark.record(
+        recall_at_k=len(set(top_k) & reference) / max(len(reference), 1),
+        kept_fraction=kept / len(processed)
+    )
+    assert len(top_k) <= TOP_K
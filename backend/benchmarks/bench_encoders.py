@@ -0,0 +1,81 @@
+"""
+Accuracy-vs-latency report for the SimilarityEngine encoder backends.
+
+Each backend encodes the preprocessed corpus. Accuracy is measured against the
+PyTorch embeddings:
+    vector_cosine_mean/min   cosine between a document's embedding and its PyTorch one
+    max_similarity_delta     largest change of any document-pair similarity score
+    top1_agreement           share of documents whose most similar other document is unchanged
+
+ONNX exports are written to a temporary directory (BENCHMARK_EXPORT_DIR to reuse one).
+"""
+import os
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pytest
+
+from app.services.encoders import EncoderBackend, SentenceEncoder, create_encoder
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+
+def nearest_neighbours(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    similarities = embeddings @ embeddings.T
+    masked = similarities.copy()
+    np.fill_diagonal(masked, -np.inf)
+    return similarities, np.argmax(masked, axis=1)
+
+
+@pytest.fixture(scope='module')
+def encoders(tmp_path_factory) -> Callable[[EncoderBackend], SentenceEncoder]:
+    """Lazily built encoder per backend; backends whose runtime is missing are skipped."""
+    export_dir = os.environ.get('BENCHMARK_EXPORT_DIR') or str(tmp_path_factory.mktemp('onnx'))
+    built: Dict[EncoderBackend, SentenceEncoder] = {}
+
+    def get(backend: EncoderBackend) -> SentenceEncoder:
+        if backend not in built:
+            try:
+                built[backend] = create_encoder(backend, MODEL_NAME, export_dir=export_dir)
+            except ImportError as e:
+                pytest.skip(f"{backend.value} backend unavailable: {e}")
+        return built[backend]
+
+    return get
+
+
+@pytest.fixture(scope='module')
+def reference_embeddings(encoders, corpora) -> Callable:
+    """Unit PyTorch embeddings per corpus."""
+    cache = {}
+
+    def get(corpus) -> np.ndarray:
+        if corpus not in cache:
+            cache[corpus] = normalize(encoders(EncoderBackend.TORCH).encode(corpora(corpus, 'processed')))
+        return cache[corpus]
+
+    return get
+
+
+@pytest.mark.parametrize('backend', list(EncoderBackend), ids=lambda backend: backend.value)
+def bench_encoder(benchmark, encoders, reference_embeddings, corpora, corpus, backend):
+    processed = corpora(corpus, 'processed')
+    encoder = encoders(backend)
+    embeddings = normalize(benchmark(lambda: encoder.encode(processed), documents=len(processed)))
+
+    reference = reference_embeddings(corpus)
+    similarities, neighbours = nearest_neighbours(embeddings)
+    reference_similarities, reference_neighbours = nearest_neighbours(reference)
+    vector_cosine = np.sum(embeddings * reference, axis=1)
+    off_diagonal = ~np.eye(len(processed), dtype=bool)
+    benchmark.record(
+        vector_cosine_mean=vector_cosine.mean(),
+        vector_cosine_min=vector_cosine.min(),
+        max_similarity_delta=np.max(np.abs(similarities - reference_similarities)[off_diagonal]) if len(processed) > 1 else 0.0,
+        top1_agreement=np.mean(neighbours == reference_neighbours)
+    )
+    assert embeddings.shape == reference.shape
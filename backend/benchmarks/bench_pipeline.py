@@ -0,0 +1,47 @@
+"""
+Per-stage benchmarks of the matching pipeline, run offline against the services.
+
+Every stage runs on the sample resumes in docs/Sample resume and JD and on
+synthetic corpora of 10, 100 and 1000 resumes (see --benchmark-sizes and
+sample_documents.py); the parse stage cycles through the sample files. The job
+description is the sample JD. Caches are disabled so every round does the full
+work.
+"""
+from app.services.similarity_engine import SimilarityConfig, SimilarityMetric
+
+
+def bench_parse(benchmark, parser, samples, corpus):
+    uploads = list(samples.values())
+    if corpus != 'samples':
+        uploads = [uploads[i % len(uploads)] for i in range(corpus)]
+    texts = benchmark(lambda: parser.parse_documents(uploads), documents=len(uploads))
+    assert sum(text is not None for text in texts) > 0
+
+
+def bench_preprocess(benchmark, preprocessor, corpora, corpus):
+    texts = corpora(corpus, 'texts')
+    processed = benchmark(
+        lambda: preprocessor.preprocess_batch({f"resume_{i}": text for i, text in enumerate(texts)}),
+        documents=len(texts)
+    )
+    assert len(processed) == len(texts)
+
+
+def bench_embed(benchmark, engine, corpora, corpus):
+    processed = corpora(corpus, 'processed')
+    embeddings = benchmark(lambda: engine.encode(processed), documents=len(processed))
+    assert embeddings.shape == (len(processed), engine.get_embedding_dimension())
+
+
+def bench_rank(benchmark, engine, preprocessor, job_description, corpora, corpus):
+    embeddings = corpora(corpus, 'embeddings')
+    jd_embedding = engine.encode([preprocessor.preprocess_text(job_description)])[0]
+    config = SimilarityConfig(metric=SimilarityMetric.COSINE, top_k=10)
+    matches = benchmark(lambda: engine.rank_embeddings(jd_embedding, embeddings, config), documents=len(embeddings))
+    assert len(matches) <= min(10, len(embeddings))
+
+
+def bench_skills(benchmark, skill_extractor, job_description, corpora, corpus):
+    texts = corpora(corpus, 'texts')
+    results = benchmark(lambda: skill_extractor.get_skill_matches(job_description, texts), documents=len(texts))
+    assert len(results) == len(texts)
@@ -0,0 +1,64 @@
+"""
+Throughput-vs-accuracy report for the TextPreprocessor modes.
+
+Each mode preprocesses the corpus one document at a time in this process, so the
+timings compare the per-document cost of the modes (after a warm-up pass that
+fills the lemma cache). Accuracy is measured against the ACCURATE mode:
+    token_overlap    Jaccard overlap of the output vocabulary with ACCURATE's
+"""
+from typing import Callable, Dict, List, Set
+
+import pytest
+
+from app.services.batch_processor import TextPreprocessor, PreprocessingMode
+
+MODES = {
+    'accurate': dict(mode=PreprocessingMode.ACCURATE),
+    'fast_pos': dict(mode=PreprocessingMode.FAST, pos_tagging=True),
+    'fast': dict(mode=PreprocessingMode.FAST),
+}
+
+
+def vocabulary(outputs: List[str]) -> Set[str]:
+    return set(' '.join(outputs).split())
+
+
+@pytest.fixture(scope='module')
+def preprocessors() -> Callable[[str], TextPreprocessor]:
+    """Lazily built in-process preprocessor per mode."""
+    built: Dict[str, TextPreprocessor] = {}
+
+    def get(mode: str) -> TextPreprocessor:
+        if mode not in built:
+            built[mode] = TextPreprocessor(**MODES[mode])
+        return built[mode]
+
+    yield get
+    for preprocessor in built.values():
+        preprocessor.shutdown()
+
+
+@pytest.fixture(scope='module')
+def reference_vocabulary(preprocessors, corpora) -> Callable:
+    """Output vocabulary of the ACCURATE mode per corpus."""
+    cache = {}
+
+    def get(corpus) -> Set[str]:
+        if corpus not in cache:
+            accurate = preprocessors('accurate')
+            cache[corpus] = vocabulary([accurate.preprocess_text(text) for text in corpora(corpus, 'texts')])
+        return cache[corpus]
+
+    return get
+
+
+@pytest.mark.parametrize('mode', list(MODES))
+def bench_preprocess_mode(benchmark, preprocessors, reference_vocabulary, corpora, corpus, mode):
+    texts = corpora(corpus, 'texts')
+    preprocessor = preprocessors(mode)
+    outputs = benchmark(lambda: [preprocessor.preprocess_text(text) for text in texts], documents=len(texts))
+
+    tokens, reference = vocabulary(outputs), reference_vocabulary(corpus)
+    union = tokens | reference
+    benchmark.record(token_overlap=len(tokens & reference) / len(union) if union else 1.0)
+    assert len(outputs) == len(texts)
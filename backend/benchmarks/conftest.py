@@ -0,0 +1,327 @@
+"""
+Fixtures and reporting for the offline pipeline benchmarks.
+
+Each benchmark times a pipeline stage over a corpus and records its latency
+(min/median/mean over rounds), throughput in documents per second and the peak
+resident memory of the benchmark process while the stage ran. Benchmarks that
+trade accuracy for speed also record accuracy metrics against the reference
+configuration. Results are written to a JSON file and compared against a saved
+baseline at the end of the session.
+
+Usage (from the backend directory):
+    python -m pytest benchmarks                                # run and compare with the baseline
+    python -m pytest benchmarks --benchmark-save               # store this run as the baseline
+    python -m pytest benchmarks --benchmark-sizes 10,100 -k embed
+"""
+import os
+import sys
+import json
+import time
+import platform
+import threading
+import statistics
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import pytest
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.services.model_registry import current_rss_bytes
+from app.services.file_handler import UploadedDocument
+from app.services.parser import DocumentParser
+from app.services.batch_processor import TextPreprocessor
+from app.services.similarity_engine import SimilarityEngine
+from app.services.skill_extractor import SkillExtractor
+from sample_documents import DOCS_DIR, is_job_description, load_samples, synthetic_resumes
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS_PATH = os.path.join(BENCHMARKS_DIR, 'results', 'latest.json')
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baselines', 'baseline.json')
+
+Corpus = Union[str, int]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'RezScan pipeline benchmarks')
+    group.addoption('--benchmark-sizes', default='10,100,1000',
+                    help='Comma-separated synthetic corpus sizes (the sample documents always run)')
+    group.addoption('--benchmark-rounds', type=int, default=3, help='Timed rounds per benchmark')
+    group.addoption('--benchmark-json', default=DEFAULT_RESULTS_PATH, help='Where to write this run')
+    group.addoption('--benchmark-baseline', default=DEFAULT_BASELINE_PATH, help='Baseline to compare against')
+    group.addoption('--benchmark-save', action='store_true', help='Store this run as the baseline')
+    group.addoption('--benchmark-max-regression', type=float, default=0.25,
+                    help='Median slowdown against the baseline reported as a regression (0.25 = 25%%)')
+    group.addoption('--benchmark-fail-on-regression', action='store_true',
+                    help='Exit non-zero when any benchmark regresses')
+
+
+def pytest_generate_tests(metafunc):
+    if 'corpus' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('--benchmark-sizes').split(',') if size.strip()]
+        metafunc.parametrize('corpus', ['samples'] + sizes, ids=str)
+
+
+class RssSampler:
+    """Samples this process's RSS on a background thread to find the peak during a block."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'RssSampler':
+        self.start_bytes = self.peak_bytes = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+
+class BenchmarkSession:
+    """Collects benchmark results and compares them with the baseline."""
+
+    def __init__(self, config):
+        self.config = config
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.comparisons: List[Dict[str, Any]] = []
+        self.regressions: List[str] = []
+        self.missing: List[str] = []
+
+    def run(self, name: str, func: Callable[[], Any], documents: int, rounds: Optional[int] = None) -> Any:
+        """
+        Time func over several rounds after one untimed warm-up call.
+
+        Args:
+            name: Result key
+            func: Stage call to time
+            documents: Documents handled per call, for throughput
+            rounds: Timed rounds (defaults to --benchmark-rounds)
+
+        Returns:
+            The warm-up call's return value
+        """
+        rounds = rounds or self.config.getoption('--benchmark-rounds')
+        value = func()
+        timings = []
+        with RssSampler() as rss:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+
+        median = statistics.median(timings)
+        self.results[name] = {
+            'documents': documents,
+            'rounds': rounds,
+            'min_seconds': round(min(timings), 6),
+            'median_seconds': round(median, 6),
+            'mean_seconds': round(statistics.mean(timings), 6),
+            'docs_per_second': round(documents / median, 2) if median > 0 else None,
+            'peak_rss_mb': round(rss.peak_bytes / (1024 * 1024), 1),
+            'rss_growth_mb': round((rss.peak_bytes - rss.start_bytes) / (1024 * 1024), 1)
+        }
+        return value
+
+    def record(self, name: str, metrics: Dict[str, float]) -> None:
+        """Attach accuracy metrics to a timed result."""
+        self.results[name].setdefault('metrics', {}).update(
+            {key: round(float(value), 4) for key, value in metrics.items()}
+        )
+
+    def compare(self) -> None:
+        """Compare medians and peak RSS with the baseline; results it has no entry for are listed in missing."""
+        path = self.config.getoption('--benchmark-baseline')
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            baseline = json.load(f).get('results', {})
+        threshold = self.config.getoption('--benchmark-max-regression')
+        for name, result in sorted(self.results.items()):
+            if name not in baseline or not baseline[name]['median_seconds']:
+                self.missing.append(name)
+                continue
+            change = result['median_seconds'] / baseline[name]['median_seconds'] - 1
+            self.comparisons.append({
+                'name': name,
+                'baseline_ms': baseline[name]['median_seconds'] * 1000,
+                'current_ms': result['median_seconds'] * 1000,
+                'change': change,
+                'baseline_rss_mb': baseline[name].get('peak_rss_mb'),
+                'current_rss_mb': result['peak_rss_mb']
+            })
+            if change > threshold:
+                self.regressions.append(name)
+
+    def save(self) -> None:
+        document = {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'machine': {
+                'platform': platform.platform(),
+                'python': platform.python_version(),
+                'cpu_count': os.cpu_count()
+            },
+            'results': self.results
+        }
+        paths = [self.config.getoption('--benchmark-json')]
+        if self.config.getoption('--benchmark-save'):
+            paths.append(self.config.getoption('--benchmark-baseline'))
+        for path in paths:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(document, f, indent=2, sort_keys=True)
+
+
+def pytest_configure(config):
+    config._benchmark_session = BenchmarkSession(config)
+
+
+class Benchmark:
+    """
+    The benchmark fixture: benchmark(func, documents=n) times a stage call under the
+    test id, and benchmark.record(metric=value, ...) then adds accuracy metrics.
+    """
+
+    def __init__(self, session: BenchmarkSession, name: str):
+        self.session = session
+        self.name = name
+
+    def __call__(self, func: Callable[[], Any], documents: int, rounds: Optional[int] = None) -> Any:
+        return self.session.run(self.name, func, documents, rounds)
+
+    def record(self, **metrics: float) -> None:
+        self.session.record(self.name, metrics)
+
+
+@pytest.fixture
+def benchmark(request) -> Benchmark:
+    return Benchmark(request.config._benchmark_session, request.node.name.replace('bench_', '', 1))
+
+
+@pytest.fixture(scope='session')
+def parser():
+    parser = DocumentParser()
+    yield parser
+    parser.shutdown()
+
+
+@pytest.fixture(scope='session')
+def preprocessor():
+    preprocessor = TextPreprocessor(workers=os.cpu_count() or 1)
+    yield preprocessor
+    preprocessor.shutdown()
+
+
+@pytest.fixture(scope='session')
+def engine():
+    return SimilarityEngine(cache_dir=None)
+
+
+@pytest.fixture(scope='session')
+def skill_extractor():
+    return SkillExtractor()
+
+
+@pytest.fixture(scope='session')
+def samples() -> Dict[str, UploadedDocument]:
+    documents = load_samples()
+    if not documents:
+        pytest.skip(f"No sample documents in {DOCS_DIR}")
+    return documents
+
+
+@pytest.fixture(scope='session')
+def sample_texts(parser, samples) -> Dict[str, str]:
+    texts = parser.parse_documents(list(samples.values()))
+    return {name: text for name, text in zip(samples, texts) if text}
+
+
+@pytest.fixture(scope='session')
+def job_description(sample_texts) -> str:
+    return next(text for name, text in sample_texts.items() if is_job_description(name))
+
+
+@pytest.fixture(scope='session')
+def corpora(request, sample_texts):
+    """
+    Lazily built resume texts, preprocessed texts and embeddings per corpus. The
+    preprocessor and engine are only loaded once a benchmark needs their output.
+    """
+    resumes = [text for name, text in sample_texts.items() if not is_job_description(name)]
+    cache = {}
+
+    def get(corpus: Corpus, kind: str):
+        if (corpus, kind) not in cache:
+            if kind == 'texts':
+                value = resumes if corpus == 'samples' else synthetic_resumes(resumes, corpus, seed=corpus)
+            elif kind == 'processed':
+                preprocessor = request.getfixturevalue('preprocessor')
+                value = list(preprocessor.preprocess_batch({
+                    f"resume_{i}": text for i, text in enumerate(get(corpus, 'texts'))
+                }).values())
+            else:
+                value = request.getfixturevalue('engine').encode(get(corpus, 'processed'))
+            cache[(corpus, kind)] = value
+        return cache[(corpus, kind)]
+
+    return get
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session, exitstatus):
+    benchmarks = session.config._benchmark_session
+    if not benchmarks.results:
+        return
+    benchmarks.compare()
+    benchmarks.save()
+    if benchmarks.regressions and session.config.getoption('--benchmark-fail-on-regression'):
+        session.exitstatus = 1
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    benchmarks = config._benchmark_session
+    if not benchmarks.results:
+        return
+    write = terminalreporter.write_line
+    terminalreporter.section('benchmark results')
+    write(f"{'benchmark':<28}{'docs':>7}{'median ms':>12}{'docs/sec':>11}{'peak RSS MB':>13}")
+    for name, result in sorted(benchmarks.results.items()):
+        write(
+            f"{name:<28}{result['documents']:>7}{result['median_seconds'] * 1000:>12.1f}"
+            f"{result['docs_per_second'] or 0:>11.1f}{result['peak_rss_mb']:>13.1f}"
+        )
+
+    measured = {name: result['metrics'] for name, result in sorted(benchmarks.results.items()) if 'metrics' in result}
+    if measured:
+        terminalreporter.section('accuracy')
+        for name, metrics in measured.items():
+            write(f"{name:<28}" + '  '.join(f"{key} {value:.4f}" for key, value in metrics.items()))
+    write(f"Results written to {config.getoption('--benchmark-json')}")
+
+    if benchmarks.comparisons or benchmarks.missing:
+        terminalreporter.section('comparison with baseline')
+        write(f"{'benchmark':<28}{'baseline ms':>13}{'current ms':>12}{'change':>9}{'baseline RSS':>14}{'current RSS':>13}")
+        for comparison in benchmarks.comparisons:
+            flag = '  REGRESSION' if comparison['name'] in benchmarks.regressions else ''
+            baseline_rss = comparison['baseline_rss_mb']
+            write(
+                f"{comparison['name']:<28}{comparison['baseline_ms']:>13.1f}"
+                f"{comparison['current_ms']:>12.1f}{comparison['change']:>+9.1%}"
+                f"{baseline_rss if baseline_rss is not None else '-':>14}{comparison['current_rss_mb']:>13.1f}{flag}"
+            )
+        for name in benchmarks.missing:
+            write(f"{name:<28}{'no baseline':>13}")
+    elif not config.getoption('--benchmark-save'):
+        write(f"No baseline at {config.getoption('--benchmark-baseline')}; store one with --benchmark-save")
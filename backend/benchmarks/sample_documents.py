@@ -0,0 +1,47 @@
+"""
+Sample documents and synthetic corpora shared by the benchmarks.
+
+Benchmarks run on the sample resumes and JD in docs/Sample resume and JD
+(override with BENCHMARK_DOCS_DIR) and on synthetic resumes that are seeded mixes
+of sentences from the sample resumes, so their length and vocabulary match real
+uploads.
+"""
+import os
+import re
+import random
+from typing import Dict, List
+
+from app.services.file_handler import UploadedDocument
+
+DOCS_DIR = os.environ.get(
+    'BENCHMARK_DOCS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'docs', 'Sample resume and JD')
+)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?•])\s+')
+
+
+def load_samples(docs_dir: str = DOCS_DIR) -> Dict[str, UploadedDocument]:
+    """Read the PDF and DOCX samples into memory, keyed by file name."""
+    documents = {}
+    for name in sorted(os.listdir(docs_dir)):
+        extension = os.path.splitext(name)[1].lower()
+        if extension in ('.pdf', '.docx'):
+            with open(os.path.join(docs_dir, name), 'rb') as f:
+                documents[name] = UploadedDocument(name, extension, data=f.read())
+    return documents
+
+
+def is_job_description(name: str) -> bool:
+    """Whether a sample file is the job description rather than a resume."""
+    return 'JD' in name
+
+
+def synthetic_resumes(resumes: List[str], count: int, seed: int = 0) -> List[str]:
+    """Build count resumes from random sentences of the sample resumes."""
+    sentences = [s for text in resumes for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+    per_resume = max(1, len(sentences) // len(resumes))
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.sample(sentences, min(len(sentences), rng.randint(per_resume // 2, per_resume * 3 // 2 + 1))))
+        for _ in range(count)
+    ]
@@ -0,0 +1,32 @@
+"""
+Gunicorn settings for the RezScan API.
+
+The app is imported once in the master (preload_app), which loads every model in
+the registry. Workers are forked afterwards and share the model weights
+copy-on-write. Each worker then runs a short warm-up to set up its own inference
+thread pools, which must not be created before the fork.
+
+Workers are threaded (gthread): each serves up to ``threads`` requests at once, so
+the inference scheduler can coalesce the encode calls of concurrent requests. A
+sync worker handles one request at a time and never gives it anything to batch.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('MODEL_PRELOAD', 'true').lower() == 'true'
+
+
+def pre_fork(server, worker):
+    # Preloaded objects live for the whole process; freezing them keeps the garbage
+    # collector from writing to (and so un-sharing) their memory pages in workers
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from api.main import models
+    models.warm_up()
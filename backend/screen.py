@@ -0,0 +1,111 @@
+"""
+Offline bulk screening: rank directories of resumes against one or more job descriptions.
+
+Reads PDF and DOCX files straight from disk (no upload size limit), parses and
+preprocesses them on all cores, embeds them in batches and writes the top matches
+of every JD to CSV or JSON Lines. Progress is checkpointed after each batch; rerun
+the same command to resume an interrupted run.
+
+Usage (from the backend directory):
+    python screen.py --jd jds/ --resumes resumes/ --output rankings.csv [--top-k 10]
+"""
+import os
+import sys
+import logging
+import argparse
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_dir)
+
+from app.services.parser import DocumentParser
+from app.services.parse_cache import ParseCache
+from app.services.batch_processor import TextPreprocessor, PreprocessingMode
+from app.services.similarity_engine import SimilarityEngine, SimilarityMetric
+from app.services.encoders import EncoderBackend
+from app.services.skill_extractor import SkillExtractor
+from app.services.bulk_screener import BulkScreener, ScreeningConfig, ScreeningError, find_documents, write_rows
+
+DEFAULT_CACHE_FOLDER = os.environ.get('CACHE_FOLDER', os.path.join(backend_dir, 'cache'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jd', nargs='+', required=True, help='Job description files or directories')
+    parser.add_argument('--resumes', nargs='+', required=True, help='Resume files or directories (searched recursively)')
+    parser.add_argument('--output', required=True, help='Rankings file (.csv or .jsonl)')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='Output format (default: from the output extension)')
+    parser.add_argument('--top-k', type=int, default=10, help='Matches per job description (0 keeps all)')
+    parser.add_argument('--threshold', type=float, default=0.0, help='Minimum similarity score')
+    parser.add_argument('--metric', choices=[metric.value for metric in SimilarityMetric], default='cosine')
+    parser.add_argument('--batch-size', type=int, default=256, help='Resumes per batch and checkpoint')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parse and preprocessing processes')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint.json)')
+    parser.add_argument('--cache-folder', default=DEFAULT_CACHE_FOLDER,
+                        help='Parse and embedding caches shared with the API (empty to disable)')
+    parser.add_argument('--cache-size', type=int, default=int(os.environ.get('EMBEDDING_CACHE_SIZE', 50000)),
+                        help='Embedding cache entries; must match the API (default: EMBEDDING_CACHE_SIZE, 0 to disable)')
+    parser.add_argument('--encoder-backend', default=os.environ.get('ENCODER_BACKEND', 'torch'),
+                        choices=[backend.value for backend in EncoderBackend])
+    parser.add_argument('--preprocessing-mode', default=os.environ.get('PREPROCESSING_MODE', 'accurate'),
+                        choices=[mode.value for mode in PreprocessingMode])
+    parser.add_argument('--no-skills', action='store_true', help='Skip skill matching of the final matches')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    logger = logging.getLogger('screen')
+
+    try:
+        jd_paths = find_documents(args.jd)
+        resume_paths = find_documents(args.resumes)
+    except ScreeningError as e:
+        parser.error(str(e))
+    if not jd_paths or not resume_paths:
+        parser.error("No PDF or DOCX job descriptions or resumes found")
+    logger.info(f"Screening {len(resume_paths)} resumes against {len(jd_paths)} job descriptions")
+
+    cache_folder = args.cache_folder
+    document_parser = DocumentParser(
+        cache=ParseCache(db_path=os.path.join(cache_folder, 'parsed.sqlite3')) if cache_folder else None,
+        workers=args.workers
+    )
+    text_preprocessor = TextPreprocessor(mode=PreprocessingMode(args.preprocessing_mode), workers=args.workers)
+    similarity_engine = SimilarityEngine(
+        cache_dir=os.path.join(cache_folder, 'embeddings') if cache_folder and args.cache_size > 0 else None,
+        cache_max_entries=args.cache_size,
+        backend=EncoderBackend(args.encoder_backend),
+        export_dir=os.path.join(cache_folder or os.path.join(backend_dir, 'cache'), 'onnx')
+    )
+    screener = BulkScreener(
+        document_parser,
+        text_preprocessor,
+        similarity_engine,
+        SkillExtractor() if not args.no_skills else None,
+        ScreeningConfig(
+            metric=SimilarityMetric(args.metric),
+            threshold=args.threshold,
+            top_k=args.top_k,
+            batch_size=args.batch_size,
+            skills=not args.no_skills
+        )
+    )
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.json"
+    try:
+        rows = screener.run(jd_paths, resume_paths, checkpoint_path)
+    except ScreeningError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.warning(f"Interrupted; rerun the same command to resume from {checkpoint_path}")
+        sys.exit(130)
+    finally:
+        document_parser.shutdown()
+        text_preprocessor.shutdown()
+
+    write_rows(rows, args.output, args.format)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logger.info(f"Wrote {len(rows)} rankings to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Shared fakes and fixtures for the backend unit tests.
+
+The sentence-transformer, NLTK data and spaCy pipeline are replaced by small
+deterministic fakes, so the unit tests run without any downloaded model.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+import os
+import re
+import sys
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.services import similarity_engine as similarity_engine_module
+from app.services.batch_processor import AnalyzedDocument
+from app.services.encoders import EncoderBackend, SentenceEncoder
+from app.services.file_handler import UploadedDocument
+
+WORD = re.compile(r'[a-z0-9+#]+')
+
+
+class FakeTokenizer:
+    """Word-piece stand-in: one id per four characters of a word (at least one)."""
+
+    model_input_names = ['input_ids', 'attention_mask']
+
+    def __call__(self, words: List[str], add_special_tokens: bool = True) -> Dict[str, List[List[int]]]:
+        return {'input_ids': [[1] * max(1, len(word) // 4) for word in words]}
+
+
+class FakeEncoder(SentenceEncoder):
+    """
+    Bag-of-words encoder: each word is hashed to a fixed random direction and a text
+    is the normalized sum of its words, so texts sharing words score higher.
+    """
+
+    DIMENSION = 32
+
+    def __init__(self, model_name: str = 'fake-model', backend: EncoderBackend = EncoderBackend.TORCH):
+        super().__init__(model_name, backend)
+        self.calls = 0
+        self.texts_encoded = 0
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        self.calls += 1
+        self.texts_encoded += len(texts)
+        vectors = np.zeros((len(texts), self.DIMENSION), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in WORD.findall(text.lower()):
+                vectors[row] += self._word_vector(word)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def get_dimension(self) -> int:
+        return self.DIMENSION
+
+    @property
+    def tokenizer(self) -> FakeTokenizer:
+        return FakeTokenizer()
+
+    @property
+    def max_seq_length(self) -> int:
+        return 64
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+        return np.random.default_rng(seed).standard_normal(self.DIMENSION).astype(np.float32)
+
+
+class FakePreprocessor:
+    """TextPreprocessor stand-in: lowercased words, with word-count statistics."""
+
+    def analyze_text(self, text: str) -> AnalyzedDocument:
+        words = WORD.findall(text.lower())
+        return AnalyzedDocument(
+            processed_text=' '.join(words),
+            statistics={'word_count': len(words), 'unique_words': len(set(words)), 'avg_word_length': 0, 'keyword_density': 0}
+        )
+
+    def preprocess_text(self, text: str) -> str:
+        return self.analyze_text(text).processed_text
+
+    def get_text_statistics(self, text: str) -> Dict[str, Any]:
+        return self.analyze_text(text).statistics
+
+    def analyze_batch(self, documents: Dict[str, str]) -> Dict[str, AnalyzedDocument]:
+        return {doc_id: self.analyze_text(text) for doc_id, text in documents.items()}
+
+
+class FakeParser:
+    """DocumentParser stand-in for UTF-8 text uploads; an empty upload fails to parse."""
+
+    def parse_source(self, source: UploadedDocument) -> Optional[str]:
+        text = source.data.decode('utf-8') if source.data is not None else ''
+        return text or None
+
+    def parse_documents(self, sources: List[UploadedDocument]) -> List[Optional[str]]:
+        return [self.parse_source(source) for source in sources]
+
+
+class FakeSkillExtractor:
+    """SkillExtractor stand-in: a skill is any word from a fixed vocabulary."""
+
+    SKILLS = {'java', 'python', 'spring', 'django', 'sql', 'docker', 'react', 'php'}
+
+    def extract_skills(self, text: str) -> List[str]:
+        return sorted(set(WORD.findall(text.lower())) & self.SKILLS)
+
+    def extract_taxonomy_skills_batch(self, texts: List[str]) -> List[List[str]]:
+        return [self.extract_skills(text) for text in texts]
+
+    def get_skill_matches(self, jd_text: str, resume_texts: List[str], jd_skills=None) -> List[Dict[str, Any]]:
+        required = set(jd_skills if jd_skills is not None else self.extract_skills(jd_text))
+        matches = []
+        for text in resume_texts:
+            found = set(self.extract_skills(text))
+            matches.append({
+                'matching_skills': sorted(required & found),
+                'missing_skills': sorted(required - found),
+                'match_percentage': len(required & found) / len(required) if required else 0.0
+            })
+        return matches
+
+
+def make_upload(name: str, text: str) -> UploadedDocument:
+    """A lazily read text upload, as FileHandler.read_files(..., lazy=True) returns."""
+    import io
+    return UploadedDocument(filename=name, extension='.txt', stream=io.BytesIO(text.encode('utf-8')))
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch) -> FakeEncoder:
+    """The FakeEncoder every SimilarityEngine built in the test uses."""
+    encoder = FakeEncoder()
+    monkeypatch.setattr(similarity_engine_module, 'create_encoder', lambda *args, **kwargs: encoder)
+    return encoder
+
+
+@pytest.fixture
+def engine(fake_encoder):
+    """A SimilarityEngine over the fake encoder, without cache or scheduler."""
+    return similarity_engine_module.SimilarityEngine()
@@ -0,0 +1,86 @@
+"""Unit tests for section detection and document chunking."""
+import numpy as np
+
+from app.services.chunking import (
+    ChunkingConfig, ChunkPooling, DocumentChunker, SECTION_BREAK, is_section_heading, split_sections
+)
+from app.services.similarity_engine import SimilarityEngine
+from conftest import FakeTokenizer
+
+
+def token_count(text: str) -> int:
+    return sum(len(ids) for ids in FakeTokenizer()(text.split())['input_ids'])
+
+
+def test_is_section_heading():
+    assert is_section_heading('WORK EXPERIENCE')
+    assert is_section_heading('Technical Skills:')
+    assert is_section_heading('Projects & Achievements')
+    assert is_section_heading('  Education  ')
+
+
+def test_body_text_is_not_a_heading():
+    assert not is_section_heading('Led the project to migrate billing to Kotlin')
+    assert not is_section_heading('skills')
+    assert not is_section_heading('Built Interests Graph Service For Search')
+    assert not is_section_heading('Senior Software Engineer')
+    assert not is_section_heading('')
+
+
+def test_split_sections():
+    text = 'Jane Doe\njane@example.com\nEXPERIENCE\nAcme Corp\nEducation:\nBSc Physics'
+
+    assert split_sections(text) == ['Jane Doe\njane@example.com', 'EXPERIENCE\nAcme Corp', 'Education:\nBSc Physics']
+    assert split_sections('SKILLS\nPython') == ['SKILLS\nPython']
+
+
+def test_short_document_is_one_chunk():
+    chunker = DocumentChunker(FakeTokenizer(), max_tokens=50)
+
+    assert chunker.chunk('python developer' + SECTION_BREAK + 'skills sql') == ['python developer skills sql']
+
+
+def test_windows_fit_and_overlap():
+    chunker = DocumentChunker(FakeTokenizer(), max_tokens=10, overlap=3)
+    words = [f"w{i}" for i in range(30)]
+
+    chunks = chunker.chunk(' '.join(words))
+
+    assert all(token_count(chunk) <= 10 for chunk in chunks)
+    assert chunks[0].split()[-3:] == chunks[1].split()[:3]
+    # Every word appears, in order, once overlaps are removed
+    covered = chunks[0].split()
+    for chunk in chunks[1:]:
+        covered += chunk.split()[3:]
+    assert covered == words
+
+
+def test_window_ends_at_section_start():
+    chunker = DocumentChunker(FakeTokenizer(), max_tokens=10, overlap=3)
+    text = ' '.join(f"a{i}" for i in range(7)) + SECTION_BREAK + ' '.join(f"b{i}" for i in range(7))
+
+    chunks = chunker.chunk(text)
+
+    assert chunks[0] == ' '.join(f"a{i}" for i in range(7))
+    assert chunks[1].startswith('b0')
+
+
+def test_overlong_word_is_its_own_chunk():
+    chunker = DocumentChunker(FakeTokenizer(), max_tokens=4, overlap=1)
+
+    chunks = chunker.chunk('a ' + 'x' * 40 + ' b')
+
+    assert 'x' * 40 in chunks
+    assert all(chunk for chunk in chunks)
+
+
+def test_engine_pools_chunk_embeddings(fake_encoder):
+    long_text = ' '.join(f"word{i}" for i in range(200))
+    engine = SimilarityEngine(chunking=ChunkingConfig(pooling=ChunkPooling.MEAN, max_tokens=20, overlap=4))
+
+    embeddings = engine.encode([long_text, 'python developer']).numpy()
+
+    assert embeddings.shape == (2, fake_encoder.get_dimension())
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+    assert fake_encoder.texts_encoded > 2
+    assert engine.cache_namespace == 'fake-model:chunks-20-4-mean'
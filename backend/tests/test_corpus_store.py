@@ -0,0 +1,152 @@
+"""Unit tests for the IVF index and the persistent resume corpus."""
+import os
+
+import numpy as np
+import pytest
+
+from app.services import corpus_store as corpus_store_module
+from app.services.ann_index import IVFIndex, top_k_scores
+from app.services.corpus_store import CorpusError, CorpusStore
+
+DIM = 16
+
+
+def unit_vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def documents(count: int, start: int = 0):
+    return [{'text': f"resume {i}", 'filename': f"resume_{i}.pdf"} for i in range(start, start + count)]
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, top_k: int):
+    return top_k_scores(np.arange(len(vectors)), vectors @ query, top_k)
+
+
+def test_top_k_scores_sorts_best_first():
+    assert top_k_scores(np.array([10, 11, 12]), np.array([0.2, 0.9, 0.5]), 2) == [(11, 0.9), (12, 0.5)]
+    assert top_k_scores(np.array([10]), np.array([0.2]), 0) == []
+
+
+def test_ivf_with_every_partition_probed_is_exact():
+    vectors = unit_vectors(500)
+    index = IVFIndex(DIM, nlist=16)
+    index.train(vectors)
+    index.set_assignments(index.assign(vectors))
+    query = unit_vectors(1, seed=1)[0]
+
+    assert index.search(query, vectors, 10, nprobe=16) == exact_search(vectors, query, 10)
+
+
+def test_ivf_clamps_nprobe():
+    vectors = unit_vectors(200)
+    index = IVFIndex(DIM, nlist=8)
+    index.train(vectors)
+    index.set_assignments(index.assign(vectors))
+    query = unit_vectors(1, seed=1)[0]
+
+    assert index.search(query, vectors, 5, nprobe=1000) == exact_search(vectors, query, 5)
+    assert len(index.search(query, vectors, 5, nprobe=0)) > 0
+
+
+def test_exact_search_below_train_size(tmp_path):
+    store = CorpusStore(str(tmp_path), DIM, min_train_size=100)
+    vectors = unit_vectors(20)
+    store.add(documents(20), vectors)
+
+    assert store.stats()['index'] == 'exact'
+    assert store.search(vectors[7], top_k=1)[0][0] == 7
+
+
+def test_trains_index_and_matches_exact_search(tmp_path):
+    store = CorpusStore(str(tmp_path), DIM, min_train_size=200)
+    vectors = unit_vectors(400)
+    store.add(documents(400), vectors)
+    query = unit_vectors(1, seed=1)[0]
+
+    stats = store.stats()
+    assert stats['index'] == 'ivf'
+    found = store.search(query, top_k=10, nprobe=stats['partitions'])
+    expected = exact_search(vectors, query, 10)
+    assert [resume_id for resume_id, _ in found] == [resume_id for resume_id, _ in expected]
+    np.testing.assert_allclose([score for _, score in found], [score for _, score in expected], rtol=1e-5)
+
+
+def test_duplicates_keep_their_id(tmp_path):
+    store = CorpusStore(str(tmp_path), DIM)
+    first = store.add(documents(3), unit_vectors(3))
+
+    second = store.add(documents(2, start=2), unit_vectors(2, seed=1))
+
+    assert first == [0, 1, 2]
+    assert second == [2, 3]
+    assert len(store) == 4
+
+
+def test_get_documents_beyond_sql_chunk_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_store_module, 'SQL_CHUNK_SIZE', 3)
+    store = CorpusStore(str(tmp_path), DIM)
+    store.add(documents(10), unit_vectors(10))
+
+    fetched = store.get_documents(list(range(10)))
+
+    assert sorted(fetched) == list(range(10))
+    assert fetched[4]['filename'] == 'resume_4.pdf'
+    assert len(store.find_existing([CorpusStore.content_hash(f"resume {i}") for i in range(10)])) == 10
+
+
+def test_refuses_another_namespace(tmp_path):
+    CorpusStore(str(tmp_path), DIM, namespace='model-a').add(documents(2), unit_vectors(2))
+
+    store = CorpusStore(str(tmp_path), DIM, namespace='model-b')
+
+    assert store.stats()['namespace'] == 'model-a'
+    with pytest.raises(CorpusError):
+        store.search(unit_vectors(1)[0])
+    with pytest.raises(CorpusError):
+        store.add(documents(1, start=5), unit_vectors(1))
+
+
+def test_failed_write_rolls_back_rows_and_vectors(tmp_path, monkeypatch):
+    store = CorpusStore(str(tmp_path), DIM)
+    store.add(documents(2), unit_vectors(2))
+    size = os.path.getsize(os.path.join(str(tmp_path), CorpusStore.VECTORS_FILE))
+
+    class PartialWrite:
+        """File that writes half of the data and then fails, like a full disk."""
+
+        def __init__(self, path, mode):
+            self.file = open(path, mode)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            self.file.close()
+
+        def fileno(self):
+            return self.file.fileno()
+
+        def write(self, data):
+            self.file.write(data[:len(data) // 2])
+            self.file.flush()
+            raise OSError('No space left on device')
+
+    monkeypatch.setattr(corpus_store_module, 'open', PartialWrite, raising=False)
+    with pytest.raises(OSError):
+        store.add(documents(3, start=2), unit_vectors(3, seed=1))
+    monkeypatch.undo()
+
+    assert os.path.getsize(os.path.join(str(tmp_path), CorpusStore.VECTORS_FILE)) == size
+    assert len(store) == 2
+    assert store.add(documents(1, start=2), unit_vectors(1, seed=1)) == [2]
+
+
+def test_reopen_discards_orphaned_vectors(tmp_path):
+    store = CorpusStore(str(tmp_path), DIM)
+    store.add(documents(2), unit_vectors(2))
+    with open(os.path.join(str(tmp_path), CorpusStore.VECTORS_FILE), 'ab') as f:
+        f.write(unit_vectors(3, seed=1).tobytes())
+
+    assert len(CorpusStore(str(tmp_path), DIM)) == 2
@@ -0,0 +1,131 @@
+"""Unit tests for the persistent embedding cache."""
+import threading
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.similarity_engine import SimilarityEngine
+
+DIM = 8
+
+
+def vectors(count: int, start: int = 0) -> np.ndarray:
+    return np.arange(start * DIM, (start + count) * DIM, dtype=np.float32).reshape(count, DIM)
+
+
+def keys(count: int, start: int = 0):
+    return [EmbeddingCache.make_key(f"document {i}", 'model') for i in range(start, start + count)]
+
+
+def test_roundtrip(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=10)
+    cache.put_many(keys(3), vectors(3))
+
+    found = cache.get_many(keys(4))
+
+    assert sorted(found) == [0, 1, 2]
+    for position, vector in found.items():
+        np.testing.assert_array_equal(vector, vectors(3)[position])
+    assert cache.stats()['hits'] == 3
+    assert cache.stats()['misses'] == 1
+
+
+def test_key_depends_on_namespace():
+    assert EmbeddingCache.make_key('text', 'model') != EmbeddingCache.make_key('text', 'model:onnx')
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=3)
+    cache.put_many(keys(3), vectors(3))
+    # Touch document 0 so document 1 becomes the least recently used entry
+    cache.get_many(keys(1))
+
+    cache.put_many(keys(1, start=3), vectors(1, start=3))
+
+    assert sorted(cache.get_many(keys(4))) == [0, 2, 3]
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 3
+
+
+def test_reused_slot_holds_the_new_vector(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=2)
+    cache.put_many(keys(2), vectors(2))
+
+    cache.put_many(keys(2, start=2), vectors(2, start=2))
+
+    found = cache.get_many(keys(2, start=2))
+    np.testing.assert_array_equal(np.stack([found[0], found[1]]), vectors(2, start=2))
+    assert cache.get_many(keys(2)) == {}
+
+
+def test_shared_between_instances(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=10)
+    writer.put_many(keys(2), vectors(2))
+
+    reader = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=10)
+
+    assert sorted(reader.get_many(keys(2))) == [0, 1]
+    assert not reader.read_only
+
+
+def test_other_size_opens_read_only(tmp_path):
+    owner = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=10)
+    owner.put_many(keys(2), vectors(2))
+
+    other = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=5)
+    other.put_many(keys(1, start=5), vectors(1, start=5))
+
+    assert other.read_only
+    assert sorted(other.get_many(keys(2))) == [0, 1]
+    # The owner's entries survive and the read-only instance wrote nothing
+    assert sorted(owner.get_many(keys(2))) == [0, 1]
+    assert owner.get_many(keys(1, start=5)) == {}
+
+
+def test_other_dimension_misses(tmp_path):
+    EmbeddingCache(str(tmp_path), dim=DIM, max_entries=10).put_many(keys(1), vectors(1))
+
+    other = EmbeddingCache(str(tmp_path), dim=DIM * 2, max_entries=10)
+
+    assert other.read_only
+    assert other.get_many(keys(1)) == {}
+
+
+def test_concurrent_writers_and_readers(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dim=DIM, max_entries=16)
+    errors = []
+
+    def worker(offset: int):
+        try:
+            for round_ in range(10):
+                start = (offset * 3 + round_) % 24
+                batch = keys(4, start=start)
+                cache.put_many(batch, vectors(4, start=start))
+                for position, vector in cache.get_many(batch).items():
+                    # Whatever survives eviction must be this key's own vector
+                    np.testing.assert_array_equal(vector, vectors(1, start=start + position)[0])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.stats()['entries'] <= 16
+
+
+def test_engine_reuses_cached_embeddings(tmp_path, fake_encoder):
+    engine = SimilarityEngine(cache_dir=str(tmp_path), cache_max_entries=100)
+    texts = ['python developer', 'java developer']
+
+    first = engine.encode(texts)
+    calls = fake_encoder.texts_encoded
+    second = SimilarityEngine(cache_dir=str(tmp_path), cache_max_entries=100).encode(texts + ['sql analyst'])
+
+    # Only the new text reaches the encoder; cached rows come back unchanged
+    assert fake_encoder.texts_encoded == calls + 1
+    np.testing.assert_allclose(second[:2].numpy(), first.numpy())
@@ -0,0 +1,130 @@
+"""Unit tests for the match job queue."""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app.services.job_queue import JobQueue, JobStatus
+
+
+def events():
+    yield {'type': 'progress', 'stage': 'parsing', 'progress': {'parsing': {'done': 1, 'total': 2}}}
+    yield {'type': 'ranking', 'matches': [{'resume_id': 0, 'rank': 1, 'similarity_score': 0.9}]}
+    yield {'type': 'result', 'result': {'matches': 1}}
+
+
+def failing_events():
+    yield {'type': 'progress', 'stage': 'parsing', 'progress': {}}
+    raise RuntimeError('parser crashed')
+
+
+def run(queue: JobQueue, job, on_finish=None) -> dict:
+    job_id = queue.submit(job, on_finish)
+    queue.shutdown(wait=True)
+    return queue.get(job_id)
+
+
+def insert_job(queue: JobQueue, owner: str, updated_at: float) -> str:
+    job_id = f"job-{owner}-{updated_at}"
+    queue._save(job_id, {
+        'status': JobStatus.RUNNING.value, 'created_at': updated_at, 'owner': owner
+    }, insert=True)
+    with queue._connection() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (updated_at, job_id))
+    return job_id
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def queue(request, tmp_path):
+    return JobQueue(db_path=str(tmp_path / 'jobs.sqlite3') if request.param == 'sqlite' else None)
+
+
+def test_completed_job(queue):
+    finished = []
+
+    job = run(queue, events, on_finish=lambda: finished.append(True))
+
+    assert job['status'] == JobStatus.COMPLETED.value
+    assert job['result'] == {'matches': 1}
+    assert job['partial_ranking'][0]['resume_id'] == 0
+    assert job['progress'] == {'parsing': {'done': 1, 'total': 2}}
+    assert job['stage'] is None
+    assert finished == [True]
+
+
+def test_failed_job(queue):
+    finished = []
+
+    job = run(queue, failing_events, on_finish=lambda: finished.append(True))
+
+    assert job['status'] == JobStatus.FAILED.value
+    assert job['error'] == 'parser crashed'
+    assert finished == [True]
+
+
+def test_unknown_job(queue):
+    assert queue.get('missing') is None
+
+
+def test_purges_old_finished_jobs(queue):
+    job_id = queue.submit(events)
+    queue.shutdown(wait=True)
+    queue.retention = 0.0
+    time.sleep(0.01)
+
+    queue.submit(events)
+    queue.shutdown(wait=True)
+
+    assert queue.get(job_id) is None
+
+
+def test_state_is_shared_between_queues(tmp_path):
+    db_path = str(tmp_path / 'jobs.sqlite3')
+    job_id = run(JobQueue(db_path=db_path), events)['job_id']
+
+    assert JobQueue(db_path=db_path).get(job_id)['status'] == JobStatus.COMPLETED.value
+
+
+def test_fails_jobs_of_a_dead_worker(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / 'jobs.sqlite3'))
+    job_id = insert_job(queue, f"{socket.gethostname()}:{dead_pid()}", time.time())
+
+    job = queue.get(job_id)
+
+    assert job['status'] == JobStatus.FAILED.value
+    assert job['error'] == 'Worker stopped before the job finished'
+
+
+def test_startup_fails_orphaned_jobs(tmp_path):
+    db_path = str(tmp_path / 'jobs.sqlite3')
+    job_id = insert_job(JobQueue(db_path=db_path), f"{socket.gethostname()}:{dead_pid()}", time.time())
+
+    queue = JobQueue(db_path=db_path)
+    row = queue._connection().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    assert row[0] == JobStatus.FAILED.value
+
+
+def test_keeps_jobs_of_a_live_worker(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / 'jobs.sqlite3'))
+    job_id = insert_job(queue, f"{socket.gethostname()}:{os.getpid()}", time.time() - 10 * queue.stale_after)
+
+    assert queue.get(job_id)['status'] == JobStatus.RUNNING.value
+
+
+def test_jobs_on_another_host_fail_once_stale(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / 'jobs.sqlite3'), stale_after=60.0)
+    recent = insert_job(queue, 'other-host:1', time.time())
+    stale = insert_job(queue, 'other-host:2', time.time() - 120.0)
+
+    assert queue.get(recent)['status'] == JobStatus.RUNNING.value
+    assert queue.get(stale)['status'] == JobStatus.FAILED.value
@@ -0,0 +1,134 @@
+"""Unit tests for the batched match pipeline."""
+import pytest
+
+from app.services.match_pipeline import MatchError, MatchPipeline
+from app.services.similarity_engine import SimilarityConfig, SimilarityMetric
+from app.services.skill_index import SkillQuery
+from conftest import FakeParser, FakePreprocessor, FakeSkillExtractor, make_upload
+
+JD = 'Backend developer: python, django, sql and docker'
+RESUMES = [
+    'python django developer with sql',
+    'java spring developer',
+    'react frontend developer',
+    'python data analyst, sql and docker',
+    'php developer',
+    'python developer using docker',
+    'django and python backend developer, sql, docker',
+    'java developer with sql',
+    'frontend react and php',
+    'python scripting'
+]
+
+
+@pytest.fixture
+def pipeline(engine):
+    return MatchPipeline(FakeParser(), FakePreprocessor(), engine, FakeSkillExtractor())
+
+
+def uploads(texts):
+    return [make_upload(f"resume_{i}.txt", text) for i, text in enumerate(texts)]
+
+
+def resume_ids(matches):
+    return [match['resume_id'] for match in matches]
+
+
+def scores(matches):
+    return [match['similarity_score'] for match in matches]
+
+
+@pytest.mark.parametrize('metric', list(SimilarityMetric))
+@pytest.mark.parametrize('top_k', [0, 3])
+def test_batched_ranking_equals_single_shot(pipeline, metric, top_k):
+    config = SimilarityConfig(metric=metric, top_k=top_k)
+
+    single = pipeline.run_to_completion(make_upload('jd.txt', JD), uploads(RESUMES), config)
+    batched = pipeline.run_to_completion(make_upload('jd.txt', JD), uploads(RESUMES), config, batch_size=3)
+
+    assert resume_ids(batched['matches']) == resume_ids(single['matches'])
+    assert scores(batched['matches']) == pytest.approx(scores(single['matches']))
+    assert [match['rank'] for match in batched['matches']] == list(range(1, len(batched['matches']) + 1))
+    assert batched['resumes']['count'] == single['resumes']['count'] == len(RESUMES)
+    assert len(single['matches']) == (top_k or len(RESUMES))
+
+
+def test_stream_final_ranking_equals_run(pipeline):
+    config = SimilarityConfig(top_k=4)
+    result = pipeline.run_to_completion(make_upload('jd.txt', JD), uploads(RESUMES), config)
+
+    events = list(pipeline.stream(make_upload('jd.txt', JD), uploads(RESUMES), config, batch_size=4))
+
+    final = events[-1]
+    assert final['final']
+    assert resume_ids(final['matches']) == resume_ids(result['matches'])
+    assert scores(final['matches']) == pytest.approx(scores(result['matches']))
+    assert len([event for event in events if event['type'] == 'resume']) == len(RESUMES)
+
+
+def test_progress_and_partial_rankings(pipeline):
+    events = list(pipeline.run(make_upload('jd.txt', JD), uploads(RESUMES), SimilarityConfig(top_k=2), batch_size=4))
+
+    partial = [event for event in events if event['type'] == 'ranking']
+    assert len(partial) == 3
+    assert all(len(event['matches']) <= 2 for event in partial)
+    last_progress = [event for event in events if event['type'] == 'progress'][-1]['progress']
+    assert last_progress['parsing'] == {'done': len(RESUMES), 'total': len(RESUMES)}
+    assert last_progress['skills'] == {'done': 2, 'total': 2}
+    assert events[-1]['type'] == 'result'
+
+
+def test_unparsed_resumes_are_skipped(pipeline):
+    texts = ['', 'python developer', '', 'java developer']
+
+    result = pipeline.run_to_completion(make_upload('jd.txt', JD), uploads(texts), SimilarityConfig(top_k=0), batch_size=2)
+
+    # Resume ids count parsed resumes only
+    assert sorted(match['resume_id'] for match in result['matches']) == ['resume_0', 'resume_1']
+    assert result['resumes']['count'] == 2
+
+
+def test_skill_filter_drops_resumes_before_ranking(pipeline, fake_encoder):
+    query = SkillQuery('python AND (docker OR sql)')
+
+    result = pipeline.run_to_completion(
+        make_upload('jd.txt', JD), uploads(RESUMES), SimilarityConfig(top_k=0), batch_size=4, skill_filter=query
+    )
+
+    assert sorted(match['resume_id'] for match in result['matches']) == ['resume_0', 'resume_3', 'resume_5', 'resume_6']
+    assert result['skill_filter']['eligible'] == 4
+    # Only the JD and the eligible resumes are embedded
+    assert fake_encoder.texts_encoded == 5
+
+
+def test_skill_matches_are_attached(pipeline):
+    result = pipeline.run_to_completion(make_upload('jd.txt', JD), uploads(RESUMES), SimilarityConfig(top_k=1))
+
+    skill_match = result['matches'][0]['skill_match']
+    assert set(skill_match['matching_skills']) | set(skill_match['missing_skills']) == {'python', 'django', 'sql', 'docker'}
+
+
+def test_unparsed_job_description(pipeline):
+    with pytest.raises(MatchError):
+        pipeline.run_to_completion(make_upload('jd.txt', ''), uploads(RESUMES), SimilarityConfig())
+
+
+def test_no_parsed_resumes(pipeline):
+    with pytest.raises(MatchError):
+        pipeline.run_to_completion(make_upload('jd.txt', JD), uploads(['', '']), SimilarityConfig())
+
+
+def test_statistics_cover_every_parsed_resume(pipeline):
+    texts = RESUMES[:4] + [''] + RESUMES[4:]
+    result = pipeline.run_to_completion(
+        make_upload('jd.txt', JD), uploads(texts), SimilarityConfig(top_k=2), batch_size=3,
+        skill_filter=SkillQuery('python')
+    )
+
+    statistics = result['resumes']['statistics']
+    assert result['resumes']['count'] == len(RESUMES)
+    assert [entry['resume_id'] for entry in statistics] == [f"resume_{i}" for i in range(len(RESUMES))]
+    # Resumes dropped by the skill filter still report their statistics
+    assert [entry['word_count'] for entry in statistics] == [
+        len(FakePreprocessor().preprocess_text(text).split()) for text in RESUMES
+    ]
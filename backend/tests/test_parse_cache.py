@@ -0,0 +1,75 @@
+"""Unit tests for the two-tier parse cache."""
+from app.services.parse_cache import ParseCache
+from app.services.parser import DocumentParser
+
+
+def test_key_depends_on_content_and_extension():
+    key = ParseCache.make_key(b'resume', '.pdf')
+
+    assert key == ParseCache.make_key(b'resume', '.PDF')
+    assert key != ParseCache.make_key(b'resume', '.docx')
+    assert key != ParseCache.make_key(b'resume 2', '.pdf')
+
+
+def test_key_depends_on_parser_version(monkeypatch):
+    key = ParseCache.make_key(b'resume', '.pdf')
+    monkeypatch.setattr(ParseCache, 'PARSER_VERSION', ParseCache.PARSER_VERSION + 1)
+
+    assert ParseCache.make_key(b'resume', '.pdf') != key
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ParseCache(max_entries=2)
+    cache.put('a', 'text a')
+    cache.put('b', 'text b')
+    cache.get('a')
+
+    cache.put('c', 'text c')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'text a'
+    assert cache.get('c') == 'text c'
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['memory_hits'] == 3
+    assert stats['misses'] == 1
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    db_path = str(tmp_path / 'parse_cache.sqlite3')
+    ParseCache(db_path=db_path).put('a', 'text a')
+
+    cache = ParseCache(db_path=db_path)
+
+    assert cache.get('a') == 'text a'
+    assert cache.get('a') == 'text a'
+    stats = cache.stats()
+    assert stats['disk_hits'] == 1
+    assert stats['memory_hits'] == 1
+
+
+def test_disk_tier_outlives_memory_eviction(tmp_path):
+    cache = ParseCache(max_entries=1, db_path=str(tmp_path / 'parse_cache.sqlite3'))
+    cache.put('a', 'text a')
+    cache.put('b', 'text b')
+
+    assert cache.get('a') == 'text a'
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_parser_extracts_identical_uploads_once(monkeypatch):
+    parser = DocumentParser(cache=ParseCache())
+    calls = []
+
+    def extract(data, extension):
+        calls.append(data)
+        return 'Python developer'
+
+    monkeypatch.setattr(parser, 'extract_text_from_bytes', extract)
+
+    first = parser.parse_bytes(b'same bytes', '.pdf')
+    second = parser.parse_bytes(b'same bytes', '.pdf')
+    parser.parse_bytes(b'other bytes', '.pdf')
+
+    assert first == second == 'Python developer'
+    assert calls == [b'same bytes', b'other bytes']
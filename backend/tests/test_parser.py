@@ -0,0 +1,55 @@
+"""Unit tests for the DocumentParser process pool."""
+import time
+
+from app.services import parser as parser_module
+from app.services.parser import DocumentParser
+
+
+def test_single_document_is_parsed_with_timeout(monkeypatch):
+    def slow_parse(self, source):
+        time.sleep(10)
+        return 'never returned'
+
+    # Pool workers are forked, so they inherit the patched method
+    monkeypatch.setattr(DocumentParser, 'parse_source', slow_parse)
+    parser = DocumentParser(workers=1, timeout=0.5)
+    try:
+        started = time.monotonic()
+        assert parser.parse_documents(['resume.pdf']) == [None]
+        assert time.monotonic() - started < 5
+    finally:
+        parser.shutdown()
+
+
+def test_retired_pool_outlives_its_rounds(monkeypatch):
+    terminated = []
+    monkeypatch.setattr(parser_module._ParsePool, 'terminate', lambda pool: terminated.append(pool))
+    parser = DocumentParser(workers=2)
+
+    pool = parser._acquire_pool(2)
+    assert parser._acquire_pool(2) is pool
+    parser._release_pool(pool, retire=True)
+
+    # A timeout in one round leaves the pool to the other round, new rounds get a new pool
+    assert terminated == []
+    replacement = parser._acquire_pool(2)
+    assert replacement is not pool
+
+    parser._release_pool(pool, retire=False)
+    assert terminated == [pool]
+    parser._release_pool(replacement, retire=False)
+    parser.shutdown()
+
+
+def test_busy_pool_is_not_resized():
+    parser = DocumentParser(workers=2)
+    pool = parser._acquire_pool(2)
+
+    assert parser._acquire_pool(4) is pool
+    parser._release_pool(pool, retire=False)
+    parser._release_pool(pool, retire=False)
+
+    resized = parser._acquire_pool(4)
+    assert resized is not pool and resized.workers == 4
+    parser._release_pool(resized, retire=False)
+    parser.shutdown()
@@ -0,0 +1,108 @@
+"""Unit tests for the fused scoring kernel and ranking of SimilarityEngine."""
+import numpy as np
+import pytest
+import torch
+
+from app.services.similarity_engine import SimilarityConfig, SimilarityMetric
+
+RESUMES = [
+    'python django developer sql',
+    'java spring developer',
+    'react frontend developer',
+    'python data analyst sql',
+    'php developer'
+]
+
+
+def random_embeddings(rows: int, dim: int = 32, seed: int = 0) -> torch.Tensor:
+    return torch.from_numpy(np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32))
+
+
+@pytest.mark.parametrize('metric', list(SimilarityMetric))
+def test_score_matrix_matches_reference(engine, metric):
+    sources, targets = random_embeddings(3), random_embeddings(7, seed=1)
+
+    scores = engine.score_matrix(sources, targets, SimilarityConfig(metric=metric))
+
+    source = sources.numpy() / np.linalg.norm(sources.numpy(), axis=1, keepdims=True)
+    target = targets.numpy() / np.linalg.norm(targets.numpy(), axis=1, keepdims=True)
+    cosine = source @ target.T
+    distance = np.linalg.norm(source[:, None, :] - target[None, :, :], axis=-1)
+    euclidean = 1 / (1 + distance)
+    expected = {
+        SimilarityMetric.COSINE: cosine,
+        SimilarityMetric.EUCLIDEAN: euclidean,
+        SimilarityMetric.COMBINED: 0.7 * cosine + 0.3 * euclidean
+    }[metric]
+    assert scores['score'].shape == (3, 7)
+    np.testing.assert_allclose(scores['cosine'].numpy(), cosine, atol=1e-5)
+    np.testing.assert_allclose(scores['euclidean'].numpy(), euclidean, atol=1e-5)
+    np.testing.assert_allclose(scores['score'].numpy(), expected, atol=1e-5)
+
+
+def test_score_matrix_accepts_single_source(engine):
+    scores = engine.score_matrix(random_embeddings(1)[0], random_embeddings(4, seed=1), SimilarityConfig())
+
+    assert scores['score'].shape == (1, 4)
+
+
+def test_combined_weights(engine):
+    sources, targets = random_embeddings(2), random_embeddings(5, seed=1)
+    config = SimilarityConfig(metric=SimilarityMetric.COMBINED, weights={'cosine': 1.0, 'euclidean': 0.0})
+
+    scores = engine.score_matrix(sources, targets, config)
+
+    np.testing.assert_allclose(scores['score'].numpy(), scores['cosine'].numpy())
+
+
+def test_partial_combined_weights_keep_defaults(engine):
+    sources, targets = random_embeddings(2), random_embeddings(5, seed=1)
+    config = SimilarityConfig(metric=SimilarityMetric.COMBINED, weights={'cosine': 0.5})
+
+    scores = engine.score_matrix(sources, targets, config)
+
+    expected = 0.5 * scores['cosine'].numpy() + 0.3 * scores['euclidean'].numpy()
+    np.testing.assert_allclose(scores['score'].numpy(), expected, atol=1e-6)
+
+
+def test_threshold_and_top_k(engine):
+    results = engine.compute_similarity('python developer sql', RESUMES, SimilarityConfig(top_k=2))
+    everything = engine.compute_similarity('python developer sql', RESUMES, SimilarityConfig(top_k=0))
+    threshold = everything[2]['similarity_score']
+    above = engine.compute_similarity('python developer sql', RESUMES, SimilarityConfig(top_k=0, threshold=threshold))
+
+    assert [result['rank'] for result in results] == [1, 2]
+    assert [result['index'] for result in results] == [result['index'] for result in everything[:2]]
+    scores = [result['similarity_score'] for result in everything]
+    assert scores == sorted(scores, reverse=True)
+    assert len(everything) == len(RESUMES)
+    assert [result['index'] for result in above] == [result['index'] for result in everything[:3]]
+
+
+def test_rank_embeddings_matrix_matches_rank_embeddings(engine):
+    jds = ['python developer sql', 'java spring developer']
+    config = SimilarityConfig(metric=SimilarityMetric.COMBINED, top_k=3)
+    jd_embeddings = engine.encode(jds)
+    resume_embeddings = engine.encode(RESUMES)
+
+    batched = engine.rank_embeddings_matrix(jd_embeddings, resume_embeddings, config)
+
+    for jd_embedding, rankings in zip(jd_embeddings, batched):
+        single = engine.rank_embeddings(jd_embedding, resume_embeddings, config)
+        assert [result['index'] for result in rankings] == [result['index'] for result in single]
+        np.testing.assert_allclose(
+            [result['similarity_score'] for result in rankings],
+            [result['similarity_score'] for result in single],
+            atol=1e-6
+        )
+
+
+def test_compute_similarity_matrix_matches_compute_similarity(engine):
+    jds = ['python developer sql', 'react frontend']
+    config = SimilarityConfig(top_k=0)
+
+    matrix = engine.compute_similarity_matrix(jds, RESUMES, config)
+
+    for jd, rankings in zip(jds, matrix):
+        single = engine.compute_similarity(jd, RESUMES, config)
+        assert [result['index'] for result in rankings] == [result['index'] for result in single]
@@ -0,0 +1,130 @@
+"""Unit tests for skill filter parsing and the skill bitset index."""
+import numpy as np
+import pytest
+
+from app.services.corpus_store import CorpusStore
+from app.services.skill_index import SkillIndex, SkillQuery
+
+
+@pytest.mark.parametrize('expression, root', [
+    ('python', ('skill', 'python')),
+    ('Machine Learning', ('skill', 'machine learning')),
+    ('"spring boot"', ('skill', 'spring boot')),
+    ('java, sql', ('and', [('skill', 'java'), ('skill', 'sql')])),
+    ('NOT php', ('not', ('skill', 'php'))),
+    ('not not php', ('not', ('not', ('skill', 'php')))),
+])
+def test_parse(expression, root):
+    assert SkillQuery(expression).root == root
+
+
+def test_and_binds_tighter_than_or():
+    assert SkillQuery('java AND spring OR python').root == (
+        'or', [('and', [('skill', 'java'), ('skill', 'spring')]), ('skill', 'python')]
+    )
+    assert SkillQuery('java OR spring and python').root == (
+        'or', [('skill', 'java'), ('and', [('skill', 'spring'), ('skill', 'python')])]
+    )
+
+
+def test_not_binds_tightest():
+    assert SkillQuery('NOT php AND java').root == ('and', [('not', ('skill', 'php')), ('skill', 'java')])
+
+
+def test_parentheses_override_precedence():
+    assert SkillQuery('java AND (spring OR python)').root == (
+        'and', [('skill', 'java'), ('or', [('skill', 'spring'), ('skill', 'python')])]
+    )
+    assert SkillQuery('NOT (php OR perl)').root == ('not', ('or', [('skill', 'php'), ('skill', 'perl')]))
+
+
+def test_skills_are_normalized():
+    aliases = {'js': 'javascript', 'k8s': 'kubernetes'}
+    query = SkillQuery('JS and k8s', normalize=lambda name: aliases.get(name.lower(), name.lower()))
+
+    assert query.skills == {'javascript', 'kubernetes'}
+    assert str(query) == 'JS and k8s'
+
+
+@pytest.mark.parametrize('expression', [
+    '',
+    '   ',
+    'java AND',
+    'AND java',
+    'java OR OR python',
+    '(java',
+    'java)',
+    '"spring boot',
+    'NOT',
+    '()',
+    '""',
+])
+def test_malformed_expressions(expression):
+    with pytest.raises(ValueError):
+        SkillQuery(expression)
+
+
+def make_index():
+    index = SkillIndex()
+    index.add(0, ['java', 'spring'])
+    index.add(1, ['python', 'django'])
+    index.add(2, ['java', 'php'])
+    index.add(3, ['python', 'sql'])
+    index.add(5, ['java', 'spring', 'sql'])
+    return index
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('java', [0, 2, 5]),
+    ('java AND spring', [0, 5]),
+    ('java OR python', [0, 1, 2, 3, 5]),
+    ('java AND NOT php', [0, 5]),
+    ('NOT java', [1, 3, 4]),
+    ('python OR java AND sql', [1, 3, 5]),
+    ('(python OR java) AND sql', [3, 5]),
+    ('rust', []),
+])
+def test_match(expression, expected):
+    assert make_index().match(SkillQuery(expression)).tolist() == expected
+
+
+def test_not_covers_documents_without_skills():
+    index = make_index()
+    index.resize(10)
+
+    assert index.match(SkillQuery('NOT java')).tolist() == [1, 3, 4, 6, 7, 8, 9]
+    assert len(index) == 10
+
+
+def test_postings_survive_growth():
+    index = SkillIndex()
+    index.add(3, ['java'])
+    index.add(2000, ['python'])
+    index.add(1000, ['java'])
+
+    assert index.match(SkillQuery('java')).tolist() == [3, 1000]
+    assert index.match(SkillQuery('python')).tolist() == [2000]
+    assert len(index.match(SkillQuery('NOT java'))) == 2001 - 2
+
+
+def test_corpus_skill_filter(tmp_path):
+    store = CorpusStore(str(tmp_path), 4)
+    store.add(
+        [
+            {'text': 'resume 0', 'skills': ['java', 'spring']},
+            {'text': 'resume 1', 'skills': ['python']},
+            {'text': 'resume 2'}
+        ],
+        np.eye(3, 4, dtype=np.float32)
+    )
+
+    assert store.match_skills(SkillQuery('java')).tolist() == [0]
+    # Resumes without indexed skills still match NOT filters
+    assert store.match_skills(SkillQuery('NOT java')).tolist() == [1, 2]
+
+    indexed = store.index_missing_skills(lambda texts: [['java'] for _ in texts])
+
+    assert indexed == 1
+    assert store.match_skills(SkillQuery('java')).tolist() == [0, 2]
+    ids = store.match_skills(SkillQuery('java AND NOT spring'))
+    assert [resume_id for resume_id, _ in store.search(np.eye(4)[2], top_k=5, resume_ids=ids)] == [2]
@@ -0,0 +1,46 @@
+"""Unit tests for the text statistics derived from the preprocessing pass."""
+import pytest
+
+nltk = pytest.importorskip('nltk')
+
+from app.services.batch_processor import PreprocessingMode, TextPreprocessor, NLTK_RESOURCES
+
+TEXT = (
+    "SUMMARY\n"
+    "Senior Python developer, 8 years at ACME (2015-2023). Contact: jane@example.com\n"
+    "Built REST APIs; see https://example.com/portfolio for more!\n"
+    "______________________________\n"
+    "Led a team of 5 engineers.\n"
+)
+
+
+@pytest.fixture(scope='module')
+def preprocessors():
+    for resource_path in NLTK_RESOURCES:
+        try:
+            nltk.data.find(resource_path)
+        except LookupError:
+            pytest.skip(f"NLTK resource {resource_path} is not installed")
+    return {mode: TextPreprocessor(mode=mode) for mode in PreprocessingMode}
+
+
+def test_statistics_count_cleaned_words(preprocessors):
+    statistics = preprocessors[PreprocessingMode.ACCURATE].get_text_statistics(TEXT)
+    words = (
+        "summary senior python developer years at acme contact "
+        "built rest apis see for more led a team of engineers"
+    ).split()
+
+    # Punctuation, digits, the email, the URL and the underscore rule are not words
+    assert statistics['word_count'] == len(words)
+    assert statistics['unique_words'] == len(set(words))
+    assert statistics['avg_word_length'] == round(sum(map(len, words)) / len(words), 2)
+
+
+def test_statistics_do_not_depend_on_mode(preprocessors):
+    accurate = preprocessors[PreprocessingMode.ACCURATE]
+    fast = preprocessors[PreprocessingMode.FAST]
+
+    assert accurate.get_text_statistics(TEXT) == fast.get_text_statistics(TEXT)
+    assert accurate.analyze_text(TEXT).statistics == fast.analyze_text(TEXT).statistics
+    assert accurate.analyze_text(TEXT).statistics == accurate.get_text_statistics(TEXT)